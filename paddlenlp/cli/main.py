@@ -186,6 +186,15 @@ def server(
         15, "--timeout-keep-alive", help="Close Keep-Alive connections if no new data is received within this timeout."
     ),
     reload: bool = typer.Option(False, "--reload", help="Reload the server when the app_dir is changed."),
+    cpu_threads: int = typer.Option(
+        None,
+        "--cpu_threads",
+        help="Number of cpu math threads of the predictors in every worker. Defaults to the number of cpus divided"
+        " by the number of workers in multi worker mode.",
+    ),
+    pin_cpu: bool = typer.Option(
+        False, "--pin_cpu", help="Bind every worker process to the dedicated cpus in multi worker mode."
+    ),
 ):
     """The main function for the staring the SimpleServer"""
     logger.info("starting to PaddleNLP SimpleServer...")
@@ -204,7 +213,7 @@ def server(
         "app_dir": app_dir,
         "reload": reload,
     }
-    start_backend(app, **backend_kwargs)
+    start_backend(app, cpu_threads=cpu_threads, pin_cpu=pin_cpu, **backend_kwargs)
 
 
 @app.command(
@@ -13,14 +13,111 @@
 # see the license for the specific language governing permissions and
 # limitations under the license.
 
+import multiprocessing
+import os
+import signal
+import sys
+
 import uvicorn
 
+from ..server.utils import CPU_THREADS_ENV, WORKER_ID_ENV
 from ..utils.log import logger
 
 
-def start_backend(app, **kwargs):
+def _get_available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(multiprocessing.cpu_count()))
+
+
+def _assign_worker_cpus(workers, cpu_threads=None, pin_cpu=False):
+    """
+    Split the available cpus to the workers, return the list of (cpu_threads, cpus) for every worker,
+    the cpus is None if the worker is not pinned.
+    """
+    available_cpus = _get_available_cpus()
+    if cpu_threads is None:
+        cpu_threads = max(1, len(available_cpus) // workers)
+    assignments = []
+    for worker_id in range(workers):
+        cpus = None
+        if pin_cpu:
+            start = worker_id * cpu_threads
+            cpus = [available_cpus[(start + i) % len(available_cpus)] for i in range(cpu_threads)]
+        assignments.append((cpu_threads, cpus))
+    return assignments
+
+
+def _run_worker(app, sock, worker_id, cpu_threads, cpus, app_dir, config_kwargs):
+    os.environ[WORKER_ID_ENV] = str(worker_id)
+    os.environ[CPU_THREADS_ENV] = str(cpu_threads)
+    os.environ["OMP_NUM_THREADS"] = str(cpu_threads)
+    if cpus is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    if app_dir is not None:
+        sys.path.insert(0, app_dir)
+    # The app is imported in the worker process, so every worker owns its predictors
+    config = uvicorn.Config(app, **config_kwargs)
+    server = uvicorn.Server(config=config)
+    server.run(sockets=[sock])
+
+
+def start_multiprocess_backend(app, workers, cpu_threads=None, pin_cpu=False, **kwargs):
+    """
+    Start the pre-fork workers sharing one listening socket, every worker imports the app and creates
+    its own predictors, the cpu threads of predictor are set to `cpu_threads` and the worker is bound to
+    the dedicated cpus if `pin_cpu` is True.
+    """
+    if not isinstance(app, str):
+        raise ValueError("The app must be passed as the import string, such as 'server:app', in multi worker mode.")
+    app_dir = kwargs.pop("app_dir", None)
+    kwargs.pop("workers", None)
+    kwargs.pop("reload", None)
+    config = uvicorn.Config(app, **kwargs)
+    sock = config.bind_socket()
+
+    spawn = multiprocessing.get_context("spawn")
+    processes = []
+    for worker_id, (worker_cpu_threads, cpus) in enumerate(_assign_worker_cpus(workers, cpu_threads, pin_cpu)):
+        process = spawn.Process(
+            target=_run_worker,
+            args=(app, sock, worker_id, worker_cpu_threads, cpus, app_dir, kwargs),
+            name="paddlenlp-server-worker-{}".format(worker_id),
+        )
+        process.start()
+        logger.info(
+            "   the worker [{}] is started, pid={}, cpu_threads={}, cpus={}".format(
+                worker_id, process.pid, worker_cpu_threads, cpus
+            )
+        )
+        processes.append(process)
+
+    def _terminate(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, _terminate)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        _terminate(None, None)
+        for process in processes:
+            process.join()
+    finally:
+        sock.close()
+
+
+def start_backend(app, cpu_threads=None, pin_cpu=False, **kwargs):
     logger.info("The PaddleNLP SimpleServer is starting, backend component uvicorn arguments as follows:")
     for key, value in kwargs.items():
         if key != "log_config":
             logger.info("   the starting argument [{}]={}".format(key, value))
-    uvicorn.run(app, **kwargs)
+    workers = kwargs.get("workers", None) or 1
+    if workers > 1 and not kwargs.get("reload", False):
+        start_multiprocess_backend(app, workers, cpu_threads=cpu_threads, pin_cpu=pin_cpu, **kwargs)
+    else:
+        if cpu_threads is not None:
+            os.environ[CPU_THREADS_ENV] = str(cpu_threads)
+        uvicorn.run(app, **kwargs)
@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import bisect
 import copy
 import random
 import warnings
@@ -39,6 +40,8 @@ __all__ = [
     "DataCollatorForSeq2Seq",
     "DataCollatorForLanguageModeling",
     "DataCollatorForWholeWordMask",
+    "DataCollatorForSequencePacking",
+    "pack_sequences",
 ]
 
 InputDataClass = NewType("InputDataClass", Any)
@@ -852,3 +855,159 @@ class DataCollatorForWholeWordMask(DataCollatorForLanguageModeling):
 
         # The rest of the time (10% of the time) we keep the masked input tokens unchanged
         return inputs, labels
+
+
+# The fields concatenated when packing the examples, `labels` is padded by `label_pad_token_id`
+_PACKED_FIELDS = ("input_ids", "token_type_ids", "labels")
+
+
+def _pack_lengths(lengths: List[int], max_length: int) -> List[List[int]]:
+    """
+    Pack the examples into bins of `max_length` tokens by best-fit decreasing, returns the indices of the
+    examples in every bin. The bins are kept sorted by their remaining space, so every example finds the
+    fullest bin it fits by bisection.
+    """
+    bins = []
+    # The sorted (remaining space, bin index) of the bins which still have space
+    spaces = []
+    for idx in sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True):
+        length = min(lengths[idx], max_length)
+        pos = bisect.bisect_left(spaces, (length, -1))
+        if pos < len(spaces):
+            space, bin_id = spaces.pop(pos)
+            bins[bin_id].append(idx)
+        else:
+            space, bin_id = max_length, len(bins)
+            bins.append([idx])
+        if space - length > 0:
+            bisect.insort(spaces, (space - length, bin_id))
+    return bins
+
+
+def _concat_features(features: List[Dict[str, Any]], max_length: int) -> Dict[str, Any]:
+    packed = {"seq_lens": []}
+    for feature in features:
+        length = min(len(feature["input_ids"]), max_length)
+        for key in _PACKED_FIELDS:
+            if key in feature:
+                packed.setdefault(key, []).extend(tolist(feature[key])[:length])
+        packed["seq_lens"].append(length)
+    packed["position_ids"] = [i for length in packed["seq_lens"] for i in range(length)]
+    return packed
+
+
+def pack_sequences(features: List[Dict[str, Any]], max_length: int) -> List[Dict[str, Any]]:
+    """
+    Pack the tokenized examples into the rows of at most `max_length` tokens ahead of training, so that
+    `DataCollatorForSequencePacking` only needs to pad every row to `max_length`. The examples are packed by
+    best-fit decreasing, and the examples longer than `max_length` are truncated.
+
+    Args:
+        features (list): The examples, every example is a dict with `input_ids` and optionally `token_type_ids`
+            and `labels` of the same length.
+        max_length (int): The max number of tokens of every packed row.
+
+    Returns:
+        list: The packed examples, every one is a dict with the concatenated `input_ids` (`token_type_ids` and
+        `labels`), the `position_ids` restarting from 0 for every example and the lengths of the examples in
+        `seq_lens`.
+
+    Example:
+        .. code-block:: python
+
+            from paddlenlp.data import DataCollatorForSequencePacking, pack_sequences
+            from paddlenlp.datasets import MapDataset
+
+            train_ds = MapDataset(pack_sequences(list(train_ds), max_length=2048))
+            data_collator = DataCollatorForSequencePacking(tokenizer, max_length=2048)
+    """
+    lengths = [len(feature["input_ids"]) for feature in features]
+    return [
+        _concat_features([features[idx] for idx in indices], max_length)
+        for indices in _pack_lengths(lengths, max_length)
+    ]
+
+
+@dataclass
+class DataCollatorForSequencePacking:
+    """
+    Data collator that concatenates several examples into one row of `max_length` tokens instead of padding
+    every example to the longest one in the batch. The `position_ids` restart from 0 for every example and the
+    attention mask is block-diagonal so that the examples in the same row never attend to each other.
+
+    The examples which are not packed yet are packed inside the batch by best-fit decreasing, so the collator
+    may return fewer rows than the examples. The examples packed by `pack_sequences` (with `seq_lens`) are
+    collated one row each.
+
+    The 4-D attention mask is taken by GPT, LLaMA, BERT and ERNIE. Bloom (which derives ALiBi from the 2-D mask)
+    and ChatGLM (whose mask marks the positions not to attend) are not supported. Flash attention ignores the
+    mask, so it should be disabled when training on the packed rows.
+
+    Args:
+        tokenizer (`paddlenlp.transformers.PretrainedTokenizer`):
+            The tokenizer used for encoding the data, the `pad_token_id` is used to pad the rows.
+        max_length (`int`):
+            The number of tokens of every row, the examples longer than it are truncated.
+        causal (`bool`, *optional*, defaults to `True`):
+            Whether the attention mask of every example is lower triangular (for causal language models) or full
+            (for encoders).
+        additive_attention_mask (`bool`, *optional*, defaults to `False`):
+            If `False`, the attention mask of shape `[batch_size, 1, max_length, max_length]` is 1 where the token
+            could be attended and 0 otherwise, as taken by GPT. If `True`, it is 0 and -1e4 in float, which is the
+            4-D attention mask taken by BERT and ERNIE.
+        label_pad_token_id (`int`, *optional*, defaults to -100):
+            The id to use when padding the labels (-100 will be automatically ignored by PaddlePaddle loss functions).
+        return_tensors (`str`):
+            The type of Tensor to return. Allowable values are "np" and "pd".
+    """
+
+    tokenizer: PretrainedTokenizerBase
+    max_length: int
+    causal: bool = True
+    additive_attention_mask: bool = False
+    label_pad_token_id: int = -100
+    return_tensors: str = "pd"
+
+    def __call__(self, features, return_tensors=None):
+        if return_tensors is None:
+            return_tensors = self.return_tensors
+        if "seq_lens" not in features[0]:
+            features = pack_sequences(features, self.max_length)
+
+        num_rows, max_length = len(features), self.max_length
+        pad_values = {
+            "input_ids": self.tokenizer.pad_token_id,
+            "token_type_ids": self.tokenizer.pad_token_type_id,
+            "labels": self.label_pad_token_id,
+            "position_ids": 0,
+        }
+        batch = {
+            key: np.full((num_rows, max_length), value, dtype=np.int64)
+            for key, value in pad_values.items()
+            if key in features[0]
+        }
+        attention_mask = np.zeros((num_rows, 1, max_length, max_length), dtype=np.int64)
+        block_masks = {}
+        for i, feature in enumerate(features):
+            for key in batch:
+                values = feature[key][:max_length]
+                batch[key][i, : len(values)] = values
+            start = 0
+            for length in feature["seq_lens"]:
+                length = min(length, max_length - start)
+                if length not in block_masks:
+                    block_masks[length] = (
+                        np.tril(np.ones((length, length), dtype=np.int64))
+                        if self.causal
+                        else np.ones((length, length), dtype=np.int64)
+                    )
+                attention_mask[i, 0, start : start + length, start : start + length] = block_masks[length]
+                start += length
+
+        if self.additive_attention_mask:
+            attention_mask = (1.0 - attention_mask.astype(np.float32)) * -1e4
+        batch["attention_mask"] = attention_mask
+
+        if return_tensors == "pd":
+            batch = {key: paddle.to_tensor(value) for key, value in batch.items()}
+        return batch
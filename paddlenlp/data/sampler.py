@@ -17,6 +17,9 @@ import functools
 import math
 
 import numpy as np
+import paddle
+
+__all__ = ["SamplerHelper", "LengthGroupedBatchSampler"]
 
 
 class SamplerHelper(object):
@@ -414,3 +417,220 @@ class SamplerHelper(object):
             return iter(indices)
 
         return type(self)(self.data_source, _impl)
+
+
+class LengthGroupedBatchSampler(paddle.io.BatchSampler):
+    """
+    The batch sampler grouping the samples of similar lengths into the same
+    batch to reduce the paddings. The indices are shuffled, sorted by length
+    inside every mega-batch of `mega_batch_mult * batch_size * num_replicas`
+    samples and then batched, at last the order of the batches is shuffled,
+    which is the `shuffle` -> `sort` -> `batch` pipeline of :class:`SamplerHelper`.
+
+    If `max_tokens` is set, the batches are built by the token budget instead
+    of the number of samples: the number of the padded tokens
+    (`max length * number of samples`) of every batch is no more than
+    `max_tokens`.
+
+    Args:
+        dataset (paddle.io.Dataset): The dataset to sample from.
+        batch_size (int): The number of samples of every batch. When `max_tokens`
+            is set, it is only used to size the mega-batches and to convert
+            `consumed_samples` to the number of the consumed batches.
+        lengths (list, optional): The length of every sample. If None, the
+            lengths are read from the `length_column_name` field of the samples,
+            or computed as the length of the `input_ids` field (or of the first
+            field). Default: None.
+        length_column_name (str, optional): The field of the precomputed
+            lengths. Default: "length".
+        max_tokens (int, optional): The max number of the padded tokens of every
+            batch. The number of batches per epoch is fixed to the one of the
+            first epoch, the other epochs repeat or drop a few batches to match
+            it. Default: None.
+        num_replicas (int, optional): The number of training processes. If None,
+            it is retrieved from :class:`paddle.distributed.ParallelEnv`.
+            Default: None.
+        rank (int, optional): The rank of the current process. If None, it is
+            retrieved from :class:`paddle.distributed.ParallelEnv`. Default: None.
+        drop_last (bool, optional): Whether to drop the last incomplete batch
+            and the batches left over by the `num_replicas` processes. If False,
+            the left over batches are padded by repeating the first batches.
+            Default: False.
+        mega_batch_mult (int, optional): The size of the mega-batch in which the
+            samples are sorted, the larger the fewer paddings but the less
+            randomness. Default: 50.
+        seed (int, optional): The random seed, the seed of every epoch is
+            `seed + epoch`. Default: 0.
+
+    Example:
+        .. code-block:: python
+
+            from paddle.io import DataLoader
+            from paddlenlp.data import LengthGroupedBatchSampler
+
+            batch_sampler = LengthGroupedBatchSampler(dataset, batch_size=32, max_tokens=8192)
+            data_loader = DataLoader(dataset, batch_sampler=batch_sampler, collate_fn=collate_fn)
+            for epoch in range(num_epochs):
+                batch_sampler.set_epoch(epoch)
+                for batch in data_loader:
+                    ...
+    """
+
+    def __init__(
+        self,
+        dataset,
+        batch_size,
+        lengths=None,
+        length_column_name="length",
+        max_tokens=None,
+        num_replicas=None,
+        rank=None,
+        drop_last=False,
+        mega_batch_mult=50,
+        seed=0,
+    ):
+        assert isinstance(batch_size, int) and batch_size > 0, "batch_size should be a positive integer"
+        assert max_tokens is None or max_tokens > 0, "max_tokens should be a positive integer"
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self.drop_last = drop_last
+        self.mega_batch_mult = mega_batch_mult
+        self.seed = seed
+
+        from paddle.distributed import ParallelEnv
+
+        self.nranks = num_replicas if num_replicas is not None else ParallelEnv().nranks
+        self.local_rank = rank if rank is not None else ParallelEnv().local_rank
+
+        if lengths is None:
+            lengths = self._get_lengths(dataset, length_column_name)
+        if len(lengths) != len(dataset):
+            raise ValueError(
+                "The number of the lengths ({}) should be equal to the number of samples ({}).".format(
+                    len(lengths), len(dataset)
+                )
+            )
+        self.lengths = [int(length) for length in lengths]
+
+        self.epoch = 0
+        self.consumed_samples = 0
+        self._cached_epoch = None
+        self._cached_batches = None
+        self._num_steps = None
+
+    @staticmethod
+    def _get_lengths(dataset, length_column_name):
+        column_names = getattr(dataset, "column_names", None)
+        if column_names is not None and length_column_name in column_names:
+            # The `datasets.Dataset` of HuggingFace reads the column at once
+            return list(dataset[length_column_name])
+
+        lengths = []
+        for i in range(len(dataset)):
+            sample = dataset[i]
+            if isinstance(sample, dict):
+                if length_column_name in sample:
+                    lengths.append(sample[length_column_name])
+                elif "input_ids" in sample:
+                    lengths.append(len(sample["input_ids"]))
+                else:
+                    raise ValueError(
+                        "Can not get the length of the samples, please set the `{}` or `input_ids` field.".format(
+                            length_column_name
+                        )
+                    )
+            elif isinstance(sample, (list, tuple)):
+                lengths.append(len(sample[0]))
+            else:
+                lengths.append(len(sample))
+        return lengths
+
+    def _build_batches(self, epoch):
+        """
+        Build the batches of all the processes in `epoch`, every item is the
+        list of `nranks` batches of one step. If `max_tokens` is set, the
+        number of steps is fixed to the one of epoch 0 by repeating the first
+        steps or dropping the last ones, so that the steps per epoch computed
+        by the trainer hold for all the epochs.
+        """
+        if self._cached_epoch == epoch:
+            return self._cached_batches
+
+        steps = self._build_steps(epoch)
+        if self.max_tokens is not None:
+            if self._num_steps is None:
+                self._num_steps = len(steps) if epoch == 0 else len(self._build_steps(0))
+            if len(steps) > self._num_steps:
+                steps = steps[: self._num_steps]
+            elif 0 < len(steps) < self._num_steps:
+                steps += (steps * (self._num_steps // len(steps)))[: self._num_steps - len(steps)]
+
+        self._cached_epoch, self._cached_batches = epoch, steps
+        return steps
+
+    def _build_steps(self, epoch):
+        lengths = self.lengths
+        sampler = SamplerHelper(self.dataset, range(len(self.dataset))).shuffle(seed=self.seed + epoch)
+        sampler = sampler.sort(
+            key=lambda idx, data_source: lengths[idx],
+            reverse=True,
+            buffer_size=self.mega_batch_mult * self.batch_size * self.nranks,
+        )
+        if self.max_tokens is None:
+            sampler = sampler.batch(self.batch_size, drop_last=self.drop_last)
+        else:
+            sampler = sampler.batch(
+                self.max_tokens,
+                drop_last=self.drop_last,
+                batch_size_fn=lambda idx, count, sofar, data_source: max(sofar, lengths[idx]),
+                key=lambda size_so_far, minibatch_len: size_so_far * minibatch_len,
+            )
+        batches = list(sampler)
+
+        # Make the number of batches divisible by the number of processes
+        remainder = len(batches) % self.nranks
+        if remainder != 0:
+            if self.drop_last:
+                batches = batches[: len(batches) - remainder]
+            else:
+                batches += batches[: self.nranks - remainder]
+        steps = [batches[i : i + self.nranks] for i in range(0, len(batches), self.nranks)]
+
+        random_generator = np.random.RandomState(self.seed + epoch)
+        random_generator.shuffle(steps)
+        if epoch == 0 and len(steps) > 0:
+            # Run the largest step first so that the OOM comes out as early as possible
+            largest = max(
+                range(len(steps)),
+                key=lambda i: max(len(batch) * max(lengths[idx] for idx in batch) for batch in steps[i]),
+            )
+            steps[0], steps[largest] = steps[largest], steps[0]
+        return steps
+
+    def __iter__(self):
+        steps = self._build_batches(self.epoch)
+        consumed_steps = self.consumed_samples // (self.batch_size * self.nranks)
+        for step in steps[consumed_steps:]:
+            yield step[self.local_rank]
+        # Move to the next epoch if `set_epoch` is not called
+        self.epoch += 1
+        self.consumed_samples = 0
+
+    def __len__(self):
+        return len(self._build_batches(self.epoch))
+
+    def set_epoch(self, epoch=0, consumed_samples=0):
+        """
+        Sets the epoch number, which is used as the seed of the random numbers
+        together with `seed`.
+
+        Args:
+            epoch (int, optional): Epoch number. Default: 0.
+            consumed_samples (int, optional): The number of samples consumed by
+                all the processes in `epoch`, the sampler resumes after them.
+                Every batch is counted as `batch_size` samples even if
+                `max_tokens` is set. Default: 0.
+        """
+        self.epoch = epoch
+        self.consumed_samples = consumed_samples
@@ -13,13 +13,22 @@
 # limitations under the License.
 
 import atexit
+import bisect
+import collections
+import hashlib
 import inspect
+import json
 import os
+import pickle
+import shutil
+import struct
 import time
+import types
 import warnings
 from collections import namedtuple
 
 import datasets
+import numpy as np
 from multiprocess import Pool, RLock
 
 import paddlenlp
@@ -37,7 +46,7 @@ from paddle.utils.download import _get_unique_endpoints
 
 from paddlenlp.utils.env import DATA_HOME
 
-__all__ = ["MapDataset", "DatasetBuilder", "IterDataset", "load_dataset"]
+__all__ = ["MapDataset", "DatasetBuilder", "IterDataset", "load_dataset", "ChunkedFileData", "ColumnarFileData"]
 
 DATASETS_MODULE_PATH = "paddlenlp.datasets."
 
@@ -219,6 +228,415 @@ def load_dataset(path_or_read_func, name=None, data_files=None, splits=None, laz
         return datasets
 
 
+_MAP_WORKER_FN = None
+
+
+def _init_map_worker(fn):
+    # The map function is shipped once per worker instead of once per chunk
+    global _MAP_WORKER_FN
+    _MAP_WORKER_FN = fn
+
+
+def _map_chunk(chunk, batched):
+    if batched:
+        return list(_MAP_WORKER_FN(chunk))
+    return [_MAP_WORKER_FN(example) for example in chunk]
+
+
+class _ChunkedFileWriter(object):
+    """
+    Writes the chunks of examples to a file by pickle, the file is completed by an index of the chunks
+    and renamed to `path` only when `close` is called, so the readers never see the partial file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        self._file = open(self._tmp_path, "wb")
+        self._offsets = []
+        self._sizes = []
+
+    def write(self, chunk):
+        self._offsets.append(self._file.tell())
+        self._sizes.append(len(chunk))
+        pickle.dump(chunk, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def close(self):
+        index_offset = self._file.tell()
+        pickle.dump((self._offsets, self._sizes), self._file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._file.write(struct.pack("<Q", index_offset))
+        self._file.close()
+        try:
+            os.replace(self._tmp_path, self.path)
+        except OSError:
+            # The cache directory of the same examples has been built by another process in the meantime
+            if not os.path.isdir(self.path):
+                raise
+            os.remove(self._tmp_path)
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+class ChunkedFileData(object):
+    """
+    The read-only sequence of examples stored in the file written by `MapDataset.map` with `cache_file`.
+    The examples are loaded chunk by chunk on demand, so the dataset does not need to fit in memory.
+
+    Args:
+        path (str): The path of the file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            f.seek(-8, os.SEEK_END)
+            (index_offset,) = struct.unpack("<Q", f.read(8))
+            f.seek(index_offset)
+            self._offsets, sizes = pickle.load(f)
+        self._starts = [0]
+        for size in sizes:
+            self._starts.append(self._starts[-1] + size)
+        self._cached_chunk_id = None
+        self._cached_chunk = None
+
+    def __len__(self):
+        return self._starts[-1]
+
+    def _load_chunk(self, chunk_id):
+        if chunk_id != self._cached_chunk_id:
+            with open(self.path, "rb") as f:
+                f.seek(self._offsets[chunk_id])
+                self._cached_chunk = pickle.load(f)
+            self._cached_chunk_id = chunk_id
+        return self._cached_chunk
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if idx < 0 or idx >= len(self):
+            raise IndexError("index {} is out of range".format(idx))
+        chunk_id = bisect.bisect_right(self._starts, idx) - 1
+        return self._load_chunk(chunk_id)[idx - self._starts[chunk_id]]
+
+    def __iter__(self):
+        for chunk_id in range(len(self._offsets)):
+            for example in self._load_chunk(chunk_id):
+                yield example
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_cached_chunk_id"] = None
+        state["_cached_chunk"] = None
+        return state
+
+
+# Bump it when the fingerprint or the format of the cache is changed
+_MAP_CACHE_VERSION = "2"
+# Seconds the other processes wait for the map cache built by the first process of the machine
+_MAP_CACHE_WAIT_TIMEOUT = 24 * 3600
+
+
+def _update_fingerprint(hasher, obj, seen):
+    """
+    Update `hasher` by the content of `obj`. The functions are hashed by their code, defaults and closures,
+    the tokenizers by their vocab and configurations, so the fingerprint is stable across processes and runs.
+    """
+    if obj is None or isinstance(obj, (bool, int, float, complex, str, bytes)):
+        hasher.update(repr(obj).encode("utf-8"))
+        return
+    # `seen` holds the objects being hashed to break the reference cycles
+    if id(obj) in seen:
+        hasher.update(b"<recursion>")
+        return
+    seen.add(id(obj))
+    try:
+        _update_fingerprint_by_type(hasher, obj, seen)
+    finally:
+        seen.discard(id(obj))
+
+
+def _update_fingerprint_by_type(hasher, obj, seen):
+    hasher.update(type(obj).__qualname__.encode("utf-8"))
+    if isinstance(obj, (list, tuple)):
+        for value in obj:
+            _update_fingerprint(hasher, value, seen)
+    elif isinstance(obj, dict):
+        for key in sorted(obj, key=repr):
+            _update_fingerprint(hasher, key, seen)
+            _update_fingerprint(hasher, obj[key], seen)
+    elif isinstance(obj, (set, frozenset)):
+        for value in sorted(obj, key=repr):
+            _update_fingerprint(hasher, value, seen)
+    elif isinstance(obj, np.ndarray):
+        hasher.update(str(obj.dtype).encode("utf-8"))
+        hasher.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, partial):
+        _update_fingerprint(hasher, (obj.func, obj.args, obj.keywords), seen)
+    elif isinstance(obj, types.MethodType):
+        _update_fingerprint(hasher, (obj.__func__, obj.__self__), seen)
+    elif isinstance(obj, types.CodeType):
+        hasher.update(obj.co_code)
+        _update_fingerprint(hasher, (obj.co_consts, obj.co_names), seen)
+    elif isinstance(obj, types.FunctionType):
+        closure = [cell.cell_contents for cell in obj.__closure__ or ()]
+        _update_fingerprint(
+            hasher,
+            (obj.__module__, obj.__qualname__, obj.__code__, obj.__defaults__, obj.__kwdefaults__, closure),
+            seen,
+        )
+    elif isinstance(obj, (types.ModuleType, type, types.BuiltinFunctionType)):
+        hasher.update(getattr(obj, "__qualname__", obj.__name__).encode("utf-8"))
+    elif hasattr(obj, "get_vocab") and hasattr(obj, "init_kwargs"):
+        # The tokenizers, the paths of the vocab files are skipped since the vocab is hashed
+        init_kwargs = {
+            key: value
+            for key, value in obj.init_kwargs.items()
+            if not key.endswith("_file") and key not in ("name_or_path", "tokenizer_file")
+        }
+        _update_fingerprint(
+            hasher,
+            (
+                obj.get_vocab(),
+                init_kwargs,
+                getattr(obj, "padding_side", None),
+                getattr(obj, "truncation_side", None),
+                getattr(obj, "model_max_length", None),
+            ),
+            seen,
+        )
+    elif hasattr(obj, "__dict__"):
+        # The callable objects and the other instances are hashed by their attributes
+        if callable(obj):
+            _update_fingerprint(hasher, type(obj).__call__, seen)
+        _update_fingerprint(hasher, vars(obj), seen)
+    else:
+        try:
+            hasher.update(pickle.dumps(obj, protocol=4))
+        except Exception:
+            hasher.update(repr(obj).encode("utf-8"))
+
+
+def _is_columnar(example):
+    if not isinstance(example, dict) or len(example) == 0:
+        return False
+    for value in example.values():
+        if isinstance(value, (list, tuple, np.ndarray)):
+            value = np.asarray(value)
+            if value.ndim != 1 or (value.size > 0 and value.dtype.kind not in "biuf"):
+                return False
+        elif not isinstance(value, (bool, int, float, np.number, np.bool_)):
+            return False
+    return True
+
+
+class _ColumnarFileWriter(object):
+    """
+    Writes the examples, which are dicts of numbers or 1-D sequences of numbers, column by column to the
+    raw binary files in a directory. The sequences of a column are concatenated in `{column}.values.bin`
+    with the offsets in `{column}.offsets.bin`. The directory is renamed to `path` only when `close` is
+    called, so the readers never see the partial cache.
+    """
+
+    # The columns are widened along bool -> int64 -> float64 when the later examples need it
+    _KIND_DTYPES = collections.OrderedDict([("b", "bool"), ("i", "int64"), ("f", "float64")])
+
+    def __init__(self, path):
+        self.path = path
+        self._tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        os.makedirs(self._tmp_path)
+        self._columns = None
+        self._num_examples = 0
+
+    def _values_path(self, name):
+        return os.path.join(self._tmp_path, "{}.values.bin".format(name))
+
+    def _init_columns(self, example):
+        self._columns = {}
+        for name, value in example.items():
+            is_sequence = isinstance(value, (list, tuple, np.ndarray))
+            self._columns[name] = {
+                "sequence": is_sequence,
+                # The dtype of an empty sequence is unknown, it starts from bool and is widened later
+                "kind": "b",
+                "values": open(self._values_path(name), "wb"),
+                "offsets": [0] if is_sequence else None,
+            }
+
+    def _widen_column(self, name, column, kind):
+        """
+        Converts the values of column `name` written so far to the wider dtype of `kind`.
+        """
+        column["values"].close()
+        values_path = self._values_path(name)
+        values = np.fromfile(values_path, dtype=self._KIND_DTYPES[column["kind"]])
+        values.astype(self._KIND_DTYPES[kind]).tofile(values_path)
+        column["kind"] = kind
+        column["values"] = open(values_path, "ab")
+
+    def _check_example(self, example):
+        if not _is_columnar(example) or set(example.keys()) != set(self._columns.keys()):
+            raise ValueError(
+                "The examples cached in the columnar format should be the dicts with the same keys {}, "
+                "whose values are numbers or 1-D sequences of numbers, but received: {}".format(
+                    sorted(self._columns.keys()), example
+                )
+            )
+        for name, column in self._columns.items():
+            value = example[name]
+            if column["sequence"] != isinstance(value, (list, tuple, np.ndarray)):
+                raise ValueError(
+                    "The values of column `{}` should be {}.".format(
+                        name, "1-D sequences" if column["sequence"] else "numbers"
+                    )
+                )
+
+    def write(self, chunk):
+        """
+        Writes a chunk of examples. The chunk is checked before any of it is written, so if ValueError is
+        raised, the examples written so far could still be read by `read_back`.
+        """
+        if self._columns is None and len(chunk) > 0:
+            self._init_columns(chunk[0])
+        for example in chunk:
+            self._check_example(example)
+        kinds = list(self._KIND_DTYPES.keys())
+        for example in chunk:
+            for name, column in self._columns.items():
+                value = np.asarray(example[name])
+                if column["sequence"]:
+                    column["offsets"].append(column["offsets"][-1] + len(value))
+                if value.size > 0:
+                    kind = "i" if value.dtype.kind == "u" else value.dtype.kind
+                    if kinds.index(kind) > kinds.index(column["kind"]):
+                        self._widen_column(name, column, kind)
+                column["values"].write(value.astype(self._KIND_DTYPES[column["kind"]]).tobytes())
+            self._num_examples += 1
+
+    def read_back(self, chunk_size):
+        """
+        Yields the examples written so far chunk by chunk.
+        """
+        values = {}
+        for name, column in (self._columns or {}).items():
+            column["values"].flush()
+            values_path = self._values_path(name)
+            dtype = self._KIND_DTYPES[column["kind"]]
+            if os.path.getsize(values_path) > 0:
+                values[name] = np.memmap(values_path, dtype=dtype, mode="r")
+            else:
+                values[name] = np.zeros([0], dtype=dtype)
+        for start in range(0, self._num_examples, chunk_size):
+            chunk = []
+            for idx in range(start, min(start + chunk_size, self._num_examples)):
+                example = {}
+                for name, column in self._columns.items():
+                    if column["sequence"]:
+                        offsets = column["offsets"]
+                        example[name] = values[name][offsets[idx] : offsets[idx + 1]].tolist()
+                    else:
+                        example[name] = values[name][idx].item()
+                chunk.append(example)
+            yield chunk
+
+    def close(self):
+        meta = {"version": _MAP_CACHE_VERSION, "num_examples": self._num_examples, "columns": {}}
+        for name, column in (self._columns or {}).items():
+            column["values"].close()
+            if column["sequence"]:
+                np.asarray(column["offsets"], dtype="int64").tofile(
+                    os.path.join(self._tmp_path, "{}.offsets.bin".format(name))
+                )
+            meta["columns"][name] = {"sequence": column["sequence"], "dtype": self._KIND_DTYPES[column["kind"]]}
+        with open(os.path.join(self._tmp_path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        try:
+            os.replace(self._tmp_path, self.path)
+        except OSError:
+            # The same cache has been built by another process in the meantime, so keep that one
+            if not os.path.isdir(self.path):
+                raise
+            shutil.rmtree(self._tmp_path, ignore_errors=True)
+
+    def abort(self):
+        for column in (self._columns or {}).values():
+            column["values"].close()
+        shutil.rmtree(self._tmp_path, ignore_errors=True)
+
+
+class ColumnarFileData(object):
+    """
+    The read-only sequence of examples cached by `MapDataset.map` with `cache_dir` in the columnar format.
+    The columns are memory-mapped, so loading the cache is almost free and the processes on the same machine
+    share the pages of the cache.
+
+    Args:
+        path (str): The path of the cache directory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self._num_examples = meta["num_examples"]
+        self._columns = meta["columns"]
+        self._values = None
+        self._offsets = None
+
+    def _load(self):
+        self._values, self._offsets = {}, {}
+        for name, column in self._columns.items():
+            values_path = os.path.join(self.path, "{}.values.bin".format(name))
+            # `np.memmap` does not support the empty file
+            if os.path.getsize(values_path) > 0:
+                self._values[name] = np.memmap(values_path, dtype=column["dtype"], mode="r")
+            else:
+                self._values[name] = np.zeros([0], dtype=column["dtype"])
+            if column["sequence"]:
+                offsets_path = os.path.join(self.path, "{}.offsets.bin".format(name))
+                self._offsets[name] = np.memmap(offsets_path, dtype="int64", mode="r")
+
+    def __len__(self):
+        return self._num_examples
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if idx < 0 or idx >= len(self):
+            raise IndexError("index {} is out of range".format(idx))
+        if self._values is None:
+            self._load()
+        example = {}
+        for name, values in self._values.items():
+            if name in self._offsets:
+                offsets = self._offsets[name]
+                example[name] = values[offsets[idx] : offsets[idx + 1]].tolist()
+            else:
+                example[name] = values[idx].item()
+        return example
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def __getstate__(self):
+        # The memory maps are reopened in the subprocesses
+        state = self.__dict__.copy()
+        state["_values"] = None
+        state["_offsets"] = None
+        return state
+
+
+def _open_map_cache(path):
+    return ColumnarFileData(path) if os.path.isdir(path) else ChunkedFileData(path)
+
+
 class MapDataset(Dataset):
     """
     Wraps a map-style dataset-like object as an instance of `MapDataset`, and equips it
@@ -334,7 +752,17 @@ class MapDataset(Dataset):
 
         return MapDataset(new_data)
 
-    def map(self, fn, lazy=True, batched=False, num_workers=0):
+    def map(
+        self,
+        fn,
+        lazy=True,
+        batched=False,
+        num_workers=0,
+        chunk_size=1000,
+        max_inflight_chunks=None,
+        cache_file=None,
+        cache_dir=None,
+    ):
         """
         Performs specific function on the dataset to transform and update every sample.
 
@@ -351,28 +779,180 @@ class MapDataset(Dataset):
             num_workers(int, optional): Number of processes for multiprocessing. If
                 set to 0, it doesn't use multiprocessing. Note that if set to positive
                 value, `lazy` option would be ignored. Defaults to 0.
+            chunk_size (int, optional): Number of examples sent to a worker at a time when
+                `num_workers` > 1 or `cache_file` is set. If `batched` is True, `fn` receives
+                a chunk of examples each time. Defaults to 1000.
+            max_inflight_chunks (int, optional): Max number of chunks being processed by the
+                workers at the same time, which bounds the memory used by multiprocessing.
+                Defaults to `2 * num_workers`.
+            cache_file (str, optional): If set, the transformed examples are written to this file
+                chunk by chunk and then read from it on demand, so the transformed dataset does
+                not need to fit in memory. If the file already exists, it is loaded directly
+                without calling `fn`. Note that if set, `lazy` option would be ignored.
+                Defaults to None.
+            cache_dir (str, optional): If set, the transformed examples are cached in this
+                directory, keyed by the fingerprint of `fn` (including the vocab and the
+                configurations of the tokenizers bound to it) and of the examples, so the
+                same transformation is loaded from the cache in the following runs. The
+                examples which are dicts of numbers or 1-D sequences of numbers, such as the
+                tokenized features, are cached in a memory-mapped columnar format. The format is
+                decided by the first chunk, if a later example has other keys or values, the
+                cache falls back to the chunked file. In
+                distributed training, the cache is built by one process of every machine
+                and loaded by the others. The global variables used by `fn` are not part of
+                the fingerprint, bind them by `functools.partial` instead. Note that it could
+                not be used with `cache_file`, and if set, `lazy` option would be ignored.
+                Defaults to None.
         """
 
         assert num_workers >= 0, "num_workers should be a non-negative value"
-        if num_workers > 1:
-            shards = [
-                self._shard(num_shards=num_workers, index=index, contiguous=True) for index in range(num_workers)
-            ]
-            kwds_per_shard = [
-                dict(self=shards[rank], fn=fn, lazy=False, batched=batched) for rank in range(num_workers)
-            ]
-            pool = Pool(num_workers, initargs=(RLock(),))
-            results = [pool.apply_async(self.__class__._map, kwds=kwds) for kwds in kwds_per_shard]
-            transformed_shards = [r.get() for r in results]
-            pool.close()
-            pool.join()
-            self.new_data = []
-            for i in range(num_workers):
-                self.new_data += transformed_shards[i].new_data
+        columnar = False
+        failed_file = None
+        if cache_dir is not None:
+            assert cache_file is None, "`cache_file` and `cache_dir` could not be set at the same time"
+            os.makedirs(cache_dir, exist_ok=True)
+            cache_file = os.path.join(cache_dir, "map-{}".format(self._fingerprint(fn, batched, chunk_size)))
+            columnar = True
+            if dist.get_world_size() > 1:
+                failed_file = cache_file + ".failed"
+            if not os.path.exists(cache_file) and failed_file is not None:
+                parallel_env = dist.ParallelEnv()
+                unique_endpoints = _get_unique_endpoints(parallel_env.trainer_endpoints[:])
+                if parallel_env.current_endpoint not in unique_endpoints:
+                    # Wait for the cache built by the first process of the machine
+                    self._wait_for_map_cache(cache_file, failed_file)
+        if cache_file is not None and os.path.exists(cache_file):
+            self.new_data = _open_map_cache(cache_file)
             return self
+        if num_workers > 1 or cache_file is not None:
+            if failed_file is not None and os.path.exists(failed_file):
+                os.remove(failed_file)
+            try:
+                return self._map_chunks(
+                    fn,
+                    batched=batched,
+                    num_workers=num_workers,
+                    chunk_size=chunk_size,
+                    max_inflight_chunks=max_inflight_chunks,
+                    cache_file=cache_file,
+                    columnar=columnar,
+                )
+            except BaseException:
+                if failed_file is not None:
+                    # Tell the processes waiting for the cache that it will not come
+                    open(failed_file, "w").close()
+                raise
         else:
             return self._map(fn, lazy=lazy, batched=batched)
 
+    @staticmethod
+    def _wait_for_map_cache(cache_file, failed_file, timeout=_MAP_CACHE_WAIT_TIMEOUT):
+        """
+        Waits until `cache_file` is built by another process. Raises RuntimeError if the building process
+        reports a failure, or TimeoutError if the cache is not ready after `timeout` seconds.
+        """
+        start = time.time()
+        while not os.path.exists(cache_file):
+            # The failure reported by a previous run is older than the waiting
+            if os.path.exists(failed_file) and os.path.getmtime(failed_file) >= start - 1:
+                raise RuntimeError(
+                    "Failed to build the map cache {} in the other process, see its log for details.".format(
+                        cache_file
+                    )
+                )
+            if time.time() - start > timeout:
+                raise TimeoutError("Timed out waiting for the map cache {}.".format(cache_file))
+            time.sleep(1)
+
+    def _fingerprint(self, fn, batched, chunk_size=None):
+        """
+        Returns the fingerprint of transforming the current examples by `fn`. The chunk size is part of it
+        only if `batched` is True, since `fn` receives a chunk of examples each time then.
+        """
+        hasher = hashlib.sha256()
+        hasher.update(_MAP_CACHE_VERSION.encode("utf-8"))
+        _update_fingerprint(hasher, (fn, batched, chunk_size if batched else None), set())
+        hasher.update(str(len(self.new_data)).encode("utf-8"))
+        for idx in range(len(self.new_data)):
+            _update_fingerprint(hasher, self.new_data[idx], set())
+        return hasher.hexdigest()[:32]
+
+    def _iter_chunks(self, chunk_size):
+        for start in range(0, len(self.new_data), chunk_size):
+            yield [self.new_data[idx] for idx in range(start, min(start + chunk_size, len(self.new_data)))]
+
+    def _map_chunks(self, fn, batched, num_workers, chunk_size, max_inflight_chunks, cache_file, columnar=False):
+        """
+        Transforms the examples chunk by chunk, at most `max_inflight_chunks` chunks are sent to the
+        workers at the same time and the results are reassembled in order as soon as they are ready.
+        If `columnar` is True, the cache is written in the columnar format when the examples of the first
+        chunk fit it.
+        """
+        assert chunk_size > 0, "chunk_size should be a positive value"
+        writer = None
+        new_data = []
+
+        def _collect(transformed):
+            nonlocal writer
+            if cache_file is None:
+                new_data.extend(transformed)
+                return
+            if writer is None:
+                if columnar and all(_is_columnar(example) for example in transformed):
+                    writer = _ColumnarFileWriter(cache_file)
+                else:
+                    writer = _ChunkedFileWriter(cache_file)
+            if isinstance(writer, _ColumnarFileWriter):
+                try:
+                    writer.write(transformed)
+                    return
+                except ValueError as e:
+                    # The later examples do not fit the columns decided by the first chunk, so the examples
+                    # written so far are moved to the chunked file and the rest follow them
+                    warnings.warn("Fall back to the chunked cache file since {}".format(e))
+                    columnar_writer, writer = writer, _ChunkedFileWriter(cache_file)
+                    for chunk in columnar_writer.read_back(chunk_size):
+                        writer.write(chunk)
+                    columnar_writer.abort()
+            writer.write(transformed)
+
+        pool = None
+        try:
+            if num_workers > 1:
+                if max_inflight_chunks is None:
+                    max_inflight_chunks = 2 * num_workers
+                assert max_inflight_chunks > 0, "max_inflight_chunks should be a positive value"
+                pool = Pool(num_workers, initializer=_init_map_worker, initargs=(fn,))
+                inflight = collections.deque()
+                for chunk in self._iter_chunks(chunk_size):
+                    if len(inflight) >= max_inflight_chunks:
+                        _collect(inflight.popleft().get())
+                    inflight.append(pool.apply_async(_map_chunk, (chunk, batched)))
+                while inflight:
+                    _collect(inflight.popleft().get())
+                pool.close()
+            else:
+                for chunk in self._iter_chunks(chunk_size):
+                    _collect(list(fn(chunk)) if batched else [fn(example) for example in chunk])
+        except BaseException:
+            if pool is not None:
+                pool.terminate()
+            if writer is not None:
+                writer.abort()
+            raise
+        finally:
+            if pool is not None:
+                pool.join()
+
+        if cache_file is not None:
+            if writer is None:
+                writer = _ChunkedFileWriter(cache_file)
+            writer.close()
+            self.new_data = _open_map_cache(cache_file)
+        else:
+            self.new_data = new_data
+        return self
+
     def _map(self, fn, lazy=True, batched=False):
         if batched:
             self.new_data = fn(self.new_data)
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import os.path as osp
 
 import numpy as np
@@ -37,6 +38,72 @@ def list_embedding_name():
     return list(EMBEDDING_NAME_LIST)
 
 
+def _get_mmap_paths(vector_path):
+    """
+    Returns the paths of the uncompressed embedding matrix and vocab file that
+    are derived from a `.npz` vector file.
+    """
+    prefix = osp.splitext(vector_path)[0]
+    return prefix + ".embedding.npy", prefix + ".vocab.txt"
+
+
+def _convert_to_mmap_layout(vector_path):
+    """
+    Converts a compressed `.npz` vector file into an uncompressed `.npy` matrix
+    and a plain text vocab file, so that later loads can memory-map the matrix
+    instead of decompressing it. Files are written to temporary paths first and
+    renamed, so concurrent processes never see a partial conversion.
+    """
+    embedding_path, vocab_path = _get_mmap_paths(vector_path)
+    logger.info("Converting {} to a memory-mappable layout.".format(vector_path))
+    vector_np = np.load(vector_path)
+    vocab = [str(word) for word in vector_np["vocab"]]
+    if any("\n" in word for word in vocab):
+        raise ValueError("The vocab of {} contains line breaks and cannot be stored line by line.".format(vector_path))
+    suffix = ".tmp.{}".format(os.getpid())
+    with open(vocab_path + suffix, "w", encoding="utf-8", newline="") as f:
+        for word in vocab:
+            f.write(word + "\n")
+    # np.save appends ".npy" to file names without it, so write through a file object.
+    with open(embedding_path + suffix, "wb") as f:
+        np.save(f, vector_np["embedding"])
+    os.replace(vocab_path + suffix, vocab_path)
+    os.replace(embedding_path + suffix, embedding_path)
+
+
+def _load_vector_file(vector_path, use_mmap=True):
+    """
+    Loads the vocab and embedding matrix of a vector file. If `use_mmap` is True,
+    the matrix is memory-mapped read-only from its uncompressed copy, which is
+    created on first use. Falls back to reading the `.npz` file if the copy
+    cannot be written.
+    """
+    if use_mmap:
+        embedding_path, vocab_path = _get_mmap_paths(vector_path)
+        try:
+            if not (osp.exists(embedding_path) and osp.exists(vocab_path)):
+                _convert_to_mmap_layout(vector_path)
+            with open(vocab_path, "r", encoding="utf-8", newline="") as f:
+                vocab = f.read().split("\n")[:-1]
+            return {"vocab": vocab, "embedding": np.load(embedding_path, mmap_mode="r")}
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to memory-map {}, loading it into memory instead: {}".format(vector_path, e))
+    vector_np = np.load(vector_path)
+    return {"vocab": list(vector_np["vocab"]), "embedding": vector_np["embedding"]}
+
+
+def _copy_rows(dst, dst_start, src, src_idx=None, chunk_size=65536):
+    """
+    Copies the rows `src_idx` (or all the rows) of `src` to the rows of `dst` starting from `dst_start`,
+    `chunk_size` rows at a time so that reading a memory-mapped `src` never makes a full temporary copy.
+    """
+    num_rows = len(src) if src_idx is None else len(src_idx)
+    for start in range(0, num_rows, chunk_size):
+        end = min(start + chunk_size, num_rows)
+        rows = src[start:end] if src_idx is None else src[src_idx[start:end]]
+        dst[dst_start + start : dst_start + end] = rows
+
+
 class TokenEmbedding(nn.Embedding):
     """
     A `TokenEmbedding` can load pre-trained embedding model which paddlenlp provides by
@@ -64,6 +131,12 @@ class TokenEmbedding(nn.Embedding):
         keep_extended_vocab_only (`bool`, optional):
             Whether to keep the extended vocabulary only, will be effective only if provides extended_vocab_path.
             Defaults to False.
+        use_mmap (`bool`, optional):
+            Whether to memory-map the embedding matrix from an uncompressed copy of the vector file.
+            The copy is written next to the vector file on first use, and later loads read the rows
+            from it directly instead of decompressing the whole matrix. The weights are still copied
+            into the embedding parameter.
+            Defaults to True.
     """
 
     def __init__(
@@ -74,6 +147,7 @@ class TokenEmbedding(nn.Embedding):
         extended_vocab_path=None,
         trainable=True,
         keep_extended_vocab_only=False,
+        use_mmap=True,
     ):
         vector_path = osp.join(EMBEDDING_HOME, embedding_name + ".npz")
         if not osp.exists(vector_path):
@@ -82,7 +156,7 @@ class TokenEmbedding(nn.Embedding):
             get_path_from_url(url, EMBEDDING_HOME)
 
         logger.info("Loading token embedding...")
-        vector_np = np.load(vector_path)
+        vector_np = _load_vector_file(vector_path, use_mmap=use_mmap)
         self.embedding_dim = vector_np["embedding"].shape[1]
         self.unknown_token = unknown_token
         if unknown_token_vector is not None:
@@ -129,8 +203,13 @@ class TokenEmbedding(nn.Embedding):
         self._idx_to_word.append(self.unknown_token)
         self._idx_to_word.append(PAD_TOKEN)
         self._word_to_idx = self._construct_word_to_idx(self._idx_to_word)
-        # insert unk, pad embedding
-        embedding_table = np.append(vector_np["embedding"], [unk_vector, pad_vector], axis=0)
+        # The table is allocated once and the unk, pad embedding are inserted at the end
+        pretrained_embedding_table = vector_np["embedding"]
+        num_pretrained = len(pretrained_embedding_table)
+        embedding_table = np.empty((num_pretrained + 2, self.embedding_dim), dtype=paddle.get_default_dtype())
+        _copy_rows(embedding_table, 0, pretrained_embedding_table)
+        embedding_table[num_pretrained] = unk_vector
+        embedding_table[num_pretrained + 1] = pad_vector
 
         return embedding_table
 
@@ -155,15 +234,10 @@ class TokenEmbedding(nn.Embedding):
         self._idx_to_word = extend_vocab_list
         self._word_to_idx = self._construct_word_to_idx(self._idx_to_word)
 
-        # use the Xavier init the embedding
-        xavier_scale = np.sqrt(6.0 / float(len(self._idx_to_word) + self.embedding_dim))
-        embedding_table = np.random.uniform(
-            low=-1.0 * xavier_scale, high=xavier_scale, size=(len(self._idx_to_word), self.embedding_dim)
-        ).astype(paddle.get_default_dtype())
-
         pretrained_idx_to_word = list(vector_np["vocab"])
         pretrained_word_to_idx = self._construct_word_to_idx(pretrained_idx_to_word)
-        pretrained_embedding_table = np.array(vector_np["embedding"])
+        # Only the rows that are used get read when the matrix is memory-mapped.
+        pretrained_embedding_table = vector_np["embedding"]
 
         pretrained_vocab_set = set(pretrained_idx_to_word)
         extend_vocab_set = set(self._idx_to_word)
@@ -174,31 +248,32 @@ class TokenEmbedding(nn.Embedding):
         pretrained_vocab_intersect_index = [pretrained_word_to_idx[word] for word in vocab_intersection]
         pretrained_vocab_subtract_index = [pretrained_word_to_idx[word] for word in vocab_subtraction]
         extend_vocab_intersect_index = [self._word_to_idx[word] for word in vocab_intersection]
-        embedding_table[extend_vocab_intersect_index] = pretrained_embedding_table[pretrained_vocab_intersect_index]
+
+        # The words appended to the extended vocab decide the size of the table, which is allocated once
+        num_extended = len(self._idx_to_word)
         if not keep_extended_vocab_only:
             for idx in pretrained_vocab_subtract_index:
                 word = pretrained_idx_to_word[idx]
                 self._idx_to_word.append(word)
                 self._word_to_idx[word] = len(self._idx_to_word) - 1
-
-            embedding_table = np.append(
-                embedding_table, pretrained_embedding_table[pretrained_vocab_subtract_index], axis=0
-            )
-
         if self.unknown_token not in extend_vocab_set:
             self._idx_to_word.append(self.unknown_token)
             self._word_to_idx[self.unknown_token] = len(self._idx_to_word) - 1
-            embedding_table = np.append(embedding_table, [unk_vector], axis=0)
-        else:
-            unk_idx = self._word_to_idx[self.unknown_token]
-            embedding_table[unk_idx] = unk_vector
-
         if PAD_TOKEN not in extend_vocab_set:
             self._idx_to_word.append(PAD_TOKEN)
             self._word_to_idx[PAD_TOKEN] = len(self._idx_to_word) - 1
-            embedding_table = np.append(embedding_table, [pad_vector], axis=0)
-        else:
-            embedding_table[self._word_to_idx[PAD_TOKEN]] = pad_vector
+
+        embedding_table = np.empty((len(self._idx_to_word), self.embedding_dim), dtype=paddle.get_default_dtype())
+        # use the Xavier init the embedding
+        xavier_scale = np.sqrt(6.0 / float(num_extended + self.embedding_dim))
+        embedding_table[:num_extended] = np.random.uniform(
+            low=-1.0 * xavier_scale, high=xavier_scale, size=(num_extended, self.embedding_dim)
+        )
+        embedding_table[extend_vocab_intersect_index] = pretrained_embedding_table[pretrained_vocab_intersect_index]
+        if not keep_extended_vocab_only:
+            _copy_rows(embedding_table, num_extended, pretrained_embedding_table, pretrained_vocab_subtract_index)
+        embedding_table[self._word_to_idx[self.unknown_token]] = unk_vector
+        embedding_table[self._word_to_idx[PAD_TOKEN]] = pad_vector
 
         logger.info("Finish extending vocab.")
         return embedding_table
@@ -340,6 +415,124 @@ class TokenEmbedding(nn.Embedding):
         dot = self._dot_np
         return self._calc_word(word_a, word_b, lambda x, y: dot(x, y) / (np.sqrt(dot(x, x)) * np.sqrt(dot(y, y))))
 
+    def _normalize_np(self, vectors):
+        # [PAD] is an all-zero vector, keep it at zero instead of dividing by zero.
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+    def _topk_by_vectors(self, query, exclude_ids, topk, chunk_size):
+        """
+        Finds the `topk` words whose vectors have the highest cosine similarity
+        with each row of `query`. The vocabulary is scanned `chunk_size` rows at
+        a time, and every chunk of the current weights is normalized on the fly,
+        so the memory used is bounded by the chunk.
+        """
+        num_queries = query.shape[0]
+        vocab_size = self.weight.shape[0]
+        if chunk_size is None or chunk_size <= 0:
+            chunk_size = vocab_size
+        query_tensor = paddle.to_tensor(self._normalize_np(query), dtype=self.weight.dtype)
+        special_ids = [self._word_to_idx[PAD_TOKEN], self._word_to_idx[self.unknown_token]]
+
+        best_scores = np.full((num_queries, 0), -np.inf, dtype="float32")
+        best_ids = np.zeros((num_queries, 0), dtype="int64")
+        for start in range(0, vocab_size, chunk_size):
+            end = min(start + chunk_size, vocab_size)
+            with paddle.no_grad():
+                chunk = self.weight[start:end]
+                chunk_norm = paddle.clip(paddle.norm(chunk, p=2, axis=1), min=1e-12)
+                scores = (paddle.matmul(query_tensor, chunk, transpose_y=True) / chunk_norm).numpy()
+            scores = scores.astype("float32")
+            for i in range(num_queries):
+                for idx in list(exclude_ids[i]) + special_ids:
+                    if start <= idx < end:
+                        scores[i, idx - start] = -np.inf
+            k = min(topk, end - start)
+            part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            scores = np.concatenate([best_scores, np.take_along_axis(scores, part, axis=1)], axis=1)
+            ids = np.concatenate([best_ids, part + start], axis=1)
+            k = min(topk, scores.shape[1])
+            keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(scores, keep, axis=1)
+            best_ids = np.take_along_axis(ids, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_ids = np.take_along_axis(best_ids, order, axis=1)
+        results = []
+        for scores, ids in zip(best_scores, best_ids):
+            results.append(
+                [(self._idx_to_word[idx], float(score)) for idx, score in zip(ids, scores) if np.isfinite(score)]
+            )
+        return results
+
+    def most_similar(self, words, topk=10, chunk_size=None):
+        """
+        Finds the words whose vectors have the highest cosine similarity with the
+        given words. All queries are scored against the vocabulary with one matrix
+        multiplication per chunk of the current weights, normalized on the fly.
+
+        Args:
+            words (`str` or `list`): The query word or a list of query words.
+            topk (`int`, optional): The number of similar words to return for each query. Defaults to 10.
+            chunk_size (`int`, optional):
+                The number of vocabulary rows scored at a time, which bounds the memory used by huge
+                vocabularies. Defaults to `None`, scoring the whole vocabulary at once.
+
+        Returns:
+            `list`: A list of `(word, similarity)` tuples sorted by similarity if `words` is a string,
+            otherwise a list of such lists, one per query word. The query word itself, [UNK] and [PAD]
+            are excluded from the results.
+
+        Examples:
+            .. code-block::
+
+                from paddlenlp.embeddings import TokenEmbedding
+
+                embed = TokenEmbedding()
+                similar_words = embed.most_similar('中国', topk=5)
+
+        """
+        if topk <= 0:
+            raise ValueError("topk should be a positive integer, but received {}.".format(topk))
+        single = isinstance(words, (str, int))
+        idx_list = self.get_idx_list_from_words(words)
+        results = self._topk_by_vectors(self.search(idx_list), [[idx] for idx in idx_list], topk, chunk_size)
+        return results[0] if single else results
+
+    def analogy(self, word_a, word_b, word_c, topk=10, chunk_size=None):
+        """
+        Solves the analogy "`word_a` is to `word_b` as `word_c` is to ?" by finding the
+        words closest to `word_b - word_a + word_c` in the normalized embedding space.
+
+        Args:
+            word_a (`str`): The first word of the known pair.
+            word_b (`str`): The second word of the known pair.
+            word_c (`str`): The word whose counterpart is searched for.
+            topk (`int`, optional): The number of candidate words to return. Defaults to 10.
+            chunk_size (`int`, optional):
+                The number of vocabulary rows scored at a time. Defaults to `None`, scoring the whole
+                vocabulary at once.
+
+        Returns:
+            `list`: A list of `(word, similarity)` tuples sorted by similarity, excluding the three
+            input words, [UNK] and [PAD].
+
+        Examples:
+            .. code-block::
+
+                from paddlenlp.embeddings import TokenEmbedding
+
+                embed = TokenEmbedding()
+                answers = embed.analogy('男人', '国王', '女人', topk=3)
+
+        """
+        if topk <= 0:
+            raise ValueError("topk should be a positive integer, but received {}.".format(topk))
+        idx_list = self.get_idx_list_from_words([word_a, word_b, word_c])
+        vectors = self._normalize_np(self.search(idx_list))
+        query = (vectors[1] - vectors[0] + vectors[2])[np.newaxis, :]
+        return self._topk_by_vectors(query, [idx_list], topk, chunk_size)[0]
+
     def _construct_word_to_idx(self, idx_to_word):
         """
         Constructs word to index dict.
@@ -21,3 +21,10 @@ from .perplexity import Perplexity
 from .rouge import Rouge1, Rouge2, RougeL, RougeLForDuReader, RougeN
 from .sighan import CorrectionF1, DetectionF1
 from .span import SpanEvaluator
+from .streaming import (
+    StreamingBLEU,
+    StreamingChunkEvaluator,
+    StreamingMetric,
+    StreamingPerplexity,
+    StreamingRouge,
+)
@@ -0,0 +1,216 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+from .bleu import BLEU
+from .chunk import ChunkEvaluator, extract_tp_actual_correct
+from .perplexity import Perplexity
+from .rouge import Rouge1, Rouge2, RougeL
+
+__all__ = [
+    "StreamingMetric",
+    "StreamingChunkEvaluator",
+    "StreamingPerplexity",
+    "StreamingBLEU",
+    "StreamingRouge",
+]
+
+
+def _to_ids(predictions, labels):
+    # The models may return a tuple of outputs, the first one is the logits
+    if isinstance(predictions, (list, tuple)):
+        predictions = predictions[0]
+    if np.issubdtype(predictions.dtype, np.floating) and predictions.ndim == labels.ndim + 1:
+        predictions = predictions.argmax(axis=-1)
+    return predictions
+
+
+def _strip(ids, ignore_ids):
+    return [int(i) for i in ids if int(i) not in ignore_ids]
+
+
+class StreamingMetric:
+    """
+    The base class of the metrics updated batch by batch. If the `compute_metrics` of `Trainer` is a
+    `StreamingMetric`, `Trainer.evaluate` updates it with the predictions and labels of every step and
+    calls `finalize` at the end, so the predictions of the whole dataset are never retained.
+
+    A `StreamingMetric` is also callable with an `EvalPrediction`, so it works wherever a `compute_metrics`
+    function is expected.
+    """
+
+    def reset(self):
+        """
+        Reset the states of the metric.
+        """
+        raise NotImplementedError
+
+    def update(self, predictions, labels):
+        """
+        Update the states with the predictions and labels of one batch.
+
+        Args:
+            predictions (numpy.ndarray|tuple): The logits (or the ids) predicted by the model.
+            labels (numpy.ndarray): The label ids.
+        """
+        raise NotImplementedError
+
+    def finalize(self):
+        """
+        Return the dict of metric names to values computed from all the updated batches.
+        """
+        raise NotImplementedError
+
+    def __call__(self, eval_pred):
+        self.reset()
+        self.update(eval_pred.predictions, eval_pred.label_ids)
+        return self.finalize()
+
+
+class StreamingChunkEvaluator(StreamingMetric):
+    """
+    The streaming version of `ChunkEvaluator` for token classification, the positions whose label is
+    `ignore_index` (the paddings and the non-first sub-words) are skipped.
+
+    Args:
+        label_list (list): The label list.
+        suffix (bool, optional): If set True, the label ends with '-B', '-I', '-E' or '-S', else the label
+            starts with them. Defaults to `False`.
+        ignore_index (int, optional): The label id to skip. Defaults to -100.
+    """
+
+    def __init__(self, label_list, suffix=False, ignore_index=-100):
+        self.evaluator = ChunkEvaluator(label_list, suffix=suffix)
+        self.ignore_index = ignore_index
+
+    def reset(self):
+        self.evaluator.reset()
+
+    def update(self, predictions, labels):
+        predictions = _to_ids(predictions, labels)
+        id2label = self.evaluator.id2label_dict
+        y_true, y_pred = [], []
+        for prediction, label in zip(predictions, labels):
+            mask = label != self.ignore_index
+            y_true.append([id2label[index] for index in label[mask]])
+            y_pred.append([id2label.get(index, "O") for index in prediction[: len(label)][mask]])
+        pred_sum, tp_sum, true_sum = extract_tp_actual_correct(y_true, y_pred, self.evaluator.suffix)
+        self.evaluator.update(int(pred_sum.sum()), int(true_sum.sum()), int(tp_sum.sum()))
+
+    def finalize(self):
+        precision, recall, f1_score = self.evaluator.accumulate()
+        return {"precision": precision, "recall": recall, "f1": f1_score}
+
+
+class StreamingPerplexity(StreamingMetric):
+    """
+    The streaming version of `Perplexity`, the cross entropy is computed from the logits of every batch
+    and only the sums are kept. The logits must be aligned with the labels, and the positions whose label
+    is `ignore_index` are skipped.
+
+    Args:
+        ignore_index (int, optional): The label id to skip. Defaults to -100.
+    """
+
+    def __init__(self, ignore_index=-100):
+        self.perplexity = Perplexity()
+        self.ignore_index = ignore_index
+
+    def reset(self):
+        self.perplexity.reset()
+
+    def update(self, predictions, labels):
+        if isinstance(predictions, (list, tuple)):
+            predictions = predictions[0]
+        logits = predictions[:, : labels.shape[1]].astype("float32")
+        mask = labels != self.ignore_index
+        # The stable log softmax
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        log_probs = logits - np.log(np.exp(logits).sum(axis=-1, keepdims=True))
+        label_log_probs = np.take_along_axis(log_probs, np.where(mask, labels, 0)[..., None], axis=-1)[..., 0]
+        ce = -label_log_probs * mask
+        self.perplexity.update(ce, np.array(mask.sum()))
+
+    def finalize(self):
+        return {"perplexity": float(self.perplexity.accumulate())}
+
+
+class StreamingBLEU(StreamingMetric):
+    """
+    The streaming version of `BLEU` on the token ids, the `ignore_index` and `pad_token_id` are stripped
+    from both the predictions and the labels.
+
+    Args:
+        n_size (int, optional): Number of gram for BLEU metric. Defaults to 4.
+        weights (list, optional): The weights of precision of each gram. Defaults to None.
+        ignore_index (int, optional): The label id to strip. Defaults to -100.
+        pad_token_id (int, optional): The padding id to strip. Defaults to None.
+    """
+
+    def __init__(self, n_size=4, weights=None, ignore_index=-100, pad_token_id=None):
+        self.bleu = BLEU(n_size=n_size, weights=weights)
+        self.ignore_ids = {ignore_index, pad_token_id} - {None}
+
+    def reset(self):
+        self.bleu.reset()
+
+    def update(self, predictions, labels):
+        predictions = _to_ids(predictions, labels)
+        for prediction, label in zip(predictions, labels):
+            self.bleu.add_inst(_strip(prediction, self.ignore_ids), [_strip(label, self.ignore_ids)])
+
+    def finalize(self):
+        return {"bleu": self.bleu.accumulate()}
+
+
+class StreamingRouge(StreamingMetric):
+    """
+    The streaming version of `Rouge1`, `Rouge2` and `RougeL` on the token ids, the `ignore_index` and
+    `pad_token_id` are stripped from both the predictions and the labels.
+
+    Args:
+        ignore_index (int, optional): The label id to strip. Defaults to -100.
+        pad_token_id (int, optional): The padding id to strip. Defaults to None.
+    """
+
+    def __init__(self, ignore_index=-100, pad_token_id=None):
+        self.rouge1 = Rouge1()
+        self.rouge2 = Rouge2()
+        self.rougel = RougeL()
+        self.ignore_ids = {ignore_index, pad_token_id} - {None}
+        self.reset()
+
+    def reset(self):
+        self.rouge1.reset()
+        self.rouge2.reset()
+        self.rougel.reset()
+
+    def update(self, predictions, labels):
+        predictions = _to_ids(predictions, labels)
+        cands = [_strip(prediction, self.ignore_ids) for prediction in predictions]
+        refs = [_strip(label, self.ignore_ids) for label in labels]
+        if len(cands) == 0:
+            return
+        self.rouge1.update(*self.rouge1.compute(cands, refs))
+        self.rouge2.update(*self.rouge2.compute(cands, refs))
+        for cand, ref in zip(cands, refs):
+            self.rougel.add_inst(cand, [ref])
+
+    def finalize(self):
+        return {
+            "rouge1": self.rouge1.accumulate(),
+            "rouge2": self.rouge2.accumulate(),
+            "rougeL": float(self.rougel.accumulate()),
+        }
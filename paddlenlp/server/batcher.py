@@ -0,0 +1,240 @@
+# coding:utf-8
+# Copyright (c) 2023  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from ..utils.log import logger
+
+
+class _BatchRequest:
+    def __init__(self, data, parameters):
+        self.data = data
+        self.parameters = parameters
+        self.future = Future()
+        self.enqueue_time = time.perf_counter()
+
+
+def _parameters_key(parameters):
+    try:
+        return json.dumps(parameters, sort_keys=True)
+    except (TypeError, ValueError):
+        return None
+
+
+def merge_batch_data(datas):
+    """
+    Merge the `data` fields of several requests into one request. Every request
+    must be a dict with the same keys, each value is a str, a list of samples or
+    None. Returns the merged data and the number of samples of each request, or
+    (None, None) when the requests could not be merged.
+    """
+    keys = None
+    for data in datas:
+        if not isinstance(data, dict):
+            return None, None
+        if keys is None:
+            keys = set(data.keys())
+        elif set(data.keys()) != keys:
+            return None, None
+    if not keys:
+        return None, None
+
+    merged = {key: [] for key in keys}
+    sizes = []
+    for data in datas:
+        size = None
+        for key in keys:
+            value = data[key]
+            if value is None:
+                continue
+            if isinstance(value, str):
+                value = [value]
+            if not isinstance(value, list):
+                return None, None
+            if size is not None and size != len(value):
+                return None, None
+            size = len(value)
+            merged[key].extend(value)
+        if size is None:
+            return None, None
+        sizes.append(size)
+    # The key must be None for all the requests or for none of them
+    for key in keys:
+        num_none = sum(1 for data in datas if data[key] is None)
+        if num_none == len(datas):
+            merged[key] = None
+        elif num_none > 0:
+            return None, None
+    return merged, sizes
+
+
+def split_batch_result(result, sizes):
+    """
+    Split the result of the merged request back to the results of every request,
+    each per-sample list whose length equals to the total samples is sliced and
+    the other values are copied. Returns None when the result could not be split.
+    """
+    total = sum(sizes)
+
+    def _split(value):
+        if isinstance(value, (list, tuple)) and len(value) == total:
+            outputs, start = [], 0
+            for size in sizes:
+                outputs.append(type(value)(value[start : start + size]))
+                start += size
+            return outputs, True
+        if isinstance(value, dict):
+            splited = [dict() for _ in sizes]
+            found = False
+            for key, sub_value in value.items():
+                sub_outputs, sub_found = _split(sub_value)
+                found = found or sub_found
+                for i, sub_output in enumerate(sub_outputs):
+                    splited[i][key] = sub_output
+            return splited, found
+        return [value for _ in sizes], False
+
+    outputs, found = _split(result)
+    if not found:
+        return None
+    return outputs
+
+
+class DynamicBatcher:
+    """
+    The DynamicBatcher coalesces the concurrent requests into one batch, the batch is
+    sent when `max_batch_size` requests are collected or `max_wait_time` seconds passed
+    since the first request arrived. The requests could be merged only if they have
+    the same parameters, the merged result is scattered back to every request.
+
+    Args:
+        process_fn (callable): The function to process the merged request, the signature
+            is `process_fn(data, parameters)`.
+        max_batch_size (int): The max number of requests merged in one batch.
+        max_wait_time (float): The max seconds to wait for filling a batch.
+        num_workers (int): The number of threads consuming the batches, usually equal
+            to the number of predictors.
+        observe_stage (callable, optional): The callback `observe_stage(stage, seconds)` to report
+            the time every request waits in the queue.
+        observe_batch_size (callable, optional): The callback `observe_batch_size(batch_size)` to
+            report the number of requests of every `process_fn` call.
+    """
+
+    def __init__(
+        self,
+        process_fn,
+        max_batch_size=8,
+        max_wait_time=0.01,
+        num_workers=1,
+        observe_stage=None,
+        observe_batch_size=None,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("The `max_batch_size` must be positive, but received {}.".format(max_batch_size))
+        if max_wait_time < 0:
+            raise ValueError("The `max_wait_time` must be non-negative, but received {}.".format(max_wait_time))
+        self._process_fn = process_fn
+        self._observe_stage = observe_stage
+        self._observe_batch_size = observe_batch_size
+        self._max_batch_size = max_batch_size
+        self._max_wait_time = max_wait_time
+        self._queue = queue.Queue()
+        self._workers = []
+        for i in range(max(1, num_workers)):
+            worker = threading.Thread(target=self._worker_loop, name="paddlenlp-batcher-{}".format(i), daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, data, parameters):
+        """
+        Put the request into the batch queue, return a `concurrent.futures.Future` of the result.
+        """
+        request = _BatchRequest(data, parameters)
+        self._queue.put(request)
+        return request.future
+
+    def predict(self, data, parameters):
+        return self.submit(data, parameters).result()
+
+    def _collect_batch(self):
+        requests = [self._queue.get()]
+        deadline = time.time() + self._max_wait_time
+        while len(requests) < self._max_batch_size:
+            remaining = deadline - time.time()
+            try:
+                if remaining <= 0:
+                    requests.append(self._queue.get_nowait())
+                else:
+                    requests.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return requests
+
+    def _worker_loop(self):
+        while True:
+            requests = self._collect_batch()
+            if self._observe_stage is not None:
+                now = time.perf_counter()
+                for request in requests:
+                    self._observe_stage("batch_wait", now - request.enqueue_time)
+            # Only the requests with the same parameters could be merged
+            groups = {}
+            for request in requests:
+                key = _parameters_key(request.parameters)
+                if key is None:
+                    key = id(request)
+                groups.setdefault(key, []).append(request)
+            for group in groups.values():
+                self._process_group(group)
+
+    def _process_single(self, request):
+        if not request.future.set_running_or_notify_cancel():
+            return
+        if self._observe_batch_size is not None:
+            self._observe_batch_size(1)
+        try:
+            request.future.set_result(self._process_fn(request.data, request.parameters))
+        except Exception as e:
+            request.future.set_exception(e)
+
+    def _process_group(self, requests):
+        if len(requests) == 1:
+            self._process_single(requests[0])
+            return
+        merged_data, sizes = merge_batch_data([request.data for request in requests])
+        if merged_data is None:
+            for request in requests:
+                self._process_single(request)
+            return
+        try:
+            result = self._process_fn(merged_data, requests[0].parameters)
+            outputs = split_batch_result(result, sizes)
+        except Exception as e:
+            logger.warning("Failed to process the merged requests, fallback to process one by one: {}".format(e))
+            outputs = None
+        if outputs is None:
+            for request in requests:
+                self._process_single(request)
+            return
+        logger.debug("{} requests are merged into one batch of {} samples.".format(len(requests), sum(sizes)))
+        if self._observe_batch_size is not None:
+            self._observe_batch_size(len(requests))
+        for request, output in zip(requests, outputs):
+            if request.future.set_running_or_notify_cancel():
+                request.future.set_result(output)
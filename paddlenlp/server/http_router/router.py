@@ -12,11 +12,14 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import asyncio
 import hashlib
+import json
 import typing
 from typing import Optional
 
 from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Extra, create_model
 
 from ...utils.log import logger
@@ -32,7 +35,40 @@ class RequestBase(BaseModel, extra=Extra.forbid):
 
 
 class HttpRouterManager(BaseRouterManager):
-    def register_models_router(self, task_name):
+    def __init__(self, app):
+        super().__init__(app)
+        self._semaphores = {}
+
+    async def _async_predict(self, task_name, manager, inference_request, max_concurrency):
+        """
+        Await the result of the manager without blocking the event loop, at most `max_concurrency`
+        requests are submitted to the manager and the others wait in the event loop.
+        """
+        if max_concurrency is None:
+            return await asyncio.wrap_future(manager.submit(inference_request.data, inference_request.parameters))
+        # Create the semaphore lazily to bind it with the running event loop
+        if task_name not in self._semaphores:
+            self._semaphores[task_name] = asyncio.Semaphore(max_concurrency)
+        async with self._semaphores[task_name]:
+            return await asyncio.wrap_future(manager.submit(inference_request.data, inference_request.parameters))
+
+    def register_metrics_router(self, path="/metrics"):
+        """
+        Register the route to expose the server metrics in the Prometheus text format.
+        """
+
+        def metrics():
+            managers = {}
+            for manager in (self._app._model_manager, self._app._taskflow_manager):
+                if manager is not None:
+                    managers[manager._task_name] = manager
+            return PlainTextResponse(self._app._metrics.render(managers))
+
+        router = APIRouter()
+        router.add_api_route(path, metrics, methods=["get"], summary="Metrics", response_class=PlainTextResponse)
+        self._app.include_router(router)
+
+    def register_models_router(self, task_name, async_mode=False, max_concurrency=None):
 
         # Url path to register the model
         paths = [f"/{task_name}"]
@@ -57,9 +93,19 @@ class HttpRouterManager(BaseRouterManager):
         )
 
         # Template predict endpoint function to dynamically serve different models
-        def predict(request: Request, inference_request: req_model):
-            result = self._app._model_manager.predict(inference_request.data, inference_request.parameters)
-            return {"result": result}
+        if async_mode:
+
+            async def predict(request: Request, inference_request: req_model):
+                result = await self._async_predict(
+                    task_name, self._app._model_manager, inference_request, max_concurrency
+                )
+                return {"result": result}
+
+        else:
+
+            def predict(request: Request, inference_request: req_model):
+                result = self._app._model_manager.predict(inference_request.data, inference_request.parameters)
+                return {"result": result}
 
         # Register the route and add to the app
         router = APIRouter()
@@ -75,7 +121,7 @@ class HttpRouterManager(BaseRouterManager):
             )
         self._app.include_router(router)
 
-    def register_taskflow_router(self, task_name):
+    def register_taskflow_router(self, task_name, async_mode=False, max_concurrency=None):
 
         # Url path to register the model
         paths = [f"/{task_name}"]
@@ -100,9 +146,19 @@ class HttpRouterManager(BaseRouterManager):
         )
 
         # Template predict endpoint function to dynamically serve different models
-        def predict(request: Request, inference_request: req_model):
-            result = self._app._taskflow_manager.predict(inference_request.data, inference_request.parameters)
-            return {"result": result}
+        if async_mode:
+
+            async def predict(request: Request, inference_request: req_model):
+                result = await self._async_predict(
+                    task_name, self._app._taskflow_manager, inference_request, max_concurrency
+                )
+                return {"result": result}
+
+        else:
+
+            def predict(request: Request, inference_request: req_model):
+                result = self._app._taskflow_manager.predict(inference_request.data, inference_request.parameters)
+                return {"result": result}
 
         # Register the route and add to the app
         router = APIRouter()
@@ -117,3 +173,39 @@ class HttpRouterManager(BaseRouterManager):
                 response_model_exclude_none=True,
             )
         self._app.include_router(router)
+
+    def register_taskflow_stream_router(self, task_name):
+        """
+        Register the server-sent events route to stream the generated text of the Taskflow, every
+        event is a json with the new `text`, and the stream ends with the `[DONE]` event.
+        """
+        path = f"/{task_name}/stream"
+        logger.info("   Taskflow stream request [path]={} is genereated.".format(path))
+
+        # Unique name to create the pydantic model
+        unique_name = hashlib.md5((task_name + "/stream").encode()).hexdigest()
+
+        # Create request model
+        req_model = create_model(
+            "RequestModel" + unique_name,
+            data=(typing.Any, ...),
+            __base__=RequestBase,
+        )
+
+        def stream_predict(request: Request, inference_request: req_model):
+            def event_stream():
+                try:
+                    for new_text in self._app._taskflow_manager.stream(
+                        inference_request.data, inference_request.parameters
+                    ):
+                        yield "data: {}\n\n".format(json.dumps({"text": new_text}, ensure_ascii=False))
+                except Exception as e:
+                    logger.warning("The streaming generation failed: {}".format(e))
+                    yield "event: error\ndata: {}\n\n".format(json.dumps({"error": str(e)}, ensure_ascii=False))
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+        router = APIRouter()
+        router.add_api_route(path, stream_predict, methods=["post"], summary=f"{task_name.title()} Stream")
+        self._app.include_router(router)
@@ -0,0 +1,209 @@
+# coding:utf-8
+# Copyright (c) 2023  PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bisect
+import threading
+import time
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+# The stages of a request: waiting in the dynamic batcher, waiting for a free predictor replica,
+# tokenization in the handler, the predictor run and the post handler
+STAGES = ("batch_wait", "lock_wait", "preprocess", "inference", "postprocess")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(key, value) for key, value in sorted(labels.items())) + "}"
+
+
+class Histogram:
+    """
+    The cumulative histogram in the Prometheus style.
+    """
+
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self._buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            if key not in self._series:
+                self._series[key] = {"counts": [0] * (len(self._buckets) + 1), "sum": 0.0, "count": 0}
+            series = self._series[key]
+            series["counts"][bisect.bisect_left(self._buckets, value)] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = ["# HELP {} {}".format(self.name, self.documentation), "# TYPE {} histogram".format(self.name)]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                labels = dict(key)
+                cumulative = 0
+                for bound, count in zip(self._buckets + ("+Inf",), series["counts"]):
+                    cumulative += count
+                    bucket_labels = dict(labels, le=bound)
+                    lines.append("{}_bucket{} {}".format(self.name, _format_labels(bucket_labels), cumulative))
+                lines.append("{}_sum{} {}".format(self.name, _format_labels(labels), series["sum"]))
+                lines.append("{}_count{} {}".format(self.name, _format_labels(labels), series["count"]))
+        return lines
+
+
+class Counter:
+    """
+    The monotonically increasing counter in the Prometheus style.
+    """
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + value
+
+    def render(self):
+        lines = ["# HELP {} {}".format(self.name, self.documentation), "# TYPE {} counter".format(self.name)]
+        with self._lock:
+            for key, value in sorted(self._series.items()):
+                lines.append("{}{} {}".format(self.name, _format_labels(dict(key)), value))
+        return lines
+
+
+def render_gauge(name, documentation, samples):
+    """
+    Render the gauge from the list of (labels, value).
+    """
+    lines = ["# HELP {} {}".format(name, documentation), "# TYPE {} gauge".format(name)]
+    for labels, value in samples:
+        lines.append("{}{} {}".format(name, _format_labels(labels), value))
+    return lines
+
+
+class ServerMetrics:
+    """
+    The latency and throughput metrics of the SimpleServer, the metrics are rendered in the
+    Prometheus text format by the `/metrics` route.
+    """
+
+    def __init__(self):
+        self.request_latency = Histogram("paddlenlp_request_latency_seconds", "The end to end latency of requests.")
+        self.stage_latency = Histogram("paddlenlp_stage_latency_seconds", "The latency of every stage of requests.")
+        self.batch_size = Histogram(
+            "paddlenlp_batch_size", "The number of requests merged into one predictor call.", BATCH_SIZE_BUCKETS
+        )
+        self.requests_total = Counter("paddlenlp_requests_total", "The number of requests.")
+        self.request_errors_total = Counter("paddlenlp_request_errors_total", "The number of failed requests.")
+
+    def observe_stage(self, task_name, stage, seconds):
+        self.stage_latency.observe(seconds, task=task_name, stage=stage)
+
+    def observe_request(self, task_name, seconds, error=False):
+        self.request_latency.observe(seconds, task=task_name)
+        self.requests_total.inc(task=task_name)
+        if error:
+            self.request_errors_total.inc(task=task_name)
+
+    def observe_batch_size(self, task_name, batch_size):
+        self.batch_size.observe(batch_size, task=task_name)
+
+    def render(self, managers=None):
+        """
+        Render all the metrics, the queue depth and the cache counters are collected from the managers,
+        `managers` is a dict of task name to ModelManager or TaskflowManager.
+        """
+        lines = []
+        for metric in (
+            self.requests_total,
+            self.request_errors_total,
+            self.request_latency,
+            self.stage_latency,
+            self.batch_size,
+        ):
+            lines.extend(metric.render())
+        queue_depths, cache_samples = [], []
+        for task_name, manager in (managers or {}).items():
+            for replica, depth in enumerate(manager.get_queue_depths()):
+                queue_depths.append(({"task": task_name, "replica": replica}, depth))
+            cache_stats = manager.cache_stats()
+            if cache_stats is not None:
+                for key in ("hits", "disk_hits", "misses", "size"):
+                    cache_samples.append(({"task": task_name, "type": key}, cache_stats[key]))
+        lines.extend(
+            render_gauge("paddlenlp_queue_depth", "The number of outstanding requests of every replica.", queue_depths)
+        )
+        lines.extend(render_gauge("paddlenlp_result_cache", "The counters of the result cache.", cache_samples))
+        return "\n".join(lines) + "\n"
+
+
+class StageTimer:
+    """
+    The context manager to time a stage and report it to the observer.
+    """
+
+    def __init__(self, observer, stage):
+        self._observer = observer
+        self._stage = stage
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._observer is not None:
+            self._observer(self._stage, time.perf_counter() - self._start)
+
+
+class _TimedRunner:
+    def __init__(self, runner, timed_predictor):
+        self._runner = runner
+        self._timed_predictor = timed_predictor
+
+    def run(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._runner.run(*args, **kwargs)
+        finally:
+            self._timed_predictor.inference_time += time.perf_counter() - start
+
+    def __getattr__(self, name):
+        return getattr(self._runner, name)
+
+
+class TimedPredictor:
+    """
+    The proxy of `paddlenlp.server.predictor.Predictor` passed to the model handler, the time spent in
+    `_predictor.run` is accumulated to `inference_time` so that the tokenization in the model handler
+    could be separated from the inference.
+    """
+
+    def __init__(self, predictor):
+        self._wrapped = predictor
+        self._predictor = _TimedRunner(predictor._predictor, self)
+        self.inference_time = 0.0
+
+    def __getattr__(self, name):
+        return getattr(self._wrapped, name)
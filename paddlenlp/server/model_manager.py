@@ -13,18 +13,38 @@
 # see the license for the specific language governing permissions and
 # limitations under the license.
 
+import os
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from ..transformers import AutoTokenizer
 from ..utils.log import logger
+from ..utils.result_cache import ResultCache, hash_content
 from ..utils.tools import get_env_device
+from .batcher import DynamicBatcher
 from .handlers import BaseModelHandler, BasePostHandler
+from .metrics import StageTimer, TimedPredictor
 from .predictor import Predictor
-from .utils import lock_predictor
+from .utils import PredictorPool
 
 
 class ModelManager:
-    def __init__(self, task_name, model_path, tokenizer_name, model_handler, post_handler, precision, device_id):
+    def __init__(
+        self,
+        task_name,
+        model_path,
+        tokenizer_name,
+        model_handler,
+        post_handler,
+        precision,
+        device_id,
+        max_batch_size=1,
+        max_wait_time=0.01,
+        cache_size=0,
+        cache_ttl=None,
+        cache_dir=None,
+        metrics=None,
+    ):
         self._task_name = task_name
         self._model_path = model_path
         self._tokenizer_name = tokenizer_name
@@ -33,7 +53,15 @@ class ModelManager:
         self._precision = precision
         self._device_id = device_id
         self._tokenizer = None
+        self._max_batch_size = max_batch_size
+        self._max_wait_time = max_wait_time
+        self._batcher = None
+        self._metrics = metrics
+        self._result_cache = None
         self._register()
+        if cache_size > 0:
+            self._result_cache = ResultCache(max_size=cache_size, ttl=cache_ttl, cache_dir=cache_dir)
+            self._cache_namespace = self._get_cache_namespace()
 
     def _register(self):
         # Get the model handler
@@ -60,19 +88,26 @@ class ModelManager:
             predictor_list.append(predictor)
         elif isinstance(self._device_id, list):
             for device in self._device_id:
-                predictor = Predictor(
-                    self._model_path,
-                    self._model_class_or_name,
-                    self._input_spec,
-                    self._precision,
-                    "gpu:" + str(device),
-                )
+                predictor = Predictor(self._model_path, self._precision, "gpu:" + str(device))
                 predictor_list.append(predictor)
         self._predictor_list = predictor_list
+        self._predictor_pool = PredictorPool(predictor_list)
+        self._executor = ThreadPoolExecutor(max_workers=len(predictor_list), thread_name_prefix="paddlenlp-model")
 
         # Get the tokenize of model
         self._get_tokenizer()
 
+        # Coalesce the concurrent requests into one batch
+        if self._max_batch_size > 1:
+            self._batcher = DynamicBatcher(
+                self._predict,
+                max_batch_size=self._max_batch_size,
+                max_wait_time=self._max_wait_time,
+                num_workers=len(self._predictor_list),
+                observe_stage=self._observe_stage,
+                observe_batch_size=self._observe_batch_size,
+            )
+
     def _get_tokenizer(self):
         if self._tokenizer_name is not None:
             if isinstance(self._tokenizer_name, str):
@@ -81,16 +116,120 @@ class ModelManager:
                 logger.error("The argrument of `tokenizer_name`  must be the name of tokenizer.")
         assert self._tokenizer is not None, "The tokenizer must be not register, you could set the class of Tokenizer"
 
-    def _get_predict_id(self):
-        t = time.time()
-        t = int(round(t * 1000))
-        predictor_id = t % len(self._predictor_list)
-        logger.info("The predictor id: {} is selected by running the model.".format(predictor_id))
-        return predictor_id
+    def get_queue_depths(self):
+        """
+        Return the number of outstanding requests of every predictor.
+        """
+        return self._predictor_pool.queue_depths()
+
+    def _observe_stage(self, stage, seconds):
+        if self._metrics is not None:
+            self._metrics.observe_stage(self._task_name, stage, seconds)
+
+    def _observe_batch_size(self, batch_size):
+        if self._metrics is not None:
+            self._metrics.observe_batch_size(self._task_name, batch_size)
+
+    def _observe_request(self, start, error=False):
+        if self._metrics is not None:
+            self._metrics.observe_request(self._task_name, time.perf_counter() - start, error=error)
+
+    def _get_cache_namespace(self):
+        """
+        Return the hash of the model identity which prefixes the keys of the result cache, so that the
+        models sharing the on-disk cache, or the redeployed model in the same path, never get the
+        results of each other.
+        """
+        model_files = []
+        static_model_path = self._predictor_list[0]._get_default_static_model_path()
+        for suffix in (".pdmodel", ".pdiparams"):
+            path = static_model_path + suffix
+            if os.path.exists(path):
+                model_files.append((suffix, os.path.getsize(path), os.path.getmtime(path)))
+        return hash_content(
+            self._task_name,
+            os.path.abspath(self._model_path),
+            self._tokenizer_name,
+            self._predictor_list[0]._precision,
+            self._model_handler.__qualname__,
+            self._post_handler.__qualname__,
+            model_files,
+        )
+
+    def cache_stats(self):
+        """
+        Return the hit/miss counters of the result cache, None if the cache is disabled.
+        """
+        if self._result_cache is None:
+            return None
+        return self._result_cache.stats()
 
     def predict(self, data, parameters):
-        predictor_id = self._get_predict_id()
-        with lock_predictor(self._predictor_list[predictor_id]._lock):
-            model_output = self._model_handler(self._predictor_list[predictor_id], self._tokenizer, data, parameters)
-            final_output = self._post_handler(model_output, parameters)
+        start = time.perf_counter()
+        cache_key = None
+        if self._result_cache is not None:
+            cache_key = hash_content(self._cache_namespace, data, parameters)
+            hit, result = self._result_cache.get(cache_key)
+            if hit:
+                self._observe_request(start)
+                return result
+        try:
+            if self._batcher is not None:
+                result = self._batcher.predict(data, parameters)
+            else:
+                result = self._predict(data, parameters)
+        except Exception:
+            self._observe_request(start, error=True)
+            raise
+        self._observe_request(start)
+        if cache_key is not None:
+            self._result_cache.put(cache_key, result)
+        return result
+
+    def submit(self, data, parameters):
+        """
+        Submit the request without blocking, return a `concurrent.futures.Future` of the result.
+        """
+        start = time.perf_counter()
+        cache_key = None
+        if self._result_cache is not None:
+            cache_key = hash_content(self._cache_namespace, data, parameters)
+            hit, result = self._result_cache.get(cache_key)
+            if hit:
+                self._observe_request(start)
+                future = Future()
+                future.set_result(result)
+                return future
+        if self._batcher is not None:
+            future = self._batcher.submit(data, parameters)
+        else:
+            future = self._executor.submit(self._predict, data, parameters)
+
+        def _on_done(done_future):
+            error = done_future.exception() is not None
+            self._observe_request(start, error=error)
+            if cache_key is not None and not error:
+                self._result_cache.put(cache_key, done_future.result())
+
+        future.add_done_callback(_on_done)
+        return future
+
+    def _predict(self, data, parameters):
+        start = time.perf_counter()
+        with self._predictor_pool.acquire() as (predictor_id, predictor):
+            logger.debug("The predictor id: {} is selected by running the model.".format(predictor_id))
+            self._observe_stage("lock_wait", time.perf_counter() - start)
+            if self._metrics is None:
+                model_output = self._model_handler(predictor, self._tokenizer, data, parameters)
+                return self._post_handler(model_output, parameters)
+
+            # Separate the predictor run from the tokenization in the model handler
+            timed_predictor = TimedPredictor(predictor)
+            start = time.perf_counter()
+            model_output = self._model_handler(timed_predictor, self._tokenizer, data, parameters)
+            handler_time = time.perf_counter() - start
+            self._observe_stage("preprocess", handler_time - timed_predictor.inference_time)
+            self._observe_stage("inference", timed_predictor.inference_time)
+            with StageTimer(self._observe_stage, "postprocess"):
+                final_output = self._post_handler(model_output, parameters)
             return final_output
@@ -22,6 +22,7 @@ from multiprocessing import cpu_count
 import paddle
 
 from ..utils.log import logger
+from .utils import CPU_THREADS_ENV
 
 
 class Predictor:
@@ -29,10 +30,10 @@ class Predictor:
         self._model_path = model_path
         self._default_static_model_path = "auto_static"
         self._precision = precision
-        self._cpu_thread = 8
         self._config = None
         self._device = device
-        self._num_threads = math.ceil(cpu_count() / 2)
+        # The worker process of multi worker mode sets the cpu threads of its predictors
+        self._num_threads = int(os.environ.get(CPU_THREADS_ENV, math.ceil(cpu_count() / 2)))
         self._output_num = 1
         paddle.set_device(device)
         self._create_predictor()
@@ -14,10 +14,12 @@
 # limitations under the License.
 
 from fastapi import FastAPI
+
+from ..taskflow import Taskflow
 from .http_router import HttpRouterManager
+from .metrics import ServerMetrics
 from .model_manager import ModelManager
 from .taskflow_manager import TaskflowManager
-from ..taskflow import Taskflow
 
 
 class SimpleServer(FastAPI):
@@ -31,9 +33,25 @@ class SimpleServer(FastAPI):
         self._model_manager = None
         self._service_name = "paddlenlp"
         self._service_type = None
+        self._metrics = ServerMetrics()
+        self._router_manager.register_metrics_router()
 
     def register(
-        self, task_name, model_path, tokenizer_name, model_handler, post_handler, precision="fp32", device_id=0
+        self,
+        task_name,
+        model_path,
+        tokenizer_name,
+        model_handler,
+        post_handler,
+        precision="fp32",
+        device_id=0,
+        max_batch_size=1,
+        max_wait_time=0.01,
+        async_mode=False,
+        max_concurrency=None,
+        cache_size=0,
+        cache_ttl=None,
+        cache_dir=None,
     ):
         """
         The register function for the SimpleServer, the main register argrument as follows:
@@ -43,16 +61,49 @@ class SimpleServer(FastAPI):
             model_path (str):
             handler(str):
             device (int|list|str, optional):
+            max_batch_size (int, optional): The max number of concurrent requests merged into one
+                model handler call, the dynamic batching is disabled when it is 1. Defaults to 1.
+            max_wait_time (float, optional): The max seconds to wait for filling a batch. Defaults to 0.01.
+            async_mode (bool, optional): Whether to register an asyncio endpoint, the inference runs in the
+                dedicated executor (or the dynamic batcher) and is awaited without blocking the event loop.
+                Defaults to False.
+            max_concurrency (int, optional): The max number of requests submitted to the predictors in the
+                async mode, the others wait in the event loop. Defaults to None, no limit.
+            cache_size (int, optional): The max number of cached results keyed by the content hash of the
+                request, the result cache is disabled when it is 0. Defaults to 0.
+            cache_ttl (float, optional): The seconds a cached result keeps valid. Defaults to None, never expired.
+            cache_dir (str, optional): The directory of the optional on-disk result cache. Defaults to None.
         """
         self._server_type = "models"
         model_manager = ModelManager(
-            task_name, model_path, tokenizer_name, model_handler, post_handler, precision, device_id
+            task_name,
+            model_path,
+            tokenizer_name,
+            model_handler,
+            post_handler,
+            precision,
+            device_id,
+            max_batch_size=max_batch_size,
+            max_wait_time=max_wait_time,
+            cache_size=cache_size,
+            cache_ttl=cache_ttl,
+            cache_dir=cache_dir,
+            metrics=self._metrics,
         )
         self._model_manager = model_manager
         # Register transformers model server router
-        self._router_manager.register_models_router(task_name)
+        self._router_manager.register_models_router(task_name, async_mode=async_mode, max_concurrency=max_concurrency)
 
-    def register_taskflow(self, task_name, task, taskflow_handler=None):
+    def register_taskflow(
+        self,
+        task_name,
+        task,
+        taskflow_handler=None,
+        max_batch_size=1,
+        max_wait_time=0.01,
+        async_mode=False,
+        max_concurrency=None,
+    ):
         """
         The register function for the SimpleServer, the main register argrument as follows:
 
@@ -61,6 +112,14 @@ class SimpleServer(FastAPI):
             model_or_path (str):
             handler(str):
             device (int|list|str, optional):
+            max_batch_size (int, optional): The max number of concurrent requests merged into one
+                Taskflow call, the dynamic batching is disabled when it is 1. Defaults to 1.
+            max_wait_time (float, optional): The max seconds to wait for filling a batch. Defaults to 0.01.
+            async_mode (bool, optional): Whether to register an asyncio endpoint, the Taskflow runs in the
+                dedicated executor (or the dynamic batcher) and is awaited without blocking the event loop.
+                Defaults to False.
+            max_concurrency (int, optional): The max number of requests submitted to the Taskflow in the
+                async mode, the others wait in the event loop. Defaults to None, no limit.
         """
         self._server_type = "server"
         check_flag = True
@@ -78,6 +137,13 @@ class SimpleServer(FastAPI):
             )
 
         # Register Taskflow server router
-        taskflow_manager = TaskflowManager(task, taskflow_handler)
+        taskflow_manager = TaskflowManager(
+            task, taskflow_handler, max_batch_size, max_wait_time, task_name=task_name, metrics=self._metrics
+        )
         self._taskflow_manager = taskflow_manager
-        self._router_manager.register_taskflow_router(task_name)
+        self._router_manager.register_taskflow_router(
+            task_name, async_mode=async_mode, max_concurrency=max_concurrency
+        )
+        # Register the streaming route for the generation Taskflow
+        if taskflow_manager.support_stream():
+            self._router_manager.register_taskflow_stream_router(task_name)
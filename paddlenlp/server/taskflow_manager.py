@@ -13,10 +13,14 @@
 # see the license for the specific language governing permissions and
 # limitations under the license.
 
+import functools
 import time
-from .handlers import TaskflowHandler
-from .utils import lock_predictor
+from concurrent.futures import ThreadPoolExecutor
+
 from ..utils.log import logger
+from .batcher import DynamicBatcher
+from .handlers import TaskflowHandler
+from .utils import PredictorPool
 
 
 class TaskflowManager:
@@ -24,17 +28,106 @@ class TaskflowManager:
     The TaskflowManager could predict the raw text.
     """
 
-    def __init__(self, task, taskflow_handler=None):
+    def __init__(
+        self, task, taskflow_handler=None, max_batch_size=1, max_wait_time=0.01, task_name=None, metrics=None
+    ):
         self._task = task
+        self._task_name = task_name
+        self._metrics = metrics
         if taskflow_handler is None:
             self._handler_func = TaskflowHandler.process
         else:
             self._handler_func = taskflow_handler.process
+        self._task_pool = PredictorPool(task)
+        self._executor = ThreadPoolExecutor(max_workers=len(task), thread_name_prefix="paddlenlp-taskflow")
+        self._batcher = None
+        if max_batch_size > 1:
+            self._batcher = DynamicBatcher(
+                self._predict,
+                max_batch_size=max_batch_size,
+                max_wait_time=max_wait_time,
+                num_workers=len(task),
+                observe_stage=self._observe_stage,
+                observe_batch_size=self._observe_batch_size,
+            )
+        # Report the preprocess, inference and postprocess time of the tasks
+        if self._metrics is not None:
+            for t in self._task:
+                t.task_instance._stage_observer = functools.partial(self._metrics.observe_stage, self._task_name)
+
+    def _observe_stage(self, stage, seconds):
+        if self._metrics is not None:
+            self._metrics.observe_stage(self._task_name, stage, seconds)
+
+    def _observe_batch_size(self, batch_size):
+        if self._metrics is not None:
+            self._metrics.observe_batch_size(self._task_name, batch_size)
+
+    def _observe_request(self, start, error=False):
+        if self._metrics is not None:
+            self._metrics.observe_request(self._task_name, time.perf_counter() - start, error=error)
 
     def predict(self, data, parameters):
-        t = time.time()
-        t = int(round(t * 1000))
-        task_index = t % len(self._task)
-        logger.info("The predictor id: {} is selected by running the taskflow.".format(task_index))
-        with lock_predictor(self._task[task_index]._lock):
-            return self._handler_func(self._task[task_index], data, parameters)
+        start = time.perf_counter()
+        try:
+            if self._batcher is not None:
+                result = self._batcher.predict(data, parameters)
+            else:
+                result = self._predict(data, parameters)
+        except Exception:
+            self._observe_request(start, error=True)
+            raise
+        self._observe_request(start)
+        return result
+
+    def submit(self, data, parameters):
+        """
+        Submit the request without blocking, return a `concurrent.futures.Future` of the result.
+        """
+        start = time.perf_counter()
+        if self._batcher is not None:
+            future = self._batcher.submit(data, parameters)
+        else:
+            future = self._executor.submit(self._predict, data, parameters)
+        future.add_done_callback(lambda f: self._observe_request(start, error=f.exception() is not None))
+        return future
+
+    def support_stream(self):
+        """
+        Whether all the Taskflow instances support the streaming generation.
+        """
+        return all(hasattr(t.task_instance, "stream_generate") for t in self._task)
+
+    def stream(self, data, parameters):
+        """
+        Yield the generated text step by step, the Taskflow instance is held until the generation finished.
+        """
+        if not isinstance(data, dict) or data.get("text", None) is None:
+            raise ValueError("The streaming generation requires the `text` in the request data.")
+        with self._task_pool.acquire() as (task_index, task):
+            logger.debug("The predictor id: {} is selected by streaming the taskflow.".format(task_index))
+            for new_text in task.stream_generate(data["text"]):
+                yield new_text
+
+    def get_queue_depths(self):
+        """
+        Return the number of outstanding requests of every Taskflow instance.
+        """
+        return self._task_pool.queue_depths()
+
+    def cache_stats(self):
+        """
+        Return the summed hit/miss counters of the result cache of the tasks, None if the cache is disabled.
+        """
+        stats = [t.cache_stats() for t in self._task]
+        stats = [stat for stat in stats if stat is not None]
+        if len(stats) == 0:
+            return None
+        return {key: sum(stat[key] for stat in stats) for key in ("hits", "disk_hits", "misses", "size")}
+
+    def _predict(self, data, parameters):
+        start = time.perf_counter()
+        with self._task_pool.acquire() as (task_index, task):
+            logger.debug("The predictor id: {} is selected by running the taskflow.".format(task_index))
+            self._observe_stage("lock_wait", time.perf_counter() - start)
+            return self._handler_func(task, data, parameters)
@@ -14,6 +14,12 @@
 # limitations under the License.
 
 import contextlib
+import threading
+
+# The environment variables set for every worker process of `paddlenlp server --workers`. The worker id tells
+# the application which worker it runs in, and the cpu threads are read by `paddlenlp.server.predictor.Predictor`
+WORKER_ID_ENV = "PADDLENLP_SERVER_WORKER_ID"
+CPU_THREADS_ENV = "PADDLENLP_SERVER_CPU_THREADS"
 
 
 @contextlib.contextmanager
@@ -23,3 +29,56 @@ def lock_predictor(lock):
         yield
     finally:
         lock.release()
+
+
+class PredictorPool:
+    """
+    The PredictorPool dispatches the requests to the replicas of predictor (or Taskflow), the replica
+    with the least outstanding requests is selected, the ties are broken in round-robin order.
+
+    Args:
+        predictors (list): The replicas, every replica must have the `_lock` attribute.
+    """
+
+    def __init__(self, predictors):
+        if len(predictors) == 0:
+            raise ValueError("The PredictorPool needs at least one predictor.")
+        self._predictors = predictors
+        self._outstanding = [0] * len(predictors)
+        self._next_index = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._predictors)
+
+    def _select(self):
+        with self._lock:
+            num = len(self._predictors)
+            start = self._next_index
+            predictor_id = min(((start + i) % num for i in range(num)), key=lambda index: self._outstanding[index])
+            self._outstanding[predictor_id] += 1
+            self._next_index = (predictor_id + 1) % num
+            return predictor_id
+
+    def _release(self, predictor_id):
+        with self._lock:
+            self._outstanding[predictor_id] -= 1
+
+    @contextlib.contextmanager
+    def acquire(self):
+        """
+        Select the least loaded replica and hold its lock, yield the replica id and the replica.
+        """
+        predictor_id = self._select()
+        try:
+            with lock_predictor(self._predictors[predictor_id]._lock):
+                yield predictor_id, self._predictors[predictor_id]
+        finally:
+            self._release(predictor_id)
+
+    def queue_depths(self):
+        """
+        Return the number of outstanding requests (running and waiting) of every replica.
+        """
+        with self._lock:
+            return list(self._outstanding)
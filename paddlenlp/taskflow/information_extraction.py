@@ -466,6 +466,7 @@ class UIETask(Task):
 
     def __init__(self, task, model, schema=None, **kwargs):
         super().__init__(task=task, model=model, **kwargs)
+        self._result_cache_state["schema"] = schema
 
         self._convert_from_torch = kwargs.get("convert_from_torch", None)
         self._max_seq_len = kwargs.get("max_seq_len", 512)
@@ -657,7 +658,10 @@ class UIETask(Task):
             raise TypeError("Invalid input format!")
         return input_list
 
-    def _single_stage_predict(self, inputs):
+    def _split_inputs(self, inputs):
+        """
+        Split the long texts into the short texts which fit the max sequence length along with the prompts.
+        """
         input_texts = [d["text"] for d in inputs]
         prompts = [d["prompt"] for d in inputs]
 
@@ -694,6 +698,15 @@ class UIETask(Task):
             short_inputs = [
                 {"text": short_input_texts[i], "prompt": short_texts_prompts[i]} for i in range(len(short_input_texts))
             ]
+        return short_inputs, short_input_texts, input_mapping
+
+    def _predict_short_inputs(self, short_inputs):
+        """
+        Run the model over the short inputs and return the span ids and probabilities of each input. The
+        inputs are fed in the order of their lengths so that the similar lengths are batched together.
+        """
+        if len(short_inputs) == 0:
+            return [], []
 
         def text_reader(inputs):
             for example in inputs:
@@ -943,8 +956,9 @@ class UIETask(Task):
                 assert len(bbox_list) == self._max_seq_len
                 yield tuple(return_list)
 
+        order = self._length_sorted_order(short_inputs, lambda x: len(x["prompt"]) + len(x["text"]))
         reader = doc_reader if self._init_class in ["UIEX"] else text_reader
-        infer_ds = load_dataset(reader, inputs=short_inputs, lazy=self._lazy_load)
+        infer_ds = load_dataset(reader, inputs=[short_inputs[i] for i in order], lazy=self._lazy_load)
         batch_sampler = paddle.io.BatchSampler(dataset=infer_ds, batch_size=self._batch_size, shuffle=False)
 
         infer_data_loader = paddle.io.DataLoader(
@@ -1012,9 +1026,35 @@ class UIETask(Task):
                 sentence_id, prob = get_id_and_prob(span_set, offset_map)
                 sentence_ids.append(sentence_id)
                 probs.append(prob)
-        results = self._convert_ids_to_results(short_inputs, sentence_ids, probs)
-        results = self._auto_joiner(results, short_input_texts, input_mapping)
-        return results
+
+        return self._restore_order(sentence_ids, order), self._restore_order(probs, order)
+
+    def _single_stage_predict(self, inputs):
+        return self._level_stage_predict([inputs])[0]
+
+    def _level_stage_predict(self, inputs_list):
+        """
+        Predict the examples of all the schema nodes at the same level of the schema tree in one pass of the
+        model, the texts are split and the results are joined for each node separately.
+
+        Args:
+            inputs_list (list): the examples of each schema node
+
+        Returns:
+            list: the results of each schema node
+        """
+        split_list = [self._split_inputs(inputs) if len(inputs) > 0 else ([], [], {}) for inputs in inputs_list]
+        short_inputs = [short_input for node_short_inputs, _, _ in split_list for short_input in node_short_inputs]
+        sentence_ids, probs = self._predict_short_inputs(short_inputs)
+
+        results_list = []
+        start = 0
+        for node_short_inputs, short_input_texts, input_mapping in split_list:
+            end = start + len(node_short_inputs)
+            results = self._convert_ids_to_results(node_short_inputs, sentence_ids[start:end], probs[start:end])
+            results_list.append(self._auto_joiner(results, short_input_texts, input_mapping))
+            start = end
+        return results_list
 
     def _auto_joiner(self, short_results, short_inputs, input_mapping):
         concat_results = []
@@ -1115,103 +1155,116 @@ class UIETask(Task):
         # Copy to stay `self._schema_tree` unchanged
         schema_list = self._schema_tree.children[:]
         while len(schema_list) > 0:
-            node = schema_list.pop(0)
-            examples = []
-            input_map = {}
-            cnt = 0
-            idx = 0
-            if not node.prefix:
-                for one_data in data:
-                    examples.append(
-                        {
-                            "text": one_data["text"],
-                            "bbox": one_data["bbox"],
-                            "image": one_data["image"],
-                            "prompt": dbc2sbc(node.name),
-                        }
-                    )
-                    input_map[cnt] = [idx]
-                    idx += 1
-                    cnt += 1
-            else:
-                for pre, one_data in zip(node.prefix, data):
-                    if len(pre) == 0:
-                        input_map[cnt] = []
-                    else:
-                        for p in pre:
-                            if self._is_en:
-                                if re.search(r"\[.*?\]$", node.name):
-                                    prompt_prefix = node.name[: node.name.find("[", 1)].strip()
-                                    cls_options = re.search(r"\[.*?\]$", node.name).group()
-                                    # Sentiment classification of xxx [positive, negative]
-                                    prompt = prompt_prefix + p + " " + cls_options
-                                else:
-                                    prompt = node.name + p
-                            else:
-                                prompt = p + node.name
-                            examples.append(
-                                {
-                                    "text": one_data["text"],
-                                    "bbox": one_data["bbox"],
-                                    "image": one_data["image"],
-                                    "prompt": dbc2sbc(prompt),
-                                }
-                            )
-                        input_map[cnt] = [i + idx for i in range(len(pre))]
-                        idx += len(pre)
-                    cnt += 1
-            if len(examples) == 0:
-                result_list = []
-            else:
-                result_list = self._single_stage_predict(examples)
+            # The nodes at the same level only depend on the results of their parents, so their examples are
+            # predicted together
+            level_nodes, schema_list = schema_list, []
+            level_examples = [self._build_node_examples(node, data) for node in level_nodes]
+            level_results = self._level_stage_predict([examples for examples, _ in level_examples])
+            for node, (_, input_map), result_list in zip(level_nodes, level_examples, level_results):
+                self._update_node_results(node, input_map, result_list, results, data)
+                schema_list.extend(node.children)
+        results = self._add_bbox_info(results, data)
+        return results
 
-            if not node.parent_relations:
-                relations = [[] for i in range(len(data))]
-                for k, v in input_map.items():
-                    for idx in v:
-                        if len(result_list[idx]) == 0:
-                            continue
-                        if node.name not in results[k].keys():
-                            results[k][node.name] = result_list[idx]
-                        else:
-                            results[k][node.name].extend(result_list[idx])
-                    if node.name in results[k].keys():
-                        relations[k].extend(results[k][node.name])
-            else:
-                relations = node.parent_relations
-                for k, v in input_map.items():
-                    for i in range(len(v)):
-                        if len(result_list[v[i]]) == 0:
-                            continue
-                        if "relations" not in relations[k][i].keys():
-                            relations[k][i]["relations"] = {node.name: result_list[v[i]]}
-                        elif node.name not in relations[k][i]["relations"].keys():
-                            relations[k][i]["relations"][node.name] = result_list[v[i]]
+    def _build_node_examples(self, node, data):
+        """
+        Build the examples of a schema node with the prompts prefixed by the results of its parent.
+        """
+        examples = []
+        input_map = {}
+        cnt = 0
+        idx = 0
+        if not node.prefix:
+            for one_data in data:
+                examples.append(
+                    {
+                        "text": one_data["text"],
+                        "bbox": one_data["bbox"],
+                        "image": one_data["image"],
+                        "prompt": dbc2sbc(node.name),
+                    }
+                )
+                input_map[cnt] = [idx]
+                idx += 1
+                cnt += 1
+        else:
+            for pre, one_data in zip(node.prefix, data):
+                if len(pre) == 0:
+                    input_map[cnt] = []
+                else:
+                    for p in pre:
+                        if self._is_en:
+                            if re.search(r"\[.*?\]$", node.name):
+                                prompt_prefix = node.name[: node.name.find("[", 1)].strip()
+                                cls_options = re.search(r"\[.*?\]$", node.name).group()
+                                # Sentiment classification of xxx [positive, negative]
+                                prompt = prompt_prefix + p + " " + cls_options
+                            else:
+                                prompt = node.name + p
                         else:
-                            relations[k][i]["relations"][node.name].extend(result_list[v[i]])
-                new_relations = [[] for i in range(len(data))]
-                for i in range(len(relations)):
-                    for j in range(len(relations[i])):
-                        if "relations" in relations[i][j].keys() and node.name in relations[i][j]["relations"].keys():
-                            for k in range(len(relations[i][j]["relations"][node.name])):
-                                new_relations[i].append(relations[i][j]["relations"][node.name][k])
-                relations = new_relations
-
-            prefix = [[] for _ in range(len(data))]
+                            prompt = p + node.name
+                        examples.append(
+                            {
+                                "text": one_data["text"],
+                                "bbox": one_data["bbox"],
+                                "image": one_data["image"],
+                                "prompt": dbc2sbc(prompt),
+                            }
+                        )
+                    input_map[cnt] = [i + idx for i in range(len(pre))]
+                    idx += len(pre)
+                cnt += 1
+        return examples, input_map
+
+    def _update_node_results(self, node, input_map, result_list, results, data):
+        """
+        Write the results of a schema node to the results of its parent, and set the prefixes and relations
+        of its children.
+        """
+        if not node.parent_relations:
+            relations = [[] for i in range(len(data))]
             for k, v in input_map.items():
                 for idx in v:
-                    for i in range(len(result_list[idx])):
-                        if self._is_en:
-                            prefix[k].append(" of " + result_list[idx][i]["text"])
-                        else:
-                            prefix[k].append(result_list[idx][i]["text"] + "的")
+                    if len(result_list[idx]) == 0:
+                        continue
+                    if node.name not in results[k].keys():
+                        results[k][node.name] = result_list[idx]
+                    else:
+                        results[k][node.name].extend(result_list[idx])
+                if node.name in results[k].keys():
+                    relations[k].extend(results[k][node.name])
+        else:
+            relations = node.parent_relations
+            for k, v in input_map.items():
+                for i in range(len(v)):
+                    if len(result_list[v[i]]) == 0:
+                        continue
+                    if "relations" not in relations[k][i].keys():
+                        relations[k][i]["relations"] = {node.name: result_list[v[i]]}
+                    elif node.name not in relations[k][i]["relations"].keys():
+                        relations[k][i]["relations"][node.name] = result_list[v[i]]
+                    else:
+                        relations[k][i]["relations"][node.name].extend(result_list[v[i]])
+            new_relations = [[] for i in range(len(data))]
+            for i in range(len(relations)):
+                for j in range(len(relations[i])):
+                    if "relations" in relations[i][j].keys() and node.name in relations[i][j]["relations"].keys():
+                        for k in range(len(relations[i][j]["relations"][node.name])):
+                            new_relations[i].append(relations[i][j]["relations"][node.name][k])
+            relations = new_relations
+
+        prefix = [[] for _ in range(len(data))]
+        for k, v in input_map.items():
+            for idx in v:
+                for i in range(len(result_list[idx])):
+                    if self._is_en:
+                        prefix[k].append(" of " + result_list[idx][i]["text"])
+                    else:
+                        prefix[k].append(result_list[idx][i]["text"] + "的")
 
-            for child in node.children:
-                child.prefix = prefix
-                child.parent_relations = relations
-                schema_list.append(child)
-        results = self._add_bbox_info(results, data)
-        return results
+        for child in node.children:
+            child.prefix = prefix
+            child.parent_relations = relations
 
     def _add_bbox_info(self, results, data):
         def _add_bbox(result, char_boxes):
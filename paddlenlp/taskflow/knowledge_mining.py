@@ -323,7 +323,9 @@ class WordTagTask(Task):
                     "seq_len": tokenized_output["seq_len"],
                 }
 
-        infer_ds = load_dataset(read, inputs=short_input_texts, lazy=self._lazy_load)
+        # The texts are batched in the order of their lengths and put back in `_run_model`
+        order = self._length_sorted_order(short_input_texts)
+        infer_ds = load_dataset(read, inputs=[short_input_texts[i] for i in order], lazy=self._lazy_load)
 
         data_collator = DataCollatorForErnieCtm(self._tokenizer, model="wordtag")
 
@@ -340,6 +342,7 @@ class WordTagTask(Task):
         outputs = {}
         outputs["data_loader"] = infer_data_loader
         outputs["short_input_texts"] = short_input_texts
+        outputs["order"] = order
         return outputs
 
     def _reset_offset(self, pred_words):
@@ -479,7 +482,7 @@ class WordTagTask(Task):
             self.predictor.run()
             pred_tags = self.output_handle[0].copy_to_cpu()
             all_pred_tags.extend(pred_tags.tolist())
-        inputs["all_pred_tags"] = all_pred_tags
+        inputs["all_pred_tags"] = self._restore_order(all_pred_tags, inputs["order"])
         return inputs
 
     def _postprocess(self, inputs):
@@ -188,7 +188,9 @@ class LacTask(Task):
                 lens = len(ids)
                 yield ids, lens
 
-        infer_ds = load_dataset(read, inputs=short_input_texts, lazy=False)
+        # The texts are batched in the order of their lengths and put back in `_run_model`
+        order = self._length_sorted_order(short_input_texts)
+        infer_ds = load_dataset(read, inputs=[short_input_texts[i] for i in order], lazy=False)
         batchify_fn = lambda samples, fn=Tuple(
             Pad(axis=0, pad_val=0, dtype="int64"),  # input_ids
             Stack(dtype="int64"),  # seq_len
@@ -204,6 +206,7 @@ class LacTask(Task):
         outputs = {}
         outputs["text"] = short_input_texts
         outputs["data_loader"] = infer_data_loader
+        outputs["order"] = order
         return outputs
 
     def _run_model(self, inputs):
@@ -221,8 +224,8 @@ class LacTask(Task):
             results.extend(tags_ids.tolist())
             lens.extend(seq_len.tolist())
 
-        inputs["result"] = results
-        inputs["lens"] = lens
+        inputs["result"] = self._restore_order(results, inputs["order"])
+        inputs["lens"] = self._restore_order(lens, inputs["order"])
         return inputs
 
     def _postprocess(self, inputs):
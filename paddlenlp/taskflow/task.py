@@ -14,8 +14,12 @@
 # limitations under the License.
 
 import abc
+import itertools
 import math
 import os
+import queue
+import threading
+import time
 from abc import abstractmethod
 from multiprocessing import cpu_count
 
@@ -24,8 +28,12 @@ from paddle.dataset.common import md5file
 
 from ..utils.env import PPNLP_HOME
 from ..utils.log import logger
+from ..utils.result_cache import ResultCache, hash_content
 from .utils import cut_chinese_sent, download_check, download_file, dygraph_mode_guard
 
+# The constructor arguments which do not change the results, so they are left out of the result cache key
+_RESULT_CACHE_IGNORED_KWARGS = ("cache_size", "cache_ttl", "cache_dir", "batch_size", "sort_by_length", "device_id")
+
 
 class Task(metaclass=abc.ABCMeta):
     """
@@ -77,6 +85,22 @@ class Task(metaclass=abc.ABCMeta):
         if not self.from_hf_hub:
             download_check(self._task_flag)
 
+        # Whether to batch the inputs of the similar lengths together to reduce the padding
+        self._sort_by_length = self.kwargs.get("sort_by_length", True)
+
+        # The optional callback `observer(stage, seconds)` to report the time of every stage
+        self._stage_observer = None
+
+        # The optional result cache keyed by the content hash of the inputs
+        self._result_cache = None
+        self._result_cache_state = {}
+        if self.kwargs.get("cache_size", 0) > 0:
+            self._result_cache = ResultCache(
+                max_size=self.kwargs["cache_size"],
+                ttl=self.kwargs.get("cache_ttl", None),
+                cache_dir=self.kwargs.get("cache_dir", None),
+            )
+
     @abstractmethod
     def _construct_model(self, model):
         """
@@ -409,6 +433,36 @@ class Task(metaclass=abc.ABCMeta):
             )
         return inputs
 
+    def _length_sorted_order(self, examples, length_fn=len):
+        """
+        Return the indices of the examples sorted by their lengths, the examples of the same length keep their
+        original order. The original order is kept for all the examples if `sort_by_length` is disabled.
+        """
+        if not self._sort_by_length:
+            return list(range(len(examples)))
+        return sorted(range(len(examples)), key=lambda i: length_fn(examples[i]))
+
+    def _length_bucketed_batches(self, examples, batch_size, length_fn=len):
+        """
+        Split the examples into the batches of the similar lengths so that less of every batch is wasted on the
+        padding. Return the batches and the indices of the batched examples, the outputs of the batches could be
+        put back to the order of the examples by `_restore_order`.
+        """
+        order = self._length_sorted_order(examples, length_fn)
+        sorted_examples = [examples[i] for i in order]
+        batches = [sorted_examples[idx : idx + batch_size] for idx in range(0, len(sorted_examples), batch_size)]
+        return batches, order
+
+    @staticmethod
+    def _restore_order(outputs, order):
+        """
+        Put the outputs of the length sorted examples back to the order of the examples.
+        """
+        restored_outputs = [None] * len(order)
+        for i, output in zip(order, outputs):
+            restored_outputs[i] = output
+        return restored_outputs
+
     def _auto_splitter(self, input_texts, max_text_len, bbox_list=None, split_sentence=False):
         """
         Split the raw texts automatically for model inference.
@@ -522,8 +576,126 @@ class Task(metaclass=abc.ABCMeta):
         """
         print("Examples:\n{}".format(self._usage))
 
+    def cache_stats(self):
+        """
+        Return the hit/miss counters of the result cache, None if the cache is disabled.
+        """
+        if self._result_cache is None:
+            return None
+        return self._result_cache.stats()
+
+    def _run_stage(self, stage, fn, inputs):
+        if self._stage_observer is None:
+            return fn(inputs)
+        start = time.perf_counter()
+        outputs = fn(inputs)
+        self._stage_observer(stage, time.perf_counter() - start)
+        return outputs
+
+    def stream(self, inputs, chunk_size=None, queue_size=2):
+        """
+        Yield the result of every input of the iterable `inputs` as soon as it is ready. The inputs are consumed
+        in chunks of `chunk_size`, the pre-processing and the inference of the chunks run in two background
+        threads and the post-processing runs in the caller, the stages are connected by the queues holding at
+        most `queue_size` chunks, so the memory is bounded no matter how many inputs there are.
+
+        Args:
+            inputs (iterable): The inputs of the task, such as a file object yielding the lines.
+            chunk_size (int, optional): The number of the inputs processed together. Defaults to 16 times the
+                batch size of the task.
+            queue_size (int, optional): The max number of the chunks waiting between two stages. Defaults to 2.
+        """
+        if chunk_size is None:
+            chunk_size = max(getattr(self, "_batch_size", 1), 1) * 16
+        if chunk_size < 1:
+            raise ValueError("The `chunk_size` of the stream must be positive, but received {}.".format(chunk_size))
+
+        preprocessed = queue.Queue(maxsize=queue_size)
+        inferred = queue.Queue(maxsize=queue_size)
+        stop_event = threading.Event()
+        end_of_stream = object()
+
+        def put(q, item):
+            # Give up when the consumer has stopped so that the thread never blocks forever
+            while not stop_event.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def get(q):
+            while not stop_event.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return end_of_stream
+
+        def preprocess_worker():
+            try:
+                iterator = iter(inputs)
+                while not stop_event.is_set():
+                    chunk = list(itertools.islice(iterator, chunk_size))
+                    if len(chunk) == 0:
+                        break
+                    # The inputs are wrapped in a tuple the same as the arguments of `Taskflow.__call__`
+                    if not put(preprocessed, self._run_stage("preprocess", self._preprocess, (chunk,))):
+                        return
+                put(preprocessed, end_of_stream)
+            except Exception as e:
+                put(preprocessed, e)
+
+        def inference_worker():
+            try:
+                while True:
+                    item = get(preprocessed)
+                    if item is end_of_stream or isinstance(item, Exception):
+                        put(inferred, item)
+                        return
+                    if not put(inferred, self._run_stage("inference", self._run_model, item)):
+                        return
+            except Exception as e:
+                put(inferred, e)
+
+        workers = [
+            threading.Thread(target=preprocess_worker, daemon=True),
+            threading.Thread(target=inference_worker, daemon=True),
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            while True:
+                item = get(inferred)
+                if item is end_of_stream:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                results = self._run_stage("postprocess", self._postprocess, item)
+                if isinstance(results, list):
+                    yield from results
+                else:
+                    yield results
+        finally:
+            stop_event.set()
+            for worker in workers:
+                worker.join()
+
     def __call__(self, *args):
-        inputs = self._preprocess(*args)
-        outputs = self._run_model(inputs)
-        results = self._postprocess(outputs)
+        if self._result_cache is not None:
+            cache_kwargs = {
+                key: value for key, value in self.kwargs.items() if key not in _RESULT_CACHE_IGNORED_KWARGS
+            }
+            cache_key = hash_content(
+                self.task, self.model, self._task_path, cache_kwargs, self._result_cache_state, args
+            )
+            hit, results = self._result_cache.get(cache_key)
+            if hit:
+                return results
+        inputs = self._run_stage("preprocess", lambda args: self._preprocess(*args), args)
+        outputs = self._run_stage("inference", self._run_model, inputs)
+        results = self._run_stage("postprocess", self._postprocess, outputs)
+        if self._result_cache is not None:
+            self._result_cache.put(cache_key, results)
         return results
@@ -33,6 +33,7 @@ from .pos_tagging import POSTaggingTask
 from .question_answering import QuestionAnsweringTask
 from .question_generation import QuestionGenerationTask
 from .sentiment_analysis import SentaTask, SkepTask, UIESentaTask
+from .task import _RESULT_CACHE_IGNORED_KWARGS
 from .text2text_generation import ChatGLMTask
 from .text_classification import TextClassificationTask
 from .text_correction import CSCTask
@@ -757,7 +758,10 @@ class Taskflow(object):
         mode (str, optional): Select the mode of the task, only used in the tasks of word_segmentation and ner.
             If set None, will use the default mode.
         device_id (int, optional): The device id for the gpu, xpu and other devices, the defalut value is 0.
-        kwargs (dict, optional): Additional keyword arguments passed along to the specific task.
+        kwargs (dict, optional): Additional keyword arguments passed along to the specific task. The result cache
+            is enabled by `cache_size` (the max number of cached calls), `cache_ttl` (the seconds a result keeps
+            valid) and `cache_dir` (the directory of the optional on-disk cache). The inputs are batched in the
+            order of their lengths to reduce the padding unless `sort_by_length` is set to False.
 
     """
 
@@ -799,6 +803,10 @@ class Taskflow(object):
         self.task_instance = task_class(
             model=self.model, task=self.task, priority_path=self.priority_path, from_hf_hub=from_hf_hub, **self.kwargs
         )
+        # The arguments bound by the task classes, such as `schema`, are not kept in `Task.kwargs`
+        self.task_instance._result_cache_state["init_kwargs"] = {
+            key: value for key, value in self.kwargs.items() if key not in _RESULT_CACHE_IGNORED_KWARGS
+        }
         task_list = TASKS.keys()
         Taskflow.task_list = task_list
 
@@ -832,6 +840,36 @@ class Taskflow(object):
         task_list = list(TASKS.keys())
         return task_list
 
+    def stream_generate(self, *inputs):
+        """
+        Yield the generated text step by step, only supported by the generation tasks in the dygraph mode.
+        """
+        if not hasattr(self.task_instance, "stream_generate"):
+            raise NotImplementedError("The task {} does not support the streaming generation.".format(self.task))
+        return self.task_instance.stream_generate(*inputs)
+
+    def stream(self, inputs, chunk_size=None, queue_size=2):
+        """
+        Yield the results of an iterable of inputs incrementally, the pre-processing, the inference and the
+        post-processing of the consecutive chunks of the inputs are overlapped. See `Task.stream` for the details.
+        """
+        return self.task_instance.stream(inputs, chunk_size=chunk_size, queue_size=queue_size)
+
+    def similarity_matrix(self, texts1, texts2=None):
+        """
+        Return the similarity matrix between two lists of texts, only supported by the text similarity task with
+        the bi-encoder models. See `TextSimilarityTask.similarity_matrix` for the details.
+        """
+        if not hasattr(self.task_instance, "similarity_matrix"):
+            raise NotImplementedError("The task {} does not support the similarity matrix.".format(self.task))
+        return self.task_instance.similarity_matrix(texts1, texts2)
+
+    def cache_stats(self):
+        """
+        Return the hit/miss counters of the result cache, None if the cache is disabled.
+        """
+        return self.task_instance.cache_stats()
+
     def from_segments(self, *inputs):
         results = self.task_instance.from_segments(inputs)
         return results
@@ -850,6 +888,7 @@ class Taskflow(object):
             self.task_instance.model in support_schema_list
         ), "This method can only be used by the task based on the model of uie or wordtag."
         self.task_instance.set_schema(schema)
+        self.task_instance._result_cache_state["schema"] = schema
 
     def set_argument(self, argument):
         assert self.task_instance.model in support_argument_list, (
@@ -857,3 +896,4 @@ class Taskflow(object):
             "or zero-text-classification."
         )
         self.task_instance.set_argument(argument)
+        self.task_instance._result_cache_state["argument"] = argument
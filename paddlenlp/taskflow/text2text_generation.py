@@ -12,9 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
+
 import paddle
 
 from ..transformers import ChatGLMForConditionalGeneration, ChatGLMTokenizer
+from ..transformers.generation_utils import TextIteratorStreamer
 from ..utils.log import logger
 from .task import Task
 from .utils import static_mode_guard
@@ -230,6 +233,63 @@ class ChatGLMTask(Task):
         out_dict = {"result": result}
         return out_dict
 
+    def stream_generate(self, text):
+        """
+        Generate the response of the text and yield the new text as soon as it is decoded.
+        """
+        if self._static_mode:
+            raise ValueError("The streaming generation is only supported in the dygraph mode.")
+        if isinstance(text, (list, tuple)):
+            if len(text) != 1:
+                raise ValueError("The streaming generation only supports one text, but received {}.".format(len(text)))
+            text = text[0]
+        if not (isinstance(text, str) and len(text) > 0):
+            raise TypeError("Invalid inputs, input text should be a non-empty str.")
+        if self._num_return_sequences != 1:
+            raise ValueError("The streaming generation only supports `num_return_sequences` equal to 1.")
+
+        inputs = self._tokenizer(
+            [text],
+            return_tensors="pd",
+            padding=True,
+            max_length=self._max_seq_length,
+            truncation=True,
+            truncation_side="left",
+        )
+        streamer = TextIteratorStreamer(self._tokenizer, skip_special_tokens=True)
+        generate_kwargs = dict(
+            **inputs,
+            decode_strategy=self._decode_strategy,
+            top_k=self._top_k,
+            top_p=self._top_p,
+            temperature=self._temperature,
+            max_length=self._tgt_length,
+            bos_token_id=self._tokenizer.bos_token_id,
+            eos_token_id=self._tokenizer.eos_token_id,
+            pad_token_id=self._tokenizer.pad_token_id,
+            use_cache=True,
+            streamer=streamer,
+        )
+        errors = []
+
+        def _generate():
+            try:
+                self._model.generate(**generate_kwargs)
+            except Exception as e:
+                errors.append(e)
+                streamer.end()
+
+        thread = threading.Thread(target=_generate, daemon=True)
+        thread.start()
+        try:
+            for new_text in streamer:
+                yield new_text
+        finally:
+            # The model could not be used by others until the generation finished
+            thread.join()
+        if errors:
+            raise errors[0]
+
     def set_argument(self, argument: dict):
         for k, v in argument.items():
             if k == "input":
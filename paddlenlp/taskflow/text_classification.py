@@ -261,7 +261,9 @@ class TextClassificationTask(Task):
         if self.model == "finetune":
             collator = DataCollatorWithPadding(self._tokenizer, return_tensors="np")
             tokenized_inputs = [self._tokenizer(i, max_length=self._max_length, truncation=True) for i in inputs]
-            batches = [tokenized_inputs[idx : idx + batch_size] for idx in range(0, len(tokenized_inputs), batch_size)]
+            batches, order = self._length_bucketed_batches(
+                tokenized_inputs, batch_size, length_fn=lambda x: len(x["input_ids"])
+            )
         elif self.model == "prompt":
             collator = PromptDataCollatorWithPadding(
                 self._tokenizer, padding=True, return_tensors="np", return_attention_mask=True
@@ -271,13 +273,16 @@ class TextClassificationTask(Task):
                 if "text" in part:
                     part_text = part["text"]
             template_inputs = [self._template({part_text: x}) for x in inputs]
-            batches = [template_inputs[idx : idx + batch_size] for idx in range(0, len(template_inputs), batch_size)]
+            batches, order = self._length_bucketed_batches(
+                template_inputs, batch_size, length_fn=lambda x: len(x["input_ids"])
+            )
         else:
             raise NotImplementedError(
                 f"'{self.model}' is not a supported model_type. Please select among ['finetune', 'prompt']"
             )
         outputs = {}
         outputs["text"] = inputs
+        outputs["order"] = order
         outputs["batches"] = [collator(batch) for batch in batches]
 
         return outputs
@@ -289,6 +294,7 @@ class TextClassificationTask(Task):
         # TODO: support hierachical classification
         outputs = {}
         outputs["text"] = inputs["text"]
+        outputs["order"] = inputs["order"]
         outputs["batch_logits"] = []
         dtype_dict = {
             "input_ids": "int64",
@@ -364,6 +370,7 @@ class TextClassificationTask(Task):
                 raise NotImplementedError(
                     f"'{self.problem_type}' is not a supported problem type. Please select among ['multi_class', 'multi_label']"
                 )
+        postprocessed_outputs = self._restore_order(postprocessed_outputs, inputs["order"])
         for i, postprocessed_output in enumerate(postprocessed_outputs):
             postprocessed_output["text"] = inputs["text"][i]
         return postprocessed_outputs
@@ -223,7 +223,7 @@ class TextFeatureExtractionTask(Task):
                 tokenized_inputs = self._tokenizer(
                     text=[""] * len(batch_examples),
                     text_pair=batch_examples,
-                    padding="max_length",
+                    padding=True,
                     truncation=True,
                     max_seq_len=self.max_seq_len,
                 )
@@ -231,7 +231,7 @@ class TextFeatureExtractionTask(Task):
                 tokenized_inputs = self._tokenizer(
                     text=[""] * len(batch_examples),
                     text_pair=batch_examples,
-                    padding="max_length",
+                    padding=True,
                     truncation=True,
                     max_seq_len=self.max_seq_len,
                 )
@@ -254,8 +254,10 @@ class TextFeatureExtractionTask(Task):
            2) Generate the other model inputs from the raw text/image and token ids/pixel_values.
         """
         inputs = self._check_input_text(inputs)
-        batches = self._batchify(inputs, self._batch_size)
-        outputs = {"batches": batches, "inputs": inputs}
+        # The inputs are batched in the order of their lengths and put back in `_postprocess`
+        order = self._length_sorted_order(inputs, text_length)
+        batches = self._batchify([inputs[i] for i in order], self._batch_size)
+        outputs = {"batches": batches, "inputs": inputs, "order": order}
         return outputs
 
     def _run_model(self, inputs):
@@ -296,6 +298,7 @@ class TextFeatureExtractionTask(Task):
 
     def _postprocess(self, inputs):
         inputs["features"] = np.concatenate(inputs["features"], axis=0)
+        inputs["features"] = inputs["features"][np.argsort(inputs["order"])]
         if self.return_tensors == "pd":
             inputs["features"] = paddle.to_tensor(inputs["features"])
         return inputs
@@ -429,10 +432,8 @@ class SentenceFeatureExtractionTask(Task):
 
         # Seperates data into some batches.
         one_batch = []
-        self.length_sorted_idx = np.argsort([-text_length(sen) for sen in data])
-        sentences_sorted = [data[idx] for idx in self.length_sorted_idx]
-        for example in range(len(sentences_sorted)):
-            one_batch.append(sentences_sorted[example])
+        for example in data:
+            one_batch.append(example)
             if len(one_batch) == batch_size:
                 yield _parse_batch(one_batch)
                 one_batch = []
@@ -446,8 +447,10 @@ class SentenceFeatureExtractionTask(Task):
            2) Generate the other model inputs from the raw text/image and token ids/pixel_values.
         """
         inputs = self._check_input_text(inputs)
-        batches = self._batchify(inputs, self._batch_size)
-        outputs = {"batches": batches, "inputs": inputs}
+        # The inputs are batched in the order of their lengths and put back in `_postprocess`
+        order = self._length_sorted_order(inputs, text_length)
+        batches = self._batchify([inputs[i] for i in order], self._batch_size)
+        outputs = {"batches": batches, "inputs": inputs, "order": order}
         return outputs
 
     def _run_model(self, inputs):
@@ -560,7 +563,7 @@ class SentenceFeatureExtractionTask(Task):
 
     def _postprocess(self, inputs):
         inputs["features"] = np.concatenate(inputs["features"], axis=0)
-        inputs["features"] = [inputs["features"][idx] for idx in np.argsort(self.length_sorted_idx)]
+        inputs["features"] = [inputs["features"][idx] for idx in np.argsort(inputs["order"])]
 
         if self.return_tensors == "pd":
             inputs["features"] = paddle.to_tensor(inputs["features"])
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import numpy as np
 import paddle
 
 from paddlenlp.transformers import AutoModel, AutoTokenizer
@@ -19,6 +20,7 @@ from paddlenlp.transformers import AutoModel, AutoTokenizer
 from ..data import Pad, Tuple
 from ..transformers import ErnieCrossEncoder, ErnieTokenizer
 from ..utils.log import logger
+from ..utils.result_cache import ResultCache
 from .task import Task
 from .utils import static_mode_guard
 
@@ -36,6 +38,9 @@ usage = r"""
          '''
          [{'text1': '光眼睛大就好看吗', 'text2': '眼睛好看吗？', 'similarity': 0.74502707}, {'text1': '小蝌蚪找妈妈怎么样', 'text2': '小蝌蚪找妈妈是谁画的', 'similarity': 0.8192149}]
          '''
+
+         # The similarities between one text and many texts, a numpy array of shape [1, 2]
+         similarity.similarity_matrix(["世界上什么东西最小"], ["世界上什么东西最小？", "眼睛好看吗？"])
          """
 MATCH_TYPE = {
     "rocketqa-zh-dureader-cross-encoder": "matching",
@@ -180,6 +185,13 @@ class TextSimilarityTask(Task):
         self._max_length = max_length
         self._usage = usage
         self.model_name = model
+        self._batchify_fn = lambda samples, fn=Tuple(  # noqa: E731
+            Pad(axis=0, pad_val=self._tokenizer.pad_token_id, dtype="int64"),  # input ids
+            Pad(axis=0, pad_val=self._tokenizer.pad_token_type_id, dtype="int64"),  # token type ids
+        ): [data for data in fn(samples)]
+        # The embeddings of the texts are cached across the calls of the bi-encoder models
+        embedding_cache_size = self.kwargs.get("embedding_cache_size", 10000)
+        self._embedding_cache = ResultCache(max_size=embedding_cache_size) if embedding_cache_size > 0 else None
 
     def _construct_input_spec(self):
         """
@@ -226,45 +238,69 @@ class TextSimilarityTask(Task):
         """
         inputs = self._check_input_text(inputs)
 
-        examples = []
-        for data in inputs:
-            text1, text2 = data[0], data[1]
-            if "rocketqa" in self.model_name or "ernie-search" in self.model_name:
+        if "rocketqa" in self.model_name or "ernie-search" in self.model_name:
+            examples = []
+            for data in inputs:
+                text1, text2 = data[0], data[1]
                 # Todo: wugaosheng, Add erine-search encoding support
                 encoded_inputs = self._tokenizer(text=text1, text_pair=text2, max_length=self._max_length)
-                ids = encoded_inputs["input_ids"]
-                segment_ids = encoded_inputs["token_type_ids"]
-                examples.append((ids, segment_ids))
-            else:
-                text1_encoded_inputs = self._tokenizer(text=text1, max_length=self._max_length)
-                text1_input_ids = text1_encoded_inputs["input_ids"]
-                text1_token_type_ids = text1_encoded_inputs["token_type_ids"]
+                examples.append((encoded_inputs["input_ids"], encoded_inputs["token_type_ids"]))
+            batches, order = self._length_bucketed_batches(
+                examples, self._batch_size, length_fn=lambda example: len(example[0])
+            )
+            outputs = {}
+            outputs["data_loader"] = batches
+            outputs["order"] = order
+        else:
+            # The bi-encoder encodes every unique text once no matter how many pairs it appears in
+            outputs = self._preprocess_texts([text for data in inputs for text in data])
+        outputs["text"] = inputs
+        return outputs
 
-                text2_encoded_inputs = self._tokenizer(text=text2, max_length=self._max_length)
-                text2_input_ids = text2_encoded_inputs["input_ids"]
-                text2_token_type_ids = text2_encoded_inputs["token_type_ids"]
+    def _preprocess_texts(self, texts):
+        """
+        Tokenize the unique texts whose embeddings are not cached, and batch them in the order of their lengths.
+        """
+        embeddings = {}
+        uncached_texts = []
+        for text in dict.fromkeys(texts):
+            if self._embedding_cache is not None:
+                hit, embedding = self._embedding_cache.get(text)
+                if hit:
+                    embeddings[text] = embedding
+                    continue
+            uncached_texts.append(text)
 
-                examples.append((text1_input_ids, text1_token_type_ids, text2_input_ids, text2_token_type_ids))
+        examples = []
+        for text in uncached_texts:
+            encoded_inputs = self._tokenizer(text=text, max_length=self._max_length)
+            examples.append((encoded_inputs["input_ids"], encoded_inputs["token_type_ids"]))
+        batches, order = self._length_bucketed_batches(
+            examples, self._batch_size, length_fn=lambda example: len(example[0])
+        )
+        return {"texts": uncached_texts, "data_loader": batches, "order": order, "embeddings": embeddings}
 
-        batches = [examples[idx : idx + self._batch_size] for idx in range(0, len(examples), self._batch_size)]
-        if "rocketqa" in self.model_name or "ernie-search" in self.model_name:
-            batchify_fn = lambda samples, fn=Tuple(  # noqa: E731
-                Pad(axis=0, pad_val=self._tokenizer.pad_token_id, dtype="int64"),  # input ids
-                Pad(axis=0, pad_val=self._tokenizer.pad_token_type_id, dtype="int64"),  # token type ids
-            ): [data for data in fn(samples)]
-        else:
-            batchify_fn = lambda samples, fn=Tuple(  # noqa: E731
-                Pad(axis=0, pad_val=self._tokenizer.pad_token_id, dtype="int64"),  # text1_input_ids
-                Pad(axis=0, pad_val=self._tokenizer.pad_token_type_id, dtype="int64"),  # text1_token_type_ids
-                Pad(axis=0, pad_val=self._tokenizer.pad_token_id, dtype="int64"),  # text2_input_ids
-                Pad(axis=0, pad_val=self._tokenizer.pad_token_type_id, dtype="int64"),  # text2_token_type_ids
-            ): [data for data in fn(samples)]
+    def _encode_texts(self, inputs):
+        """
+        Encode the texts tokenized by `_preprocess_texts` into the normalized embeddings, and return the
+        embeddings of all the texts including the cached ones.
+        """
+        vecs = []
+        with static_mode_guard():
+            for batch in inputs["data_loader"]:
+                input_ids, segment_ids = self._batchify_fn(batch)
+                self.input_handles[0].copy_from_cpu(input_ids)
+                self.input_handles[1].copy_from_cpu(segment_ids)
+                self.predictor.run()
+                vecs.extend(self.output_handle[1].copy_to_cpu())
 
-        outputs = {}
-        outputs["data_loader"] = batches
-        outputs["text"] = inputs
-        self._batchify_fn = batchify_fn
-        return outputs
+        embeddings = dict(inputs["embeddings"])
+        for text, vec in zip(inputs["texts"], self._restore_order(vecs, inputs["order"])):
+            vec = vec / (vec**2).sum() ** 0.5
+            embeddings[text] = vec
+            if self._embedding_cache is not None:
+                self._embedding_cache.put(text, vec)
+        return embeddings
 
     def _run_model(self, inputs):
         """
@@ -290,27 +326,34 @@ class TextSimilarityTask(Task):
                         input_dict["token_type_ids"] = segment_ids
                         scores = self.predictor.run(None, input_dict)[0].tolist()
                         results.extend(scores)
+            results = self._restore_order(results, inputs["order"])
         else:
-            with static_mode_guard():
-                for batch in inputs["data_loader"]:
-                    text1_ids, text1_segment_ids, text2_ids, text2_segment_ids = self._batchify_fn(batch)
-                    self.input_handles[0].copy_from_cpu(text1_ids)
-                    self.input_handles[1].copy_from_cpu(text1_segment_ids)
-                    self.predictor.run()
-                    vecs_text1 = self.output_handle[1].copy_to_cpu()
-
-                    self.input_handles[0].copy_from_cpu(text2_ids)
-                    self.input_handles[1].copy_from_cpu(text2_segment_ids)
-                    self.predictor.run()
-                    vecs_text2 = self.output_handle[1].copy_to_cpu()
-
-                    vecs_text1 = vecs_text1 / (vecs_text1**2).sum(axis=1, keepdims=True) ** 0.5
-                    vecs_text2 = vecs_text2 / (vecs_text2**2).sum(axis=1, keepdims=True) ** 0.5
-                    similarity = (vecs_text1 * vecs_text2).sum(axis=1)
-                    results.extend(similarity)
+            embeddings = self._encode_texts(inputs)
+            for text1, text2 in inputs["text"]:
+                results.append((embeddings[text1] * embeddings[text2]).sum())
         inputs["result"] = results
         return inputs
 
+    def similarity_matrix(self, texts1, texts2=None):
+        """
+        Return the similarity matrix of shape `[len(texts1), len(texts2)]` between every text of `texts1` and
+        every text of `texts2`, or between the texts of `texts1` themselves if `texts2` is None. Every unique
+        text is encoded once and the similarities are computed by a single matrix product, so it is only
+        supported by the bi-encoder models.
+        """
+        if "rocketqa" in self.model_name or "ernie-search" in self.model_name:
+            raise NotImplementedError(
+                "The similarity matrix is only supported by the bi-encoder models, but {} is a cross-encoder.".format(
+                    self.model_name
+                )
+            )
+        texts1 = list(texts1)
+        texts2 = texts1 if texts2 is None else list(texts2)
+        embeddings = self._encode_texts(self._preprocess_texts(texts1 + texts2))
+        matrix1 = np.stack([embeddings[text] for text in texts1])
+        matrix2 = np.stack([embeddings[text] for text in texts2])
+        return np.matmul(matrix1, matrix2.T)
+
     def _postprocess(self, inputs):
         """
         The model output is tag ids, this function will convert the model output to raw text.
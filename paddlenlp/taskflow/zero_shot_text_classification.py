@@ -359,12 +359,14 @@ class ZeroShotTextClassificationTask(Task):
         inputs = self._check_input_text(inputs)
         # Get the config from the kwargs
         tokenized_inputs = [self._template(i) for i in inputs]
-        batches = [
-            tokenized_inputs[idx : idx + self._batch_size] for idx in range(0, len(tokenized_inputs), self._batch_size)
-        ]
+        batches, order = self._length_bucketed_batches(
+            tokenized_inputs, self._batch_size, length_fn=lambda x: len(x["input_ids"])
+        )
+        inputs = [inputs[i] for i in order]
         inputs = [inputs[idx : idx + self._batch_size] for idx in range(0, len(inputs), self._batch_size)]
         outputs = {}
         outputs["text"] = inputs
+        outputs["order"] = order
         outputs["batches"] = [self._collator(batch) for batch in batches]
 
         return outputs
@@ -372,6 +374,7 @@ class ZeroShotTextClassificationTask(Task):
     def _run_model(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         outputs = {}
         outputs["text"] = inputs["text"]
+        outputs["order"] = inputs["order"]
         outputs["batch_logits"] = []
         dtype_dict = {
             "input_ids": "int64",
@@ -424,4 +427,4 @@ class ZeroShotTextClassificationTask(Task):
                             output["predictions"].append({"label": text["choices"][i], "score": class_score})
                 outputs.append(output)
 
-        return outputs
+        return self._restore_order(outputs, inputs["order"])
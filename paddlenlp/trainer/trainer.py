@@ -44,7 +44,13 @@ from paddle.distributed.fleet.utils.hybrid_parallel_util import (
 from paddle.io import DataLoader, Dataset, DistributedBatchSampler
 from tqdm.auto import tqdm
 
-from ..data import DataCollator, DataCollatorWithPadding, default_data_collator
+from ..data import (
+    DataCollator,
+    DataCollatorWithPadding,
+    LengthGroupedBatchSampler,
+    default_data_collator,
+)
+from ..metrics.streaming import StreamingMetric
 from ..peft import LoRAModel, PrefixModelForCausalLM
 from ..transformers.model_utils import (
     PretrainedModel,
@@ -86,9 +92,15 @@ from .trainer_utils import (  # set_hyrbid_parallel_seed,
     speed_metrics,
 )
 from .training_args import TrainingArguments
+from .utils.async_save import (
+    ASYNC_SAVE_TMP_PREFIX,
+    AsyncCheckpointSaver,
+    copy_to_host,
+    finalize_checkpoint,
+)
 from .utils.helper import (  # nested_truncate,
+    NestedArrayAccumulator,
     distributed_concat,
-    nested_concat,
     nested_detach,
     nested_numpify,
     nested_truncate,
@@ -162,7 +174,8 @@ class Trainer:
             interrupted training or reuse the fine-tuned model.
         compute_metrics (`Callable[[EvalPrediction], Dict]`, *optional*):
             The function that will be used to compute metrics at evaluation. Must take a [`EvalPrediction`] and return
-            a dictionary string to metric values.
+            a dictionary string to metric values. It could also be a [`~metrics.StreamingMetric`], which is updated
+            with the predictions of every step in `evaluate`, so that the predictions are not retained.
         callbacks (List of [`TrainerCallback`], *optional*):
             A list of callbacks to customize the training loop. Will add those to the list of default callbacks.
             If you want to remove one of the default callbacks used, use the [`Trainer.remove_callback`] method.
@@ -256,6 +269,10 @@ class Trainer:
         #     self.label_smoother = LabelSmoother(epsilon=self.args.label_smoothing_factor)
         # else:
         self.label_smoother = None
+        # The checkpoints are written by a background thread in async save mode
+        self._async_saver = AsyncCheckpointSaver() if args.async_save else None
+        self._async_save_jobs = None
+        self._pending_checkpoint = None
         self.state = TrainerState()
         self.control = TrainerControl()
         self._signature_columns = None
@@ -649,6 +666,14 @@ class Trainer:
                 train_dataloader.batch_sampler, DistributedBatchSampler
             ):
                 train_dataloader.batch_sampler.set_epoch(epoch)
+            elif isinstance(train_dataloader, paddle.io.DataLoader) and isinstance(
+                train_dataloader.batch_sampler, LengthGroupedBatchSampler
+            ):
+                # The sampler skips the batches already trained in the resumed epoch
+                consumed_samples = 0
+                if epoch == epochs_trained:
+                    consumed_samples = steps_trained_in_current_epoch * args.train_batch_size * args.dataset_world_size
+                train_dataloader.batch_sampler.set_epoch(epoch, consumed_samples=consumed_samples)
 
             step = -1
             self.control = self.callback_handler.on_epoch_begin(args, self.state, self.control)
@@ -656,12 +681,12 @@ class Trainer:
             for step, inputs in enumerate(epoch_iterator):
                 self.callback_handler.on_load_data_end(args, self.state, self.control, inputs=inputs)
                 # Skip past any already trained steps if resuming training
-                # for paddlenlp.utils.batch_sampler.DistributedBatchSampler
+                # for paddlenlp.utils.batch_sampler.DistributedBatchSampler and LengthGroupedBatchSampler
                 # We use consumed_samples to reset the status
                 if isinstance(train_dataloader, paddle.io.DataLoader) and isinstance(
-                    train_dataloader.batch_sampler, NlpDistributedBatchSampler
+                    train_dataloader.batch_sampler, (NlpDistributedBatchSampler, LengthGroupedBatchSampler)
                 ):
-                    if step == 0:
+                    if step == 0 and epoch == epochs_trained:
                         if steps_trained_progress_bar is not None:
                             steps_trained_progress_bar.update(steps_trained_in_current_epoch)
                             steps_trained_progress_bar.close()
@@ -780,6 +805,7 @@ class Trainer:
                     self.state.epoch = epoch + (step + 1) / steps_in_epoch
 
                     self.control = self.callback_handler.on_step_end(args, self.state, self.control)
+                    self._maybe_finalize_async_checkpoint()
                     self._maybe_log_save_evaluate(tr_loss, model, epoch, ignore_keys_for_eval, inputs=inputs)
                 else:
                     self.control = self.callback_handler.on_substep_end(args, self.state, self.control)
@@ -794,6 +820,8 @@ class Trainer:
                     f" num_steps ({self.state.max_steps}) higher than the number of available samples."
                 )
                 self.control.should_training_stop = True
+            # The trained steps are only skipped in the resumed epoch
+            steps_trained_in_current_epoch = 0
 
             self.control = self.callback_handler.on_epoch_end(args, self.state, self.control)
             self._maybe_log_save_evaluate(tr_loss, model, epoch, ignore_keys_for_eval, inputs=inputs)
@@ -806,6 +834,7 @@ class Trainer:
             delattr(self, "_past")
 
         logger.info("\nTraining completed. \n")
+        self._finalize_async_checkpoint()
         if args.load_best_model_at_end and self.state.best_model_checkpoint is not None:
             if args.local_rank != -1:
                 dist.barrier()
@@ -854,6 +883,18 @@ class Trainer:
         if self.train_dataset is None or not has_length(self.train_dataset):
             return None
 
+        if self.args.group_by_length or self.args.max_tokens_per_batch is not None:
+            return LengthGroupedBatchSampler(
+                self.train_dataset,
+                batch_size=self.args.per_device_train_batch_size,
+                length_column_name=self.args.length_column_name,
+                max_tokens=self.args.max_tokens_per_batch,
+                num_replicas=self.args.dataset_world_size,
+                rank=self.args.dataset_rank,
+                drop_last=self.args.dataloader_drop_last,
+                seed=self.args.seed,
+            )
+
         if self.args.world_size <= 1:
             return paddle.io.BatchSampler(
                 dataset=self.train_dataset,
@@ -877,52 +918,54 @@ class Trainer:
 
     def _maybe_log_save_evaluate(self, tr_loss, model, epoch, ignore_keys_for_eval, **kwargs):
         if self.control.should_log:
+            with self._phase("log"):
+                logs: Dict[str, float] = {}
 
-            logs: Dict[str, float] = {}
-
-            # all_gather + mean() to get average loss over all processes
-            tr_loss_scalar = self._nested_gather(tr_loss).mean().item()
+                # all_gather + mean() to get average loss over all processes
+                tr_loss_scalar = self._nested_gather(tr_loss).mean().item()
 
-            # reset tr_loss to zero
-            tr_loss.subtract_(tr_loss)
+                # reset tr_loss to zero
+                tr_loss.subtract_(tr_loss)
 
-            logs["loss"] = round(tr_loss_scalar / (self.state.global_step - self._globalstep_last_logged), 8)
-            logs["learning_rate"] = float("{0:.3e}".format(self._get_learning_rate()))
-            logs["global_step"] = int(self.state.global_step)
+                logs["loss"] = round(tr_loss_scalar / (self.state.global_step - self._globalstep_last_logged), 8)
+                logs["learning_rate"] = float("{0:.3e}".format(self._get_learning_rate()))
+                logs["global_step"] = int(self.state.global_step)
 
-            total_train_batch_size = (
-                self.args.train_batch_size * self.args.gradient_accumulation_steps * self.args.dataset_world_size
-            )
-            num_steps = self.state.global_step - self._globalstep_last_logged
-            logs.update(
-                speed_metrics(
-                    "interval",
-                    self._globalstep_last_start_time,
-                    num_samples=total_train_batch_size * num_steps,
-                    num_steps=num_steps,
+                total_train_batch_size = (
+                    self.args.train_batch_size * self.args.gradient_accumulation_steps * self.args.dataset_world_size
+                )
+                num_steps = self.state.global_step - self._globalstep_last_logged
+                logs.update(
+                    speed_metrics(
+                        "interval",
+                        self._globalstep_last_start_time,
+                        num_samples=total_train_batch_size * num_steps,
+                        num_steps=num_steps,
+                    )
                 )
-            )
 
-            self._total_loss_scalar += tr_loss_scalar
-            self._globalstep_last_logged = self.state.global_step
-            self._globalstep_last_start_time = time.time()
+                self._total_loss_scalar += tr_loss_scalar
+                self._globalstep_last_logged = self.state.global_step
+                self._globalstep_last_start_time = time.time()
 
-            self.log(logs, **kwargs)
+                self.log(logs, **kwargs)
 
         metrics = None
         if self.control.should_evaluate:
-            if isinstance(self.eval_dataset, dict):
-                for eval_dataset_name, eval_dataset in self.eval_dataset.items():
-                    metrics = self.evaluate(
-                        eval_dataset=eval_dataset,
-                        ignore_keys=ignore_keys_for_eval,
-                        metric_key_prefix=f"eval_{eval_dataset_name}",
-                    )
-            else:
-                metrics = self.evaluate(ignore_keys=ignore_keys_for_eval)
+            with self._phase("evaluate"):
+                if isinstance(self.eval_dataset, dict):
+                    for eval_dataset_name, eval_dataset in self.eval_dataset.items():
+                        metrics = self.evaluate(
+                            eval_dataset=eval_dataset,
+                            ignore_keys=ignore_keys_for_eval,
+                            metric_key_prefix=f"eval_{eval_dataset_name}",
+                        )
+                else:
+                    metrics = self.evaluate(ignore_keys=ignore_keys_for_eval)
 
         if self.control.should_save:
-            self._save_checkpoint(model, metrics=metrics)
+            with self._phase("save"):
+                self._save_checkpoint(model, metrics=metrics)
             self.control = self.callback_handler.on_save(self.args, self.state, self.control)
 
     def _get_learning_rate(self):
@@ -1524,21 +1567,32 @@ class Trainer:
             return self.training_pipeline_step(model, inputs)
 
         model.train()
-        inputs = self._prepare_inputs(inputs)
+        with self._phase("prepare_inputs"):
+            inputs = self._prepare_inputs(inputs)
 
-        with self.autocast_smart_context_manager():
+        with self._phase("forward"), self.autocast_smart_context_manager():
             loss = self.compute_loss(model, inputs)
 
         if self.args.gradient_accumulation_steps > 1:
             loss = loss / self.args.gradient_accumulation_steps
 
-        if self.do_grad_scaling:
-            self.scaler.scale(loss).backward()
-        else:
-            loss.backward()
+        with self._phase("backward"):
+            if self.do_grad_scaling:
+                self.scaler.scale(loss).backward()
+            else:
+                loss.backward()
 
         return loss.detach()
 
+    @contextlib.contextmanager
+    def _phase(self, phase):
+        # Notify the callbacks, e.g. `ProfilerCallback`, of the phases of training
+        self.callback_handler.on_phase_begin(self.args, self.state, self.control, phase=phase)
+        try:
+            yield
+        finally:
+            self.callback_handler.on_phase_end(self.args, self.state, self.control, phase=phase)
+
     def training_pipeline_step(self, model: nn.Layer, inputs: Dict[str, Union[paddle.Tensor, Any]]) -> paddle.Tensor:
         """
         Perform a training step on a batch of inputs.
@@ -1599,7 +1653,7 @@ class Trainer:
 
         inputs = _prepare_training(model, inputs)
 
-        with self.autocast_smart_context_manager():
+        with self._phase("forward_backward"), self.autocast_smart_context_manager():
             loss = model.forward_backward_pipeline(inputs, self.scaler if self.do_grad_scaling else None)
 
         model.micro_batch_size, model.accumulate_steps = config_backup
@@ -1629,31 +1683,38 @@ class Trainer:
 
         output_dir = os.path.join(run_dir, checkpoint_folder)
 
+        save_dir = output_dir
+        if self.args.async_save:
+            # Only one checkpoint is written in the background at the same time
+            self._finalize_async_checkpoint()
+            save_dir = os.path.join(run_dir, ASYNC_SAVE_TMP_PREFIX + checkpoint_folder)
+            self._async_save_jobs = []
+
         if ShardingOption.FULL_SHARD in self.args.sharding:
             # TODO(ZHUI) fix it and set convert2cpu=True to save gpu memory
             model.get_all_parameters(convert2cpu=False)
 
-        self.save_model(output_dir)
+        self.save_model(save_dir)
 
         optimizer_name = _add_variant(OPTIMIZER_NAME, self.args.optimizer_name_suffix)
 
         if self.args.use_hybrid_parallel:
             if self.dp_group.rank <= 0:
-                os.makedirs(output_dir, exist_ok=True)
-                paddle.save(
+                os.makedirs(save_dir, exist_ok=True)
+                self._save_object(
                     self.optimizer.state_dict(),
-                    os.path.join(output_dir, optimizer_name),
+                    os.path.join(save_dir, optimizer_name),
                 )
 
         if self.args.should_save:
             if not self.args.use_hybrid_parallel:
-                paddle.save(self.optimizer.state_dict(), os.path.join(output_dir, OPTIMIZER_NAME))
+                self._save_object(self.optimizer.state_dict(), os.path.join(save_dir, OPTIMIZER_NAME))
 
             # FIXME: manybe only save one copy
-            paddle.save(self.lr_scheduler.state_dict(), os.path.join(output_dir, SCHEDULER_NAME))
+            self._save_object(self.lr_scheduler.state_dict(), os.path.join(save_dir, SCHEDULER_NAME))
 
             if self.do_grad_scaling:
-                paddle.save(self.scaler.state_dict(), os.path.join(output_dir, SCALER_NAME))
+                self._save_object(self.scaler.state_dict(), os.path.join(save_dir, SCALER_NAME))
 
         # Determine the new best metric / best model checkpoint
         if metrics is not None and self.args.metric_for_best_model is not None:
@@ -1673,7 +1734,7 @@ class Trainer:
 
         # Save the Trainer state
         if self.args.should_save:
-            self.state.save_to_json(os.path.join(output_dir, TRAINER_STATE_NAME))
+            self.state.save_to_json(os.path.join(save_dir, TRAINER_STATE_NAME))
 
         # Save RNG state in non-distributed training
         rng_states = {
@@ -1689,14 +1750,88 @@ class Trainer:
 
         # A process can arrive here before the process 0 has a chance to save the model, in which case output_dir may
         # not yet exist.
-        os.makedirs(output_dir, exist_ok=True)
+        os.makedirs(save_dir, exist_ok=True)
 
         if self.args.world_size > 1:
             # use global process_index to save
             process_index = self.args.process_index
-            paddle.save(rng_states, os.path.join(output_dir, f"rng_state_{process_index}.pth"))
+            self._save_object(rng_states, os.path.join(save_dir, f"rng_state_{process_index}.pth"))
         else:
-            paddle.save(rng_states, os.path.join(output_dir, "rng_state.pth"))
+            self._save_object(rng_states, os.path.join(save_dir, "rng_state.pth"))
+
+        if self.args.async_save:
+            jobs, self._async_save_jobs = self._async_save_jobs, None
+            self._pending_checkpoint = (save_dir, output_dir, run_dir)
+            self._async_saver.submit(lambda: self._write_async_checkpoint(jobs))
+            return
+
+        # Maybe delete some older checkpoints.
+        if self.args.should_save and (True if not self.args.use_hybrid_parallel else self.args.local_rank == 0):
+            self._rotate_checkpoints(use_mtime=True, output_dir=run_dir)
+
+    def _save_object(self, obj, path):
+        # In async save mode, the states are copied to the host memory here and written by the background thread
+        if self._async_save_jobs is not None:
+            self._async_save_jobs.append((copy_to_host(obj), path))
+        else:
+            paddle.save(obj, path)
+
+    def _write_async_checkpoint(self, jobs):
+        # The checkpoint is finalized by the training thread once all the processes have written their parts.
+        for obj, path in jobs:
+            paddle.save(obj, path)
+
+    def _maybe_finalize_async_checkpoint(self):
+        """
+        Finalize the checkpoint written in the background without blocking, as soon as all the processes have
+        finished writing it. Called by every process at every step while a checkpoint is pending.
+        """
+        if self._async_saver is None or self._pending_checkpoint is None:
+            return
+        done = not self._async_saver.is_running()
+        if self.args.world_size > 1:
+            done_flag = paddle.to_tensor([int(done)])
+            dist.all_reduce(done_flag, op=dist.ReduceOp.MIN)
+            done = bool(done_flag.item())
+        if done:
+            self._finalize_async_checkpoint()
+
+    def _finalize_async_checkpoint(self):
+        """
+        Wait for the checkpoint being written in the background, then move it from the temporary directory to the
+        `checkpoint-xxx` directory and rotate the older checkpoints. The checkpoint is finalized only if all the
+        processes have written it successfully, otherwise every process raises.
+        """
+        if self._async_saver is None:
+            return
+        error = None
+        try:
+            self._async_saver.wait()
+        except Exception as e:
+            error = e
+        if self._pending_checkpoint is None:
+            if error is not None:
+                raise error
+            return
+        save_dir, output_dir, run_dir = self._pending_checkpoint
+        self._pending_checkpoint = None
+
+        success = error is None
+        if self.args.world_size > 1:
+            # All the processes agree on the result before anyone renames, so no process is left in a barrier
+            success_flag = paddle.to_tensor([int(success)])
+            dist.all_reduce(success_flag, op=dist.ReduceOp.MIN)
+            success = bool(success_flag.item())
+        if not success:
+            # Never finalize the partially written checkpoint
+            if error is not None:
+                raise error
+            raise RuntimeError(f"Failed to save the checkpoint {output_dir} in the other processes.")
+
+        if self.args.should_save:
+            finalize_checkpoint(save_dir, output_dir)
+        if self.args.world_size > 1:
+            dist.barrier()
 
         # Maybe delete some older checkpoints.
         if self.args.should_save and (True if not self.args.use_hybrid_parallel else self.args.local_rank == 0):
@@ -1789,6 +1924,7 @@ class Trainer:
                     merge_tensor_parallel=merge_tensor_parallel,
                     variant=self.args.weight_name_suffix,
                     is_main_process=self.args.should_save,
+                    save_function=self._save_object,
                 )
             else:
                 logger.info("Trainer.model is not a `PretrainedModel`, only saving its state dict.")
@@ -1796,7 +1932,7 @@ class Trainer:
                     logger.warning("Trainer.model is not a `PretrainedModel`, not suppor for merge_tensor_parallel.")
                 if state_dict is None:
                     state_dict = self.model.state_dict()
-                paddle.save(
+                self._save_object(
                     state_dict,
                     os.path.join(output_dir, _add_variant(PADDLE_WEIGHTS_NAME, self.args.weight_name_suffix)),
                 )
@@ -1806,6 +1942,7 @@ class Trainer:
                 merge_tensor_parallel=merge_tensor_parallel,
                 variant=self.args.weight_name_suffix,
                 is_main_process=self.args.should_save,
+                save_function=self._save_object,
             )
 
         if self.args.should_save:
@@ -1988,14 +2125,25 @@ class Trainer:
             self._past = None
 
         # Initialize containers
-        # losses/preds/labels on GPU (accumulated for eval_accumulation_steps)
-        losses_host = None
-        preds_host = None
-        labels_host = None
-        # losses/preds/labels on CPU (final containers)
-        all_losses = None
-        all_preds = None
-        all_labels = None
+        # losses/preds/labels of every step on GPU (accumulated for eval_accumulation_steps)
+        losses_host = []
+        preds_host = []
+        labels_host = []
+        # losses/preds/labels on CPU (final containers), padded and concatenated only once at the end
+        memmap_dirs = [None] * 3
+        if args.eval_memmap_dir is not None:
+            memmap_dirs = [os.path.join(args.eval_memmap_dir, name) for name in ("losses", "preds", "labels")]
+        all_losses = NestedArrayAccumulator(padding_index=-100, memmap_dir=memmap_dirs[0])
+        all_preds = NestedArrayAccumulator(padding_index=-100, memmap_dir=memmap_dirs[1])
+        all_labels = NestedArrayAccumulator(padding_index=-100, memmap_dir=memmap_dirs[2])
+        # The streaming metric is updated step by step instead of retaining all the predictions, except for
+        # `Trainer.predict` which returns the predictions
+        streaming_metric = None
+        if isinstance(self.compute_metrics, StreamingMetric) and description != "Prediction":
+            streaming_metric = self.compute_metrics
+            streaming_metric.reset()
+        streaming_limit = self._get_known_num_samples(eval_dataset, num_samples)
+        streaming_updated = False
         # Will be useful when we have an iterable dataset so don't know its length.
 
         observed_num_examples = 0
@@ -2017,79 +2165,72 @@ class Trainer:
             if loss is not None:
                 # losses = self._nested_gather(loss.repeat(batch_size))
                 losses = self._nested_gather(paddle.tile(loss, repeat_times=[batch_size, 1]))
-                losses_host = losses if losses_host is None else paddle.concat((losses_host, losses), axis=0)
+                losses_host.append(losses)
             if labels is not None:
                 labels = self._pad_across_processes(labels)
                 labels = self._nested_gather(labels)
-                labels_host = labels if labels_host is None else nested_concat(labels_host, labels, padding_index=-100)
+                if streaming_metric is None:
+                    labels_host.append(labels)
             if logits is not None:
                 logits = self._pad_across_processes(logits)
                 logits = self._nested_gather(logits)
                 if self.preprocess_logits_for_metrics is not None:
                     logits = self.preprocess_logits_for_metrics(logits, labels)
-                preds_host = logits if preds_host is None else nested_concat(preds_host, logits, padding_index=-100)
+                if streaming_metric is None:
+                    preds_host.append(logits)
+            if streaming_metric is not None and logits is not None and labels is not None:
+                logits, labels = nested_numpify(logits), nested_numpify(labels)
+                if streaming_limit is not None:
+                    # Drop the dummy samples added by the distributed sampler
+                    logits = nested_truncate(logits, max(streaming_limit, 0))
+                    labels = nested_truncate(labels, max(streaming_limit, 0))
+                    streaming_limit -= find_batch_size(labels) or 0
+                if find_batch_size(labels):
+                    streaming_metric.update(logits, labels)
+                    streaming_updated = True
             self.control = self.callback_handler.on_prediction_step(args, self.state, self.control)
 
             # Gather all tensors and put them back on the CPU if we have done enough accumulation steps.
             if args.eval_accumulation_steps is not None and (step + 1) % args.eval_accumulation_steps == 0:
-                if losses_host is not None:
-                    losses = nested_numpify(losses_host)
-                    all_losses = losses if all_losses is None else np.concatenate((all_losses, losses), axis=0)
-                if preds_host is not None:
-                    logits = nested_numpify(preds_host)
-                    all_preds = logits if all_preds is None else nested_concat(all_preds, logits, padding_index=-100)
-
-                if labels_host is not None:
-                    labels = nested_numpify(labels_host)
-                    all_labels = (
-                        labels if all_labels is None else nested_concat(all_labels, labels, padding_index=-100)
-                    )
-
-                # Set back to None to begin a new accumulation
-                losses_host, preds_host, labels_host = None, None, None
+                for host, accumulator in (
+                    (losses_host, all_losses),
+                    (preds_host, all_preds),
+                    (labels_host, all_labels),
+                ):
+                    for tensors in host:
+                        accumulator.add(nested_numpify(tensors))
+                    # Clear to begin a new accumulation
+                    host.clear()
 
             if max_eval_iters > 0 and step >= max_eval_iters - 1:
                 break
 
         # Gather all remaining tensors and put them back on the CPU
-        if losses_host is not None:
-            losses = nested_numpify(losses_host)
-            all_losses = losses if all_losses is None else np.concatenate((all_losses, losses), axis=0)
-        if preds_host is not None:
-            logits = nested_numpify(preds_host)
-            all_preds = logits if all_preds is None else nested_concat(all_preds, logits, padding_index=-100)
-        if labels_host is not None:
-            labels = nested_numpify(labels_host)
-            all_labels = labels if all_labels is None else nested_concat(all_labels, labels, padding_index=-100)
+        for host, accumulator in ((losses_host, all_losses), (preds_host, all_preds), (labels_host, all_labels)):
+            for tensors in host:
+                accumulator.add(nested_numpify(tensors))
+            host.clear()
 
         # Number of samples
-        if num_samples is not None:
-            pass
-        elif has_length(eval_dataset):
-            num_samples = len(eval_dataset)
-        # The instance check is weird and does not actually check for the type, but whether the dataset has the right
-        # methods. Therefore we need to make sure it also has the attribute.
-        elif isinstance(eval_dataset, IterableDatasetShard) and hasattr(eval_dataset, "num_examples"):
-            num_samples = eval_dataset.num_examples
-        else:
+        num_samples = self._get_known_num_samples(eval_dataset, num_samples)
+        if num_samples is None:
             if has_length(dataloader):
                 num_samples = self.num_examples(dataloader)
             else:  # both len(dataloader.dataset) and len(dataloader) fail
                 num_samples = observed_num_examples
 
         # Number of losses has been rounded to a multiple of batch_size and in a distributed training, the number of
-        # samplers has been rounded to a multiple of batch_size, so we truncate.
-        if all_losses is not None:
-            all_losses = all_losses[:num_samples]
-        if all_preds is not None:
-            all_preds = nested_truncate(all_preds, num_samples)
-        if all_labels is not None:
-            all_labels = nested_truncate(all_labels, num_samples)
+        # samplers has been rounded to a multiple of batch_size, so we truncate while concatenating.
+        all_losses = all_losses.get(num_samples)
+        all_preds = all_preds.get(num_samples)
+        all_labels = all_labels.get(num_samples)
 
         model.train()
 
         # Metrics!
-        if self.compute_metrics is not None and all_preds is not None and all_labels is not None:
+        if streaming_metric is not None:
+            metrics = streaming_metric.finalize() if streaming_updated else {}
+        elif self.compute_metrics is not None and all_preds is not None and all_labels is not None:
             metrics = self.compute_metrics(EvalPrediction(predictions=all_preds, label_ids=all_labels))
         else:
             metrics = {}
@@ -2104,6 +2245,17 @@ class Trainer:
 
         return EvalLoopOutput(predictions=all_preds, label_ids=all_labels, metrics=metrics, num_samples=num_samples)
 
+    def _get_known_num_samples(self, eval_dataset, num_samples=None):
+        if num_samples is not None:
+            return num_samples
+        if has_length(eval_dataset):
+            return len(eval_dataset)
+        # The instance check is weird and does not actually check for the type, but whether the dataset has the right
+        # methods. Therefore we need to make sure it also has the attribute.
+        if isinstance(eval_dataset, IterableDatasetShard) and hasattr(eval_dataset, "num_examples"):
+            return eval_dataset.num_examples
+        return None
+
     def predict(
         self, test_dataset: Dataset, ignore_keys: Optional[List[str]] = None, metric_key_prefix: str = "test"
     ) -> PredictionOutput:
@@ -20,10 +20,13 @@ Callbacks to use with the Trainer class and customize the training loop.
 """
 import dataclasses
 import json
+import os
+import time
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Union
 
 import numpy as np
+import paddle
 from tqdm.auto import tqdm
 
 from paddlenlp.utils.log import logger
@@ -40,6 +43,7 @@ __all__ = [
     "ProgressCallback",
     "PrinterCallback",
     "EarlyStoppingCallback",
+    "ProfilerCallback",
 ]
 
 
@@ -260,6 +264,19 @@ class TrainerCallback:
     def on_optimizer_end(self, args: TrainingArguments, state: TrainerState, control: TrainerControl, **kwargs):
         pass
 
+    def on_phase_begin(self, args: TrainingArguments, state: TrainerState, control: TrainerControl, **kwargs):
+        """
+        Event called at the beginning of a phase of training, the `phase` is one of `"prepare_inputs"`, `"forward"`,
+        `"backward"`, `"forward_backward"` (for pipeline parallel), `"log"`, `"evaluate"` and `"save"`.
+        """
+        pass
+
+    def on_phase_end(self, args: TrainingArguments, state: TrainerState, control: TrainerControl, **kwargs):
+        """
+        Event called at the end of a phase of training, see `on_phase_begin`.
+        """
+        pass
+
     def on_substep_end(self, args: TrainingArguments, state: TrainerState, control: TrainerControl, **kwargs):
         """
         Event called at the end of an substep during gradient accumulation.
@@ -388,6 +405,12 @@ class CallbackHandler(TrainerCallback):
     def on_optimizer_end(self, args: TrainingArguments, state: TrainerState, control: TrainerControl, scaler):
         return self.call_event("on_optimizer_end", args, state, control, scaler=scaler)
 
+    def on_phase_begin(self, args: TrainingArguments, state: TrainerState, control: TrainerControl, phase: str):
+        return self.call_event("on_phase_begin", args, state, control, phase=phase)
+
+    def on_phase_end(self, args: TrainingArguments, state: TrainerState, control: TrainerControl, phase: str):
+        return self.call_event("on_phase_end", args, state, control, phase=phase)
+
     def on_substep_end(self, args: TrainingArguments, state: TrainerState, control: TrainerControl):
         return self.call_event("on_substep_end", args, state, control)
 
@@ -603,3 +626,164 @@ class EarlyStoppingCallback(TrainerCallback):
         self.check_metric_value(args, state, control, metric_value)
         if self.early_stopping_patience_counter >= self.early_stopping_patience:
             control.should_training_stop = True
+
+
+class ProfilerCallback(TrainerCallback):
+    """
+    A [`TrainerCallback`] that profiles the throughput of training. The time of data loading wait, preparing inputs,
+    forward, backward, optimizer step, logging, evaluation and checkpointing is summarized at every logging step
+    together with the tokens per second and the padding ratio, which tells whether the training is input-bound or
+    compute-bound. At the end of training, the timeline is dumped in the chrome trace format, which could be opened
+    by `chrome://tracing` or Perfetto.
+
+    Args:
+        trace_file (`str`, *optional*):
+            The path of the chrome trace json. Defaults to `profiler_trace_rank{process_index}.json` in
+            `args.output_dir`.
+        synchronize (`bool`, *optional*, defaults to `True`):
+            Whether to synchronize the device at the boundaries of the phases, otherwise the time of the asynchronous
+            kernels is attributed to the phase that waits for them.
+        max_trace_events (`int`, *optional*, defaults to 100000):
+            The max number of events kept for the chrome trace.
+    """
+
+    PHASES = (
+        "data_wait",
+        "prepare_inputs",
+        "forward",
+        "backward",
+        "forward_backward",
+        "optimizer",
+        "log",
+        "evaluate",
+        "save",
+    )
+
+    def __init__(self, trace_file: Optional[str] = None, synchronize: bool = True, max_trace_events: int = 100000):
+        self.trace_file = trace_file
+        self.synchronize = synchronize
+        self.max_trace_events = max_trace_events
+        self._reset()
+
+    def _reset(self):
+        self._train_start = time.perf_counter()
+        self._last_mark = self._train_start
+        self._phase_starts = {}
+        self._interval = self._new_counters()
+        self._total = self._new_counters()
+        self.trace_events = []
+
+    def _new_counters(self):
+        return {"start": time.perf_counter(), "times": dict.fromkeys(self.PHASES, 0.0), "tokens": 0, "positions": 0}
+
+    def _now(self):
+        if self.synchronize and paddle.is_compiled_with_cuda() and paddle.device.get_device().startswith("gpu"):
+            paddle.device.cuda.synchronize()
+        return time.perf_counter()
+
+    def _record(self, phase, start, end, state, process_index):
+        for counters in (self._interval, self._total):
+            counters["times"][phase] += end - start
+        if len(self.trace_events) < self.max_trace_events:
+            self.trace_events.append(
+                {
+                    "name": phase,
+                    "ph": "X",
+                    "ts": (start - self._train_start) * 1e6,
+                    "dur": (end - start) * 1e6,
+                    "pid": process_index,
+                    "tid": 0,
+                    "args": {"step": state.global_step},
+                }
+            )
+
+    @staticmethod
+    def _count_not_equal(values, value):
+        # Counted on device and accumulated as a tensor, which is read back only in `summarize`, so that counting
+        # does not synchronize the device at every step
+        if isinstance(values, paddle.Tensor):
+            return paddle.sum((values.astype("int64") != value).astype("int64")), int(np.prod(values.shape))
+        values = np.asarray(values)
+        return int((values != value).sum()), values.size
+
+    def _count_tokens(self, inputs, tokenizer):
+        if not isinstance(inputs, dict):
+            return
+        mask = inputs.get("attention_mask", None)
+        input_ids = inputs.get("input_ids", None)
+        if mask is not None and len(mask.shape) == 2:
+            tokens, positions = self._count_not_equal(mask, 0)
+        elif input_ids is not None:
+            pad_token_id = getattr(tokenizer, "pad_token_id", None)
+            if pad_token_id is not None:
+                tokens, positions = self._count_not_equal(input_ids, pad_token_id)
+            else:
+                positions = int(np.prod(input_ids.shape))
+                tokens = positions
+        else:
+            return
+        for counters in (self._interval, self._total):
+            counters["tokens"] += tokens
+            counters["positions"] += positions
+
+    def summarize(self, counters=None):
+        """
+        Return the dict of the seconds and the ratio of every phase, the tokens per second and the padding ratio,
+        summarized over the whole training if `counters` is None.
+        """
+        counters = self._total if counters is None else counters
+        elapsed = max(time.perf_counter() - counters["start"], 1e-9)
+        tokens = counters["tokens"]
+        if isinstance(tokens, paddle.Tensor):
+            tokens = int(tokens.item())
+        summary = {}
+        for phase, seconds in counters["times"].items():
+            if seconds > 0:
+                summary[f"{phase}_seconds"] = round(seconds, 4)
+                summary[f"{phase}_ratio"] = round(seconds / elapsed, 4)
+        other = elapsed - sum(counters["times"].values())
+        summary["other_ratio"] = round(max(other, 0.0) / elapsed, 4)
+        summary["tokens_per_second"] = round(tokens / elapsed, 4)
+        if counters["positions"] > 0:
+            summary["padding_ratio"] = round(1 - tokens / counters["positions"], 4)
+        return summary
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        self._reset()
+
+    def on_load_data_end(self, args, state, control, inputs=None, tokenizer=None, **kwargs):
+        now = self._now()
+        self._record("data_wait", self._last_mark, now, state, args.process_index)
+        self._count_tokens(inputs, tokenizer)
+        self._last_mark = now
+
+    def on_phase_begin(self, args, state, control, phase=None, **kwargs):
+        self._phase_starts[phase] = self._now()
+
+    def on_phase_end(self, args, state, control, phase=None, **kwargs):
+        now = self._now()
+        if phase in self._phase_starts:
+            self._record(phase, self._phase_starts.pop(phase), now, state, args.process_index)
+        self._last_mark = now
+        if phase == "log" and state.is_local_process_zero:
+            summary = self.summarize(self._interval)
+            logger.info("Profiler: " + ", ".join(f"{k}: {v}" for k, v in summary.items()))
+            self._interval = self._new_counters()
+
+    def on_optimizer_begin(self, args, state, control, **kwargs):
+        self.on_phase_begin(args, state, control, phase="optimizer")
+
+    def on_optimizer_end(self, args, state, control, **kwargs):
+        self.on_phase_end(args, state, control, phase="optimizer")
+
+    def on_train_end(self, args, state, control, **kwargs):
+        if state.is_local_process_zero:
+            summary = self.summarize()
+            logger.info("Profiler summary: " + ", ".join(f"{k}: {v}" for k, v in summary.items()))
+        trace_file = self.trace_file
+        if trace_file is None:
+            trace_file = os.path.join(args.output_dir, f"profiler_trace_rank{args.process_index}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(trace_file)), exist_ok=True)
+        with open(trace_file, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.trace_events, "displayTimeUnit": "ms"}, f)
+        logger.info(f"The profiler trace is saved to {trace_file}")
@@ -113,6 +113,10 @@ class TrainingArguments:
             Number of predictions steps to accumulate the output tensors for, before moving the results to the CPU. If
             left unset, the whole predictions are accumulated on GPU/TPU before being moved to the CPU (faster but
             requires more memory).
+        eval_memmap_dir (`str`, *optional*):
+            If set, the predictions moved to the CPU during evaluation are spilled to this directory, and the final
+            predictions/labels are memory-mapped arrays under it, so that evaluating large datasets is bounded in host
+            memory. The arrays are overwritten by the next evaluation.
         learning_rate (`float`, *optional*, defaults to 5e-5):
             The initial learning rate for [`AdamW`] optimizer.
         weight_decay (`float`, *optional*, defaults to 0):
@@ -172,6 +176,9 @@ class TrainingArguments:
 
             This should not be activated when the different nodes use the same storage as the files will be saved with
             the same names for each node.
+        async_save (`bool`, *optional*, defaults to `False`):
+            Whether to save the checkpoints in a background thread. The states are copied to the host memory and
+            written to `tmp-checkpoint-xxx`, which is renamed to `checkpoint-xxx` once all the files are written.
         no_cuda (`bool`, *optional*, defaults to `False`):
             Whether to not use CUDA even when it is available or not.
         seed (`int`, *optional*, defaults to 42):
@@ -288,10 +295,17 @@ class TrainingArguments:
             can take a long time) but will not yield the same results as the interrupted training would have.
         optim (`str` or [`training_args.OptimizerNames`], *optional*, defaults to `"adamw"`):
             The optimizer to use: adamw, or adafactor.
+        group_by_length (`bool`, *optional*, defaults to `False`):
+            Whether or not to group together samples of roughly the same length in the training dataset (to minimize
+            padding applied and be more efficient). Only useful if applying dynamic padding.
         length_column_name (`str`, *optional*, defaults to `"length"`):
             Column name for precomputed lengths. If the column exists, grouping by length will use these values rather
-            than computing them on train startup. Ignored unless `group_by_length` is `True` and the dataset is an
-            instance of `Dataset`.
+            than computing them on train startup. Ignored unless `group_by_length` is `True` or `max_tokens_per_batch`
+            is set.
+        max_tokens_per_batch (`int`, *optional*):
+            If set, the training samples are grouped by length and batched by the number of padded tokens
+            (`max length * number of samples`) instead of `per_device_train_batch_size`, which is only used to
+            count the consumed samples when resuming training.
         report_to (`str` or `List[str]`, *optional*, defaults to `"visualdl"`):
             The list of integrations to report the results and logs to. Supported platforms is `"visualdl"`.
             `"none"` for no integrations.
@@ -342,6 +356,10 @@ class TrainingArguments:
         default=None,
         metadata={"help": "Number of predictions steps to accumulate before moving the tensors to the CPU."},
     )
+    eval_memmap_dir: Optional[str] = field(
+        default=None,
+        metadata={"help": "The directory to spill the predictions to, and to memory-map the final predictions from."},
+    )
 
     learning_rate: float = field(default=5e-5, metadata={"help": "The initial learning rate for AdamW."})
     weight_decay: float = field(default=0.0, metadata={"help": "Weight decay for AdamW if we apply some."})
@@ -398,6 +416,10 @@ class TrainingArguments:
             "help": "When doing multi-node distributed training, whether to save models and checkpoints on each node, or only on the main one"
         },
     )
+    async_save: bool = field(
+        default=False,
+        metadata={"help": "Whether to copy the states to the host memory and save the checkpoints in the background."},
+    )
     no_cuda: bool = field(default=False, metadata={"help": "Do not use CUDA even when it is available"})
     seed: int = field(default=42, metadata={"help": "Random seed that will be set at the beginning of training."})
 
@@ -595,6 +617,18 @@ class TrainingArguments:
         default="adamw",
         metadata={"help": "The optimizer to use."},
     )
+    group_by_length: bool = field(
+        default=False,
+        metadata={"help": "Whether or not to group samples of roughly the same length together when batching."},
+    )
+    length_column_name: Optional[str] = field(
+        default="length",
+        metadata={"help": "Column name with precomputed lengths to use when grouping by length."},
+    )
+    max_tokens_per_batch: Optional[int] = field(
+        default=None,
+        metadata={"help": "If set, batch the length grouped training samples by the number of padded tokens."},
+    )
     report_to: Optional[List[str]] = field(
         default=None, metadata={"help": "The list of integrations to report the results and logs to."}
     )
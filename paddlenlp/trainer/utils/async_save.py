@@ -0,0 +1,95 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import threading
+
+import paddle
+
+from ...utils.log import logger
+
+__all__ = ["AsyncCheckpointSaver", "copy_to_host", "finalize_checkpoint"]
+
+# The checkpoint is written to `tmp-checkpoint-xxx` first, which is not matched by the `checkpoint-*` pattern
+# of `_rotate_checkpoints` and `get_last_checkpoint`, and renamed once all the files are written.
+ASYNC_SAVE_TMP_PREFIX = "tmp-"
+
+
+def copy_to_host(obj):
+    """
+    Copy the tensors in `obj` (even if it's a nested dict/list/tuple of tensors) to the host memory, so that
+    the snapshot is not changed by the following training steps.
+    """
+    if isinstance(obj, dict):
+        return type(obj)((key, copy_to_host(value)) for key, value in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(copy_to_host(value) for value in obj)
+    if isinstance(obj, paddle.Tensor):
+        with paddle.no_grad():
+            # `Tensor.cpu` shares the memory with the tensor already on the cpu
+            return obj.clone() if obj.place.is_cpu_place() else obj.cpu()
+    return obj
+
+
+def finalize_checkpoint(save_dir, output_dir):
+    """
+    Move the completely written checkpoint from `save_dir` to `output_dir`.
+    """
+    if not os.path.isdir(save_dir):
+        return
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    os.replace(save_dir, output_dir)
+    logger.info(f"Checkpoint saved to {output_dir}")
+
+
+class AsyncCheckpointSaver:
+    """
+    Run the checkpoint saving jobs in a background thread. At most one job is in flight, `submit` waits for the
+    previous job to finish so that only one snapshot of the states is kept in the host memory.
+    """
+
+    def __init__(self):
+        self._thread = None
+        self._error = None
+
+    def _run(self, fn):
+        try:
+            fn()
+        except Exception as e:
+            logger.error(f"Failed to save the checkpoint in the background: {e}")
+            self._error = e
+
+    def submit(self, fn):
+        """
+        Wait for the previous job and run `fn` in the background thread.
+        """
+        self.wait()
+        self._thread = threading.Thread(target=self._run, args=(fn,), name="paddlenlp-async-save")
+        self._thread.start()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def wait(self):
+        """
+        Wait for the running job to finish, the error raised by the job is re-raised here.
+        """
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
@@ -16,6 +16,7 @@
 # This file is modified from
 #  https://github.com/huggingface/transformers/blob/main/src/transformers
 
+import os
 from typing import Any, Optional
 
 import numpy as np
@@ -29,6 +30,7 @@ __all__ = [
     "nested_detach",
     "nested_numpify",
     "nested_truncate",
+    "NestedArrayAccumulator",
 ]
 
 
@@ -124,3 +126,112 @@ def nested_truncate(tensors, limit):
     if isinstance(tensors, (list, tuple)):
         return type(tensors)(nested_truncate(t, limit) for t in tensors)
     return tensors[:limit]
+
+
+class NestedArrayAccumulator:
+    """
+    Accumulate the numpy arrays (or nested list/tuples of arrays) of every prediction step, and pad/concatenate them
+    on the first axis only once in `get`. Compared with calling `nested_concat` on every step, which copies the whole
+    accumulated array each time, the chunks are copied exactly once into the preallocated result.
+
+    Args:
+        padding_index (int, optional): The value to pad the arrays whose trailing dims are shorter than the others.
+            Defaults to -100.
+        memmap_dir (str, optional): If set, every chunk is spilled to a `.npy` file under this directory once added,
+            and the result is a memory-mapped array in this directory, so the host memory is bounded by the size of
+            one chunk. Defaults to None.
+    """
+
+    def __init__(self, padding_index=-100, memmap_dir=None):
+        self.padding_index = padding_index
+        self.memmap_dir = memmap_dir
+        if self.memmap_dir is not None:
+            os.makedirs(self.memmap_dir, exist_ok=True)
+        self._structure = None
+        # For every leaf array, the list of chunks (or the `.npy` paths of chunks) in order
+        self._chunks = None
+        self._num_files = 0
+
+    def __len__(self):
+        return 0 if self._chunks is None else len(self._chunks[0])
+
+    def _flatten(self, arrays):
+        if isinstance(arrays, (list, tuple)):
+            structure, leaves = [], []
+            for array in arrays:
+                sub_structure, sub_leaves = self._flatten(array)
+                structure.append(sub_structure)
+                leaves.extend(sub_leaves)
+            return (type(arrays), structure), leaves
+        if not isinstance(arrays, np.ndarray):
+            raise TypeError(f"Unsupported type for accumulation: got {type(arrays)}")
+        return None, [arrays]
+
+    def _unflatten(self, structure, leaves):
+        if structure is None:
+            return next(leaves)
+        container_type, sub_structures = structure
+        return container_type(self._unflatten(sub_structure, leaves) for sub_structure in sub_structures)
+
+    def add(self, arrays):
+        "Add the arrays of one step, the nested structure must be the same for all the steps."
+        structure, leaves = self._flatten(arrays)
+        if self._chunks is None:
+            self._structure = structure
+            self._chunks = [[] for _ in leaves]
+        elif structure != self._structure:
+            raise ValueError("Expected the arrays of every step to have the same nested structure.")
+        for chunks, leaf in zip(self._chunks, leaves):
+            if leaf.ndim == 0:
+                leaf = leaf.reshape([-1])
+            if self.memmap_dir is not None:
+                path = os.path.join(self.memmap_dir, f"chunk-{self._num_files}.npy")
+                np.save(path, leaf)
+                self._num_files += 1
+                chunks.append((path, leaf.shape, leaf.dtype))
+            else:
+                chunks.append((leaf, leaf.shape, leaf.dtype))
+
+    def _gather(self, index, chunks, limit):
+        num_rows = sum(shape[0] for _, shape, _ in chunks)
+        if limit is not None:
+            num_rows = min(num_rows, limit)
+        ndim = max(len(shape) for _, shape, _ in chunks)
+        if any(len(shape) != ndim for _, shape, _ in chunks):
+            raise ValueError("Expected the arrays of every step to have the same number of dims.")
+        # Pad every trailing dim to the largest one among the chunks
+        shape = (num_rows,) + tuple(max(shape[i] for _, shape, _ in chunks) for i in range(1, ndim))
+        dtype = chunks[0][2]
+        if self.memmap_dir is not None:
+            path = os.path.join(self.memmap_dir, f"result-{index}.npy")
+            result = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+        else:
+            result = np.empty(shape, dtype=dtype)
+        if ndim > 1:
+            result.fill(self.padding_index)
+
+        start = 0
+        for chunk, chunk_shape, _ in chunks:
+            if start >= num_rows:
+                break
+            if self.memmap_dir is not None:
+                chunk = np.load(chunk, mmap_mode="r")
+            end = min(start + chunk_shape[0], num_rows)
+            result[(slice(start, end),) + tuple(slice(0, dim) for dim in chunk_shape[1:])] = chunk[: end - start]
+            start = end
+        if self.memmap_dir is not None:
+            result.flush()
+            for path, _, _ in chunks:
+                os.remove(path)
+        return result
+
+    def get(self, limit=None):
+        """
+        Return the accumulated arrays with the same nested structure as the added ones, truncated to the first `limit`
+        rows if `limit` is set. Returns None if nothing was added. The added chunks are released afterwards.
+        """
+        if self._chunks is None:
+            return None
+        leaves = [self._gather(index, chunks, limit) for index, chunks in enumerate(self._chunks)]
+        self._chunks = None
+        return self._unflatten(self._structure, iter(leaves))
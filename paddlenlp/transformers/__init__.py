@@ -18,6 +18,7 @@ from .model_utils import PretrainedModel, register_base_model
 from .tokenizer_utils import (
     PretrainedTokenizer,
     BPETokenizer,
+    SubwordCache,
     tokenize_chinese_chars,
     is_chinese_char,
     AddedToken,
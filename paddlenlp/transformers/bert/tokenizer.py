@@ -18,6 +18,7 @@ import unicodedata
 
 from ..tokenizer_utils import (
     PretrainedTokenizer,
+    SubwordCache,
     _is_control,
     _is_punctuation,
     _is_symbol,
@@ -210,12 +211,16 @@ class WordpieceTokenizer(object):
             If a word's length is more than
             max_input_chars_per_word, it will be dealt as unknown word.
             Defaults to 100.
+        cache_size (int, optional):
+            The max number of words whose word pieces are cached, `0` disables the cache.
+            Defaults to `None`, which means `SubwordCache.DEFAULT_MAX_SIZE`.
     """
 
-    def __init__(self, vocab, unk_token, max_input_chars_per_word=100):
+    def __init__(self, vocab, unk_token, max_input_chars_per_word=100, cache_size=None):
         self.vocab = vocab
         self.unk_token = unk_token
         self.max_input_chars_per_word = max_input_chars_per_word
+        self.cache = SubwordCache(cache_size) if cache_size != 0 else None
 
     def tokenize(self, text):
         """
@@ -249,36 +254,43 @@ class WordpieceTokenizer(object):
 
         output_tokens = []
         for token in whitespace_tokenize(text):
-            chars = list(token)
-            if len(chars) > self.max_input_chars_per_word:
-                output_tokens.append(self.unk_token)
-                continue
+            if self.cache is not None:
+                cached = self.cache.get(token)
+                if cached is not None:
+                    output_tokens.extend(cached)
+                    continue
+            output_tokens.extend(self._tokenize_word(token))
+        return output_tokens
 
-            is_bad = False
-            start = 0
-            sub_tokens = []
-            while start < len(chars):
-                end = len(chars)
-                cur_substr = None
-                while start < end:
-                    substr = "".join(chars[start:end])
-                    if start > 0:
-                        substr = "##" + substr
-                    if substr in self.vocab:
-                        cur_substr = substr
-                        break
-                    end -= 1
-                if cur_substr is None:
-                    is_bad = True
+    def _tokenize_word(self, token):
+        chars = list(token)
+        if len(chars) > self.max_input_chars_per_word:
+            sub_tokens = (self.unk_token,)
+        else:
+            sub_tokens = self._greedy_longest_match(chars)
+        if self.cache is not None:
+            self.cache[token] = sub_tokens
+        return sub_tokens
+
+    def _greedy_longest_match(self, chars):
+        start = 0
+        sub_tokens = []
+        while start < len(chars):
+            end = len(chars)
+            cur_substr = None
+            while start < end:
+                substr = "".join(chars[start:end])
+                if start > 0:
+                    substr = "##" + substr
+                if substr in self.vocab:
+                    cur_substr = substr
                     break
-                sub_tokens.append(cur_substr)
-                start = end
-
-            if is_bad:
-                output_tokens.append(self.unk_token)
-            else:
-                output_tokens.extend(sub_tokens)
-        return output_tokens
+                end -= 1
+            if cur_substr is None:
+                return (self.unk_token,)
+            sub_tokens.append(cur_substr)
+            start = end
+        return tuple(sub_tokens)
 
 
 class BertTokenizer(PretrainedTokenizer):
@@ -119,8 +119,9 @@ class BlenderbotSmallTokenizer(GPTTokenizer):
         Returns:
             str: Converted token.
         """
-        if token in self.cache:
-            return self.cache[token]
+        cached = self.cache.get(token)
+        if cached is not None:
+            return cached
         token = re.sub("([.,!?()])", r" \1", token)
         token = re.sub("(')", r" \1 ", token)
         token = re.sub(r"\s{2,}", " ", token)
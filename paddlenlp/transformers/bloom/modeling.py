@@ -27,6 +27,7 @@ from paddle.autograd import PyLayer
 from paddle.distributed import fleet
 from paddle.distributed.fleet.utils import recompute
 
+from paddlenlp.transformers.generation_utils import StaticKVCacheLayer
 from paddlenlp.transformers.model_outputs import (
     BaseModelOutputWithPastAndCrossAttentions,
     CausalLMOutputWithCrossAttentions,
@@ -434,7 +435,10 @@ class BloomAttention(nn.Layer):
         value_layer = value_layer.transpose([0, 2, 1, 3]).reshape(
             [batch_size * self.num_heads, q_length, self.head_dim]
         )
-        if layer_past is not None:
+        if isinstance(layer_past, StaticKVCacheLayer):
+            # write to the pre-allocated cache in place
+            key_layer, value_layer = layer_past.update(key_layer, value_layer)
+        elif layer_past is not None:
             past_key, past_value = layer_past
             # concatenate along seq_length dimension:
             #  - key: [batch_size * self.num_heads, head_dim, kv_length]
@@ -445,7 +449,7 @@ class BloomAttention(nn.Layer):
         _, _, kv_length = key_layer.shape
 
         if use_cache is True:
-            present = (key_layer, value_layer)
+            present = layer_past if isinstance(layer_past, StaticKVCacheLayer) else (key_layer, value_layer)
         else:
             present = None
 
@@ -629,6 +633,8 @@ class BloomPreTrainedModel(PretrainedModel):
     config_class = BloomConfig
     base_model_prefix = "bloom"
     supports_gradient_checkpointing = True
+    # key: [batch_size * num_heads, head_dim, seq_len], value: [batch_size * num_heads, seq_len, head_dim]
+    static_cache_axes = (2, 1, 0)
     _no_split_modules = ["BloomBlock"]
 
     @classmethod
@@ -943,6 +949,13 @@ class BloomModel(BloomPreTrainedModel):
 
         if attention_mask is None:
             attention_mask = paddle.ones([batch_size, seq_length_with_past], dtype=paddle.get_default_dtype())
+        elif len(attention_mask.shape) != 2:
+            # The ALiBi bias is derived from the 2-D mask, so the prebuilt mask of packed sequences is unsupported
+            raise ValueError(
+                "The attention_mask of Bloom should be of shape [batch_size, seq_length], but received {}.".format(
+                    attention_mask.shape
+                )
+            )
 
         alibi = build_alibi_tensor(attention_mask, self.config.n_head, dtype=hidden_states.dtype)
         causal_mask = self._prepare_attn_mask(
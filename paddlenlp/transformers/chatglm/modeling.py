@@ -29,6 +29,7 @@ from paddle.distributed.fleet.utils import recompute
 from ...utils.env import CONFIG_NAME
 from ...utils.log import logger
 from .. import PretrainedModel, register_base_model
+from ..generation_utils import StaticKVCacheLayer
 from ..model_outputs import (
     BaseModelOutputWithPastAndCrossAttentions,
     CausalLMOutputWithPast,
@@ -249,7 +250,10 @@ class ChatGLMAttention(nn.Layer):
         # [s, b, n, h/n]
         q_layer, k_layer = self._core_attention(q_layer, k_layer, position_ids, rotary_embeds)
 
-        if cache is not None:
+        if isinstance(cache, StaticKVCacheLayer):
+            # [s + c, b, n, h/n], written to the pre-allocated cache in place
+            k_layer, v_layer = cache.update(k_layer, v_layer)
+        elif cache is not None:
             cache_k, cache_v = cache[0], cache[1]
             # [s + c, b, n, h/n]
             k_layer = paddle.concat([cache_k, k_layer], axis=0)
@@ -259,7 +263,7 @@ class ChatGLMAttention(nn.Layer):
 
         cache_kv = None
         if use_cache:
-            cache_kv = (k_layer, v_layer)
+            cache_kv = cache if isinstance(cache, StaticKVCacheLayer) else (k_layer, v_layer)
 
         attention_scale_coeff = float(layer_id) + 1.0
         if self.attention_scale:
@@ -580,6 +584,8 @@ class ChatGLMPretrainedModel(PretrainedModel):
 
     base_model_prefix = "chatglm"
     config_class = ChatGLMConfig
+    # [seq_len, batch_size, num_heads, head_dim]
+    static_cache_axes = (0, 0, 1)
     model_config_file = CONFIG_NAME
     resource_files_names = {"model_state": "model_state.pdparams"}
     pretrained_resource_files_map = CHATGLM_PRETRAINED_RESOURCE_FILES_MAP
@@ -22,6 +22,7 @@ from paddle.utils import try_import
 
 from ...utils.log import logger
 from .. import AddedToken, BasicTokenizer, PretrainedTokenizer
+from ..tokenizer_utils import SubwordCache
 
 __all__ = ["CLIPTokenizer"]
 
@@ -174,7 +175,9 @@ class CLIPTokenizer(PretrainedTokenizer):
             bpe_merges = merges_handle.read().strip().split("\n")[1 : 49152 - 256 - 2 + 1]
         bpe_merges = [tuple(merge.split()) for merge in bpe_merges]
         self.bpe_ranks = dict(zip(bpe_merges, range(len(bpe_merges))))
-        self.cache = {"<|startoftext|>": "<|startoftext|>", "<|endoftext|>": "<|endoftext|>"}
+        self.cache = SubwordCache()
+        self.cache["<|startoftext|>"] = "<|startoftext|>"
+        self.cache["<|endoftext|>"] = "<|endoftext|>"
 
         self.pat = self.re.compile(
             r"""<\|startoftext\|>|<\|endoftext\|>|'s|'t|'re|'ve|'m|'ll|'d|[\p{L}]+|[\p{N}]|[^\s\p{L}\p{N}]+""",
@@ -264,8 +267,9 @@ class CLIPTokenizer(PretrainedTokenizer):
         return len(bos + token_ids_0 + eos + eos + token_ids_1 + eos) * [0]
 
     def bpe(self, token):
-        if token in self.cache:
-            return self.cache[token]
+        cached = self.cache.get(token)
+        if cached is not None:
+            return cached
         word = tuple(token[:-1]) + (token[-1] + "</w>",)
         pairs = get_pairs(word)
 
@@ -0,0 +1,456 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import queue
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+import paddle
+import paddle.nn.functional as F
+
+from ..utils.log import logger
+from .generation_utils import TopKProcess, TopPProcess
+from .model_outputs import ModelOutput
+
+__all__ = ["ContinuousBatchingEngine"]
+
+
+def _map_cache(fn, *caches):
+    # The cache is a nested structure of list, tuple and namedtuple whose leaves are tensors
+    first = caches[0]
+    if first is None:
+        return None
+    if isinstance(first, paddle.Tensor):
+        return fn(*caches)
+    if isinstance(first, tuple) and hasattr(first, "_fields"):
+        return type(first)(*[_map_cache(fn, *items) for items in zip(*caches)])
+    if isinstance(first, (list, tuple)):
+        return type(first)(_map_cache(fn, *items) for items in zip(*caches))
+    raise TypeError("Unsupported cache type {} in continuous batching.".format(type(first)))
+
+
+def _get_cache_from_outputs(outputs):
+    if isinstance(outputs, tuple) and len(outputs) > 1 and not isinstance(outputs[1], paddle.Tensor):
+        return outputs[1]
+    if isinstance(outputs, ModelOutput) and "past_key_values" in outputs:
+        return outputs.past_key_values
+    raise ValueError("The model must return the cache when `use_cache=True` in continuous batching.")
+
+
+def _get_logits_from_outputs(outputs):
+    if isinstance(outputs, tuple):
+        return outputs[0]
+    if isinstance(outputs, ModelOutput):
+        return outputs.logits
+    return outputs
+
+
+class _Sequence:
+    def __init__(self, input_ids, max_new_tokens, eos_token_id, streamer):
+        self.input_ids = input_ids
+        self.max_new_tokens = max_new_tokens
+        self.eos_token_id = eos_token_id
+        self.streamer = streamer
+        self.output_ids = []
+        self.future = Future()
+
+    def append(self, token):
+        """
+        Append the new token and return whether the sequence is finished.
+        """
+        self.output_ids.append(token)
+        if self.streamer is not None:
+            self.streamer.put(np.array([[token]], dtype="int64"))
+        if self.eos_token_id is not None and token in self.eos_token_id:
+            return True
+        return len(self.output_ids) >= self.max_new_tokens
+
+    def finish(self, exception=None):
+        if self.streamer is not None:
+            self.streamer.end()
+        if exception is not None:
+            self.future.set_exception(exception)
+        else:
+            self.future.set_result(self.output_ids)
+
+
+class ContinuousBatchingEngine:
+    """
+    The iteration-level scheduler for the decoder-only models of :class:`GenerationMixin`. Unlike
+    `generate` which runs a static batch until its longest sequence is finished, the engine admits
+    the waiting requests into the free slots and evicts the finished sequences between the decoding
+    steps, so the throughput of the mixed-length requests is not dictated by the longest one.
+
+    The sequences of different lengths share one batched cache which is left padded along the
+    sequence axis, the padded positions are masked by the 2D `attention_mask` and the `position_ids`
+    of every sequence are kept from its own prompt. So the model must accept the 2D `attention_mask`
+    and return its cache when `use_cache=True`, such as GPT and LLaMA.
+
+    Args:
+        model (PretrainedModel): The decoder-only model with :class:`GenerationMixin`.
+        max_batch_size (int, optional): The max number of sequences decoded in one step. Defaults to 8.
+        decode_strategy (str, optional): The decoding strategy, "greedy_search" or "sampling".
+            Defaults to "greedy_search".
+        top_k (int, optional): The number of highest probability tokens to keep for top-k-filtering
+            in "sampling" strategy. Defaults to 0, which means no effect.
+        top_p (float, optional): The cumulative probability for top-p-filtering in "sampling" strategy.
+            Defaults to 1.0, which means no effect.
+        temperature (float, optional): The value used to module the next token probabilities in
+            "sampling" strategy. Defaults to 1.0, which means no effect.
+        eos_token_id (int|list, optional): The default id(s) of the end-of-sequence token. Defaults to
+            the `eos_token_id` of the model config.
+        pad_token_id (int, optional): The id of the padding token. Defaults to the `pad_token_id` of
+            the model config, or 0 if it is None.
+        cache_seq_axis (int, optional): The sequence axis of the cache tensors, the batch axis must be 0.
+            It is 2 for GPT ([batch_size, num_heads, seq_len, head_dim]) and 1 for LLaMA
+            ([batch_size, seq_len, num_heads, head_dim]). Defaults to 2.
+
+    Example:
+        .. code-block::
+
+            from paddlenlp.transformers import AutoModelForCausalLM, AutoTokenizer
+            from paddlenlp.transformers.continuous_batching import ContinuousBatchingEngine
+
+            tokenizer = AutoTokenizer.from_pretrained("gpt2-en")
+            model = AutoModelForCausalLM.from_pretrained("gpt2-en")
+            model.eval()
+            engine = ContinuousBatchingEngine(model, max_batch_size=8)
+            engine.start()
+            futures = [
+                engine.add_request(tokenizer(text)["input_ids"], max_new_tokens=max_new_tokens)
+                for text, max_new_tokens in [("Hello,", 64), ("An increasing sequence: one,", 8)]
+            ]
+            print([tokenizer.decode(future.result()) for future in futures])
+            engine.stop()
+    """
+
+    def __init__(
+        self,
+        model,
+        max_batch_size=8,
+        decode_strategy="greedy_search",
+        top_k=0,
+        top_p=1.0,
+        temperature=1.0,
+        eos_token_id=None,
+        pad_token_id=None,
+        cache_seq_axis=2,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("The `max_batch_size` must be positive, but received {}.".format(max_batch_size))
+        if decode_strategy not in ("greedy_search", "sampling"):
+            raise ValueError(
+                "`decode_strategy` must be one of 'greedy_search' and 'sampling' in continuous batching, "
+                "but received {}.".format(decode_strategy)
+            )
+        if getattr(model, "is_encoder_decoder", False):
+            raise ValueError("Continuous batching only supports the decoder-only models.")
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.decode_strategy = decode_strategy
+        self.top_k = top_k
+        self.top_p = top_p
+        self.temperature = temperature
+        config = getattr(model, "config", None)
+        if eos_token_id is None and config is not None:
+            eos_token_id = getattr(config, "eos_token_id", None)
+        self.eos_token_id = eos_token_id
+        if pad_token_id is None and config is not None:
+            pad_token_id = getattr(config, "pad_token_id", None)
+        self.pad_token_id = pad_token_id if pad_token_id is not None else 0
+        self.cache_seq_axis = cache_seq_axis
+
+        self._waiting = queue.Queue()
+        self._running = []
+        self._cache = None
+        # The [batch_size, cache_len] mask of the valid cache positions
+        self._attention_mask = None
+        # The [batch_size, 1] next input tokens and their positions
+        self._next_tokens = None
+        self._position_ids = None
+
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._wakeup = threading.Event()
+
+    @property
+    def num_running(self):
+        return len(self._running)
+
+    @property
+    def num_waiting(self):
+        return self._waiting.qsize()
+
+    def add_request(self, input_ids, max_new_tokens=20, eos_token_id=None, streamer=None):
+        """
+        Add a generation request, it is admitted into the running batch once there is a free slot.
+
+        Args:
+            input_ids (list[int]): The token ids of the prompt.
+            max_new_tokens (int, optional): The max number of the generated tokens. Defaults to 20.
+            eos_token_id (int|list, optional): The id(s) of the end-of-sequence token. Defaults to
+                the `eos_token_id` of the engine.
+            streamer (BaseStreamer, optional): The streamer receiving the generated tokens step by step.
+                Defaults to None.
+
+        Returns:
+            concurrent.futures.Future: The future of the list of the generated token ids.
+        """
+        if isinstance(input_ids, paddle.Tensor):
+            input_ids = input_ids.numpy()
+        input_ids = np.asarray(input_ids, dtype="int64").reshape([-1]).tolist()
+        if len(input_ids) == 0:
+            raise ValueError("The `input_ids` of the generation request must not be empty.")
+        if max_new_tokens < 1:
+            raise ValueError("The `max_new_tokens` must be positive, but received {}.".format(max_new_tokens))
+        eos_token_id = eos_token_id if eos_token_id is not None else self.eos_token_id
+        if eos_token_id is not None and not isinstance(eos_token_id, (list, tuple)):
+            eos_token_id = [eos_token_id]
+        sequence = _Sequence(input_ids, max_new_tokens, eos_token_id, streamer)
+        self._waiting.put(sequence)
+        self._wakeup.set()
+        return sequence.future
+
+    def has_unfinished_requests(self):
+        return self.num_running > 0 or self.num_waiting > 0
+
+    def _select_tokens(self, logits):
+        logits = self.model.adjust_logits_during_generation(logits)
+        if self.decode_strategy == "greedy_search":
+            return paddle.argmax(logits, axis=-1).unsqueeze(-1)
+        if self.temperature is not None and self.temperature != 1.0:
+            logits = logits / self.temperature
+        probs = F.softmax(logits)
+        if self.top_k is not None and self.top_k != 0:
+            probs = TopKProcess(probs, self.top_k, 1)
+        if self.top_p is not None and self.top_p < 1.0:
+            probs = TopPProcess(probs, self.top_p, 1)
+        return paddle.multinomial(probs)
+
+    def _forward(self, input_ids, attention_mask, position_ids, cache):
+        model_inputs = self.model.prepare_inputs_for_generation(
+            input_ids,
+            use_cache=True,
+            cache=cache,
+            past_key_values=cache,
+            attention_mask=attention_mask,
+            position_ids=position_ids,
+        )
+        outputs = self.model(**model_inputs)
+        logits = _get_logits_from_outputs(outputs)[:, -1, :]
+        return self._select_tokens(logits), _get_cache_from_outputs(outputs)
+
+    def _pad_cache(self, cache, pad_len):
+        if pad_len == 0:
+            return cache
+
+        def _pad(tensor):
+            shape = list(tensor.shape)
+            shape[self.cache_seq_axis] = pad_len
+            return paddle.concat([paddle.zeros(shape, dtype=tensor.dtype), tensor], axis=self.cache_seq_axis)
+
+        return _map_cache(_pad, cache)
+
+    def _pad_mask(self, mask, pad_len):
+        if pad_len == 0:
+            return mask
+        return paddle.concat([paddle.zeros([mask.shape[0], pad_len], dtype=mask.dtype), mask], axis=-1)
+
+    def _prefill(self, sequences):
+        """
+        Run the prompts of the new sequences in one left padded batch, return the sequences still
+        running and their states.
+        """
+        max_len = max(len(sequence.input_ids) for sequence in sequences)
+        input_ids = np.full([len(sequences), max_len], self.pad_token_id, dtype="int64")
+        attention_mask = np.zeros([len(sequences), max_len], dtype="int64")
+        for i, sequence in enumerate(sequences):
+            input_ids[i, max_len - len(sequence.input_ids) :] = sequence.input_ids
+            attention_mask[i, max_len - len(sequence.input_ids) :] = 1
+        position_ids = np.clip(np.cumsum(attention_mask, axis=-1) - 1, 0, None)
+        attention_mask = paddle.to_tensor(attention_mask)
+        next_tokens, cache = self._forward(
+            paddle.to_tensor(input_ids), attention_mask, paddle.to_tensor(position_ids), None
+        )
+        return next_tokens, cache, attention_mask, paddle.to_tensor(position_ids[:, -1:] + 1)
+
+    def _append_tokens(self, sequences, next_tokens):
+        """
+        Append the next tokens to the sequences, finish the finished ones and return the indices of the
+        sequences still running.
+        """
+        keep = []
+        for index, (sequence, token) in enumerate(zip(sequences, next_tokens.numpy().reshape([-1]).tolist())):
+            if sequence.append(token):
+                sequence.finish()
+            else:
+                keep.append(index)
+        return keep
+
+    def _select(self, keep, cache, attention_mask, next_tokens, position_ids):
+        """
+        Gather the states of the kept sequences, the leading positions only padded for the evicted
+        sequences are dropped from the cache.
+        """
+        index = paddle.to_tensor(keep, dtype="int64")
+        attention_mask = paddle.gather(attention_mask, index, axis=0)
+        valid = attention_mask.numpy().any(axis=0)
+        start = int(np.argmax(valid)) if valid.any() else 0
+
+        def _gather(tensor):
+            tensor = paddle.gather(tensor, index, axis=0)
+            if start > 0:
+                tensor = paddle.slice(
+                    tensor, axes=[self.cache_seq_axis], starts=[start], ends=[tensor.shape[self.cache_seq_axis]]
+                )
+            return tensor
+
+        return (
+            _map_cache(_gather, cache),
+            attention_mask[:, start:],
+            paddle.gather(next_tokens, index, axis=0),
+            paddle.gather(position_ids, index, axis=0),
+        )
+
+    def _reset(self):
+        self._running = []
+        self._cache = self._attention_mask = self._next_tokens = self._position_ids = None
+
+    def _admit(self):
+        sequences = []
+        while len(self._running) + len(sequences) < self.max_batch_size:
+            try:
+                sequences.append(self._waiting.get_nowait())
+            except queue.Empty:
+                break
+        if not sequences:
+            return
+        try:
+            next_tokens, cache, attention_mask, position_ids = self._prefill(sequences)
+        except Exception as e:
+            logger.warning("Failed to prefill the generation requests: {}".format(e))
+            for sequence in sequences:
+                sequence.finish(e)
+            return
+
+        # The first token is generated by the prefill, the sequences finished by it never join the batch
+        keep = self._append_tokens(sequences, next_tokens)
+        if not keep:
+            return
+        if len(keep) < len(sequences):
+            sequences = [sequences[index] for index in keep]
+            cache, attention_mask, next_tokens, position_ids = self._select(
+                keep, cache, attention_mask, next_tokens, position_ids
+            )
+
+        if self._running:
+            # Left pad the shorter cache so that the new sequences could join the running batch
+            running_len, new_len = self._attention_mask.shape[-1], attention_mask.shape[-1]
+            max_len = max(running_len, new_len)
+            self._cache = _map_cache(
+                lambda running, new: paddle.concat([running, new], axis=0),
+                self._pad_cache(self._cache, max_len - running_len),
+                self._pad_cache(cache, max_len - new_len),
+            )
+            self._attention_mask = paddle.concat(
+                [
+                    self._pad_mask(self._attention_mask, max_len - running_len),
+                    self._pad_mask(attention_mask, max_len - new_len),
+                ],
+                axis=0,
+            )
+            self._next_tokens = paddle.concat([self._next_tokens, next_tokens], axis=0)
+            self._position_ids = paddle.concat([self._position_ids, position_ids], axis=0)
+        else:
+            self._cache, self._attention_mask = cache, attention_mask
+            self._next_tokens, self._position_ids = next_tokens, position_ids
+        self._running.extend(sequences)
+
+    @paddle.no_grad()
+    def step(self):
+        """
+        Run one scheduling iteration: admit the waiting requests into the free slots, decode one
+        token for every running sequence and evict the finished sequences.
+        """
+        self._admit()
+        if not self._running:
+            return
+        attention_mask = paddle.concat(
+            [self._attention_mask, paddle.ones([self._attention_mask.shape[0], 1], dtype="int64")], axis=-1
+        )
+        try:
+            next_tokens, cache = self._forward(self._next_tokens, attention_mask, self._position_ids, self._cache)
+        except Exception as e:
+            logger.warning("Failed to decode the running generation requests: {}".format(e))
+            for sequence in self._running:
+                sequence.finish(e)
+            self._reset()
+            return
+        position_ids = self._position_ids + 1
+
+        keep = self._append_tokens(self._running, next_tokens)
+        if not keep:
+            self._reset()
+        elif len(keep) < len(self._running):
+            self._running = [self._running[index] for index in keep]
+            self._cache, self._attention_mask, self._next_tokens, self._position_ids = self._select(
+                keep, cache, attention_mask, next_tokens, position_ids
+            )
+        else:
+            self._cache, self._attention_mask = cache, attention_mask
+            self._next_tokens, self._position_ids = next_tokens, position_ids
+
+    def run_until_complete(self):
+        """
+        Run the scheduling iterations in the current thread until all the requests are finished.
+        """
+        while self.has_unfinished_requests():
+            self.step()
+
+    def generate(self, input_ids_list, max_new_tokens=20):
+        """
+        Generate for a list of prompts with continuous batching, return the list of generated token ids
+        in the order of the prompts.
+        """
+        futures = [self.add_request(input_ids, max_new_tokens=max_new_tokens) for input_ids in input_ids_list]
+        if self._thread is None:
+            self.run_until_complete()
+        return [future.result() for future in futures]
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            if not self.has_unfinished_requests():
+                self._wakeup.wait(timeout=0.1)
+                self._wakeup.clear()
+                continue
+            self.step()
+
+    def start(self):
+        """
+        Start the background thread running the scheduling iterations.
+        """
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="paddlenlp-continuous-batching", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
@@ -19,6 +19,7 @@ import shutil
 
 from paddle.utils import try_import
 from .. import PretrainedTokenizer
+from ..tokenizer_utils import SubwordCache
 from paddlenlp.utils.log import logger
 
 __all__ = ["CTRLTokenizer"]
@@ -154,7 +155,7 @@ class CTRLTokenizer(PretrainedTokenizer):
             merges = merges_handle.read().split("\n")[1:-1]
         merges = [tuple(merge.split()) for merge in merges]
         self.bpe_ranks = dict(zip(merges, range(len(merges))))
-        self.cache = {}
+        self.cache = SubwordCache()
 
     @property
     def vocab_size(self):
@@ -167,8 +168,9 @@ class CTRLTokenizer(PretrainedTokenizer):
         return len(self.encoder)
 
     def bpe(self, token):
-        if token in self.cache:
-            return self.cache[token]
+        cached = self.cache.get(token)
+        if cached is not None:
+            return cached
         word = tuple(token)
         word = tuple(list(word[:-1]) + [word[-1] + "</w>"])
         pairs = get_pairs(word)
@@ -17,6 +17,7 @@ from __future__ import annotations
 import inspect
 from abc import ABC
 from collections import OrderedDict
+from queue import Queue
 from typing import Union
 
 import paddle
@@ -44,7 +45,7 @@ from paddlenlp.utils.log import logger
 from .model_outputs import ModelOutput
 from .utils import get_scale_by_dtype
 
-__all__ = ["GenerationMixin"]
+__all__ = ["GenerationMixin", "StaticKVCacheLayer", "BaseStreamer", "TextStreamer", "TextIteratorStreamer"]
 
 
 def get_unfinished_flag(
@@ -84,6 +85,115 @@ def get_unfinished_flag(
     return unfinished_flag
 
 
+class StaticKVCacheLayer:
+    """
+    The key/value cache of one attention layer pre-allocated to a fixed capacity. The new keys and
+    values of every decoding step are written in place at the position index instead of being
+    concatenated to the cache, so the cache is never reallocated during the generation. It behaves
+    like the `(key, value)` pair of the dynamic cache, indexing or unpacking it returns the valid
+    part of the buffers.
+
+    Args:
+        key (Tensor): The keys computed so far, used to initialize the buffer.
+        value (Tensor): The values computed so far, used to initialize the buffer.
+        capacity (int): The number of the positions reserved for the following steps.
+        key_seq_axis (int): The sequence axis of the keys.
+        value_seq_axis (int): The sequence axis of the values.
+        batch_axis (int, optional): The batch axis of the keys and values. Defaults to 0.
+    """
+
+    def __init__(self, key, value, capacity, key_seq_axis, value_seq_axis, batch_axis=0):
+        self.key_seq_axis = key_seq_axis % len(key.shape)
+        self.value_seq_axis = value_seq_axis % len(value.shape)
+        self.batch_axis = batch_axis
+        self.length = key.shape[self.key_seq_axis]
+        self.max_length = self.length + capacity
+        self._key = self._allocate(key, self.key_seq_axis)
+        self._value = self._allocate(value, self.value_seq_axis)
+
+    def _allocate(self, tensor, axis):
+        shape = list(tensor.shape)
+        shape[axis] = self.max_length
+        buffer = paddle.zeros(shape, dtype=tensor.dtype)
+        self._assign(buffer, axis, 0, tensor)
+        return buffer
+
+    @staticmethod
+    def _assign(buffer, axis, start, tensor):
+        index = [slice(None)] * len(buffer.shape)
+        index[axis] = slice(start, start + tensor.shape[axis])
+        buffer[tuple(index)] = tensor
+
+    def _valid(self, buffer, axis):
+        return paddle.slice(buffer, axes=[axis], starts=[0], ends=[self.length])
+
+    @property
+    def key(self):
+        return self._valid(self._key, self.key_seq_axis)
+
+    @property
+    def value(self):
+        return self._valid(self._value, self.value_seq_axis)
+
+    # The aliases used by `MultiHeadAttention.Cache`
+    k = key
+    v = value
+
+    def __len__(self):
+        return 2
+
+    def __getitem__(self, index):
+        return (self.key, self.value)[index]
+
+    def __iter__(self):
+        return iter((self.key, self.value))
+
+    def update(self, key, value):
+        """
+        Write the new keys and values at the position index and return the valid keys and values.
+        """
+        num_new = key.shape[self.key_seq_axis]
+        if self.length + num_new > self.max_length:
+            raise ValueError(
+                "The static cache is full, the capacity is {} but {} positions are required.".format(
+                    self.max_length, self.length + num_new
+                )
+            )
+        self._assign(self._key, self.key_seq_axis, self.length, key)
+        self._assign(self._value, self.value_seq_axis, self.length, value)
+        self.length += num_new
+        return self.key, self.value
+
+    def reorder(self, index):
+        """
+        Reorder the cache along the batch axis in place, it is used by beam search.
+        """
+        # Some models such as Bloom merge the heads into the batch axis
+        rows = self._key.shape[self.batch_axis] // index.shape[0]
+        if rows > 1:
+            index = (index.unsqueeze(-1) * rows + paddle.arange(rows, dtype=index.dtype)).reshape([-1])
+        self._assign(self._key, self.key_seq_axis, 0, paddle.index_select(self.key, index, axis=self.batch_axis))
+        self._assign(
+            self._value, self.value_seq_axis, 0, paddle.index_select(self.value, index, axis=self.batch_axis)
+        )
+
+
+def map_kv_cache_layers(fn, cache):
+    """
+    Apply `fn` to every `(key, value)` pair or :class:`StaticKVCacheLayer` of the nested cache.
+    """
+    if isinstance(cache, StaticKVCacheLayer):
+        return fn(cache)
+    if isinstance(cache, (list, tuple)):
+        if len(cache) == 2 and all(isinstance(item, paddle.Tensor) for item in cache):
+            return fn(cache)
+        items = [map_kv_cache_layers(fn, item) for item in cache]
+        if isinstance(cache, tuple) and hasattr(cache, "_fields"):
+            return type(cache)(*items)
+        return type(cache)(items)
+    return cache
+
+
 class BeamHypotheses:
     def __init__(self, num_beams, length_penalty, early_stopping):
         """
@@ -314,6 +424,9 @@ class GenerationMixin(object):
     """
     # enable `to_static` method for CausalLM Model
     enable_to_static_method = False
+    # The (key_seq_axis, value_seq_axis, batch_axis) of the cache tensors, it is set by the models
+    # supporting the pre-allocated static cache, see `StaticKVCacheLayer`
+    static_cache_axes = None
 
     @staticmethod
     def prepare_input_ids_for_generation(bos_token_id, encoder_output=None):
@@ -496,6 +609,48 @@ class GenerationMixin(object):
 
         return model_kwargs
 
+    def prepare_static_cache_for_generation(self, model_kwargs, capacity):
+        """
+        Convert the cache in `model_kwargs` to :class:`StaticKVCacheLayer` which reserves `capacity`
+        positions for the following decoding steps, the converted cache is kept as it is.
+        """
+        if self.static_cache_axes is None:
+            raise ValueError("`use_static_cache` is not supported by {}.".format(self.__class__.__name__))
+        key_seq_axis, value_seq_axis, batch_axis = self.static_cache_axes
+
+        def _convert(layer):
+            if isinstance(layer, StaticKVCacheLayer):
+                return layer
+            return StaticKVCacheLayer(layer[0], layer[1], capacity, key_seq_axis, value_seq_axis, batch_axis)
+
+        # `cache` and `past_key_values` may refer to the same cache
+        converted = {}
+        for key in ("cache", "past_key_values"):
+            cache = model_kwargs.get(key, None)
+            if cache is None:
+                continue
+            if id(cache) not in converted:
+                converted[id(cache)] = map_kv_cache_layers(_convert, cache)
+            model_kwargs[key] = converted[id(cache)]
+        return model_kwargs
+
+    @staticmethod
+    def reorder_static_cache_for_generation(model_kwargs, index):
+        """
+        Reorder the :class:`StaticKVCacheLayer` in `model_kwargs` in place, every layer is reordered once.
+        """
+        reordered = set()
+
+        def _reorder(layer):
+            if isinstance(layer, StaticKVCacheLayer) and id(layer) not in reordered:
+                reordered.add(id(layer))
+                layer.reorder(index)
+            return layer
+
+        for key in ("cache", "past_key_values"):
+            if model_kwargs.get(key, None) is not None:
+                map_kv_cache_layers(_reorder, model_kwargs[key])
+
     @staticmethod
     def update_scores_for_generation(scores, next_scores, length, unfinished_flag):
         # update scores
@@ -683,7 +838,12 @@ class GenerationMixin(object):
             use_fp16_decoding: (bool, optional): Whether to use fp16 for decoding.
                 Only works when fast entry is avalible. Default to False.
             model_kwargs (dict): It can be used to specify additional kwargs
-                passed to the model.
+                passed to the model. The `streamer` (:class:`BaseStreamer`) in it
+                receives the generated tokens of every decoding step, it is only
+                supported by "greedy_search" and "sampling" strategies. If
+                `use_static_cache` in it is True, the cache is pre-allocated to
+                the max length after the first step and updated in place, which
+                is supported by GPT, LLaMA, Bloom and ChatGLM.
 
         Returns:
             tuple[Tensor]: It is a tuple contains two elements: ids and scores.
@@ -807,6 +967,24 @@ class GenerationMixin(object):
                 logger.warning("`use_faster` will be deprecated in near future. Please use `use_fast` instead. ")
                 self.deprecated_warnings["use_faster"] = True
 
+        # The options below fall back from FastGeneration, so they are applied after `use_faster`
+        streamer = model_kwargs.pop("streamer", None)
+        if streamer is not None:
+            if decode_strategy == "beam_search":
+                raise ValueError("`streamer` is not supported by 'beam_search' strategy.")
+            # FastGeneration returns after the whole sequence is decoded
+            use_fast = False
+
+        use_static_cache = model_kwargs.pop("use_static_cache", False)
+        if use_static_cache:
+            if self.static_cache_axes is None:
+                raise ValueError("`use_static_cache` is not supported by {}.".format(self.__class__.__name__))
+            if is_tracing:
+                raise ValueError("`use_static_cache` is not supported in dynamic-to-static mode.")
+            if not use_cache:
+                raise ValueError("`use_static_cache` requires `use_cache` to be True.")
+            use_fast = False
+
         bos_token_id = bos_token_id if bos_token_id is not None else self.config.bos_token_id
         eos_token_id = eos_token_id if eos_token_id is not None else self.config.eos_token_id
         pad_token_id = pad_token_id if pad_token_id is not None else self.config.pad_token_id
@@ -898,6 +1076,10 @@ class GenerationMixin(object):
             pad_token_id = eos_token_id
 
         model_kwargs["use_cache"] = use_cache
+        if streamer is not None:
+            model_kwargs["streamer"] = streamer
+        if use_static_cache:
+            model_kwargs["use_static_cache"] = use_static_cache
 
         if is_tracing and not paddle.is_tensor(max_length):
             min_len = input_ids.shape[-1]
@@ -1033,7 +1215,17 @@ class GenerationMixin(object):
                     **model_kwargs,
                 )
 
-    def greedy_search(self, input_ids, logits_processors, max_length, pad_token_id, eos_token_id, **model_kwargs):
+    def greedy_search(
+        self,
+        input_ids,
+        logits_processors,
+        max_length,
+        pad_token_id,
+        eos_token_id,
+        streamer=None,
+        use_static_cache=False,
+        **model_kwargs
+    ):
         model_kwargs["use_cache"] = model_kwargs.get("use_cache", True)
         logits_processors = logits_processors if logits_processors is not None else LogitsProcessorList()
         batch_size, cur_len = input_ids.shape
@@ -1074,6 +1266,8 @@ class GenerationMixin(object):
             cur_len += 1
 
             input_ids = paddle.concat([input_ids, next_tokens], axis=1)
+            if streamer is not None:
+                streamer.put(next_tokens)
 
             if eos_token_id is not None:
                 unfinished_flag = get_unfinished_flag(input_ids, unfinished_flag, eos_token_id)
@@ -1085,7 +1279,11 @@ class GenerationMixin(object):
             model_kwargs = self.update_model_kwargs_for_generation(
                 outputs, model_kwargs, is_encoder_decoder=self.is_encoder_decoder
             )
+            if use_static_cache:
+                model_kwargs = self.prepare_static_cache_for_generation(model_kwargs, max_length - cur_len)
 
+        if streamer is not None:
+            streamer.end()
         return input_ids[:, origin_len:], scores
 
     def sample(
@@ -1099,6 +1297,8 @@ class GenerationMixin(object):
         top_p=None,
         temperature=None,
         min_tokens_to_keep=1,
+        streamer=None,
+        use_static_cache=False,
         **model_kwargs
     ):
         model_kwargs["use_cache"] = model_kwargs.get("use_cache", True)
@@ -1159,6 +1359,8 @@ class GenerationMixin(object):
 
             cur_len += 1
             input_ids = paddle.concat([input_ids, next_tokens], axis=1)
+            if streamer is not None:
+                streamer.put(next_tokens)
 
             if eos_token_id is not None:
                 unfinished_flag = paddle.logical_and(unfinished_flag, next_tokens != eos_token_id)
@@ -1169,6 +1371,10 @@ class GenerationMixin(object):
             model_kwargs = self.update_model_kwargs_for_generation(
                 outputs, model_kwargs, is_encoder_decoder=self.is_encoder_decoder
             )
+            if use_static_cache:
+                model_kwargs = self.prepare_static_cache_for_generation(model_kwargs, max_length - cur_len)
+        if streamer is not None:
+            streamer.end()
         return input_ids[:, origin_len:], scores
 
     def to_static(self, path: str, config: dict):
@@ -1392,6 +1598,7 @@ class GenerationMixin(object):
         diversity_rate,
         pad_token_id,
         eos_token_id,
+        use_static_cache=False,
         **model_kwargs
     ):
         model_kwargs["use_cache"] = model_kwargs.get("use_cache", True)
@@ -1497,7 +1704,10 @@ class GenerationMixin(object):
             model_kwargs = self.update_model_kwargs_for_generation(
                 outputs, model_kwargs, is_encoder_decoder=self.is_encoder_decoder
             )
-            if "cache" in model_kwargs and model_kwargs["cache"] is not None:
+            if use_static_cache:
+                model_kwargs = self.prepare_static_cache_for_generation(model_kwargs, max_length - cur_len)
+                self.reorder_static_cache_for_generation(model_kwargs, beam_idx)
+            elif "cache" in model_kwargs and model_kwargs["cache"] is not None:
                 # reorder the cache
                 model_kwargs["cache"] = map_structure(
                     lambda x: paddle.index_select(x, beam_idx), model_kwargs["cache"]
@@ -1515,7 +1725,15 @@ class GenerationMixin(object):
         return pred_ids[:, origin_len:], scores
 
     def group_beam_search(
-        self, input_ids, beam_scorer, logits_processors, max_length, pad_token_id, eos_token_id, **model_kwargs
+        self,
+        input_ids,
+        beam_scorer,
+        logits_processors,
+        max_length,
+        pad_token_id,
+        eos_token_id,
+        use_static_cache=False,
+        **model_kwargs
     ):
         logits_processors = logits_processors if logits_processors is not None else LogitsProcessorList()
 
@@ -1625,7 +1843,10 @@ class GenerationMixin(object):
             model_kwargs = self.update_model_kwargs_for_generation(
                 outputs, model_kwargs, is_encoder_decoder=self.is_encoder_decoder
             )
-            if "cache" in model_kwargs and model_kwargs["cache"] is not None:
+            if use_static_cache:
+                model_kwargs = self.prepare_static_cache_for_generation(model_kwargs, max_length - cur_len)
+                self.reorder_static_cache_for_generation(model_kwargs, reordering_indices)
+            elif "cache" in model_kwargs and model_kwargs["cache"] is not None:
                 # reorder the cache
                 model_kwargs["cache"] = map_structure(
                     lambda x: paddle.index_select(x, reordering_indices), model_kwargs["cache"]
@@ -1643,6 +1864,153 @@ class GenerationMixin(object):
         return pred_ids[:, origin_len:], scores
 
 
+class BaseStreamer:
+    """
+    Base class of the streamers which receive the generated tokens step by step
+    from :meth:`GenerationMixin.generate`.
+    """
+
+    def put(self, value):
+        """Function that is called by `generate` to push the new tokens of a decoding step."""
+        raise NotImplementedError()
+
+    def end(self):
+        """Function that is called by `generate` to signal the end of generation."""
+        raise NotImplementedError()
+
+
+class TextStreamer(BaseStreamer):
+    """
+    The streamer that decodes the tokens to text as soon as they form complete words and
+    prints the text to stdout. Only batch size 1 is supported.
+
+    Args:
+        tokenizer (PretrainedTokenizer): The tokenizer used to decode the tokens.
+        decode_kwargs (dict, optional): Additional keyword arguments passed along to
+            `tokenizer.decode`, such as `skip_special_tokens`.
+
+    Example:
+        .. code-block::
+
+            from paddlenlp.transformers import AutoModelForCausalLM, AutoTokenizer
+            from paddlenlp.transformers.generation_utils import TextStreamer
+
+            tokenizer = AutoTokenizer.from_pretrained("gpt2-en")
+            model = AutoModelForCausalLM.from_pretrained("gpt2-en")
+            inputs = tokenizer(["An increasing sequence: one,"], return_tensors="pd")
+            streamer = TextStreamer(tokenizer)
+            model.generate(**inputs, streamer=streamer, max_length=20)
+    """
+
+    def __init__(self, tokenizer, **decode_kwargs):
+        self.tokenizer = tokenizer
+        self.decode_kwargs = decode_kwargs
+        self.token_cache = []
+        self.print_len = 0
+
+    def put(self, value):
+        if len(value.shape) > 1 and value.shape[0] > 1:
+            raise ValueError("TextStreamer only supports batch size 1")
+        elif len(value.shape) > 1:
+            value = value[0]
+        if isinstance(value, paddle.Tensor):
+            value = value.numpy()
+        self.token_cache.extend(value.tolist())
+        text = self.tokenizer.decode(self.token_cache, **self.decode_kwargs)
+
+        if text.endswith("\n"):
+            # Flush the cache after a new line
+            printable_text = text[self.print_len :]
+            self.token_cache = []
+            self.print_len = 0
+        elif len(text) > 0 and _is_chinese_char(ord(text[-1])):
+            # The CJK characters are printed as soon as they are decoded
+            printable_text = text[self.print_len :]
+            self.print_len += len(printable_text)
+        else:
+            # Otherwise wait for the end of a word to avoid printing a partial word
+            printable_text = text[self.print_len : text.rfind(" ") + 1]
+            self.print_len += len(printable_text)
+        self.on_finalized_text(printable_text)
+
+    def end(self):
+        if len(self.token_cache) > 0:
+            text = self.tokenizer.decode(self.token_cache, **self.decode_kwargs)
+            printable_text = text[self.print_len :]
+            self.token_cache = []
+            self.print_len = 0
+        else:
+            printable_text = ""
+        self.on_finalized_text(printable_text, stream_end=True)
+
+    def on_finalized_text(self, text, stream_end=False):
+        """Prints the new text to stdout, override it to send the text to other places."""
+        print(text, flush=True, end="" if not stream_end else None)
+
+
+class TextIteratorStreamer(TextStreamer):
+    """
+    The streamer that stores the decoded text in a queue to be consumed by an iterator, it is
+    useful to read the text from another thread, such as a server sending the text as soon as
+    it is generated.
+
+    Args:
+        tokenizer (PretrainedTokenizer): The tokenizer used to decode the tokens.
+        timeout (float, optional): The seconds to wait for the next text, None means waiting forever.
+            Defaults to None.
+        decode_kwargs (dict, optional): Additional keyword arguments passed along to
+            `tokenizer.decode`, such as `skip_special_tokens`.
+
+    Example:
+        .. code-block::
+
+            from threading import Thread
+            from paddlenlp.transformers.generation_utils import TextIteratorStreamer
+
+            streamer = TextIteratorStreamer(tokenizer)
+            thread = Thread(target=model.generate, kwargs=dict(**inputs, streamer=streamer, max_length=20))
+            thread.start()
+            for new_text in streamer:
+                print(new_text, end="")
+            thread.join()
+    """
+
+    def __init__(self, tokenizer, timeout=None, **decode_kwargs):
+        super().__init__(tokenizer, **decode_kwargs)
+        self.text_queue = Queue()
+        self.stop_signal = None
+        self.timeout = timeout
+
+    def on_finalized_text(self, text, stream_end=False):
+        if len(text) > 0:
+            self.text_queue.put(text, timeout=self.timeout)
+        if stream_end:
+            self.text_queue.put(self.stop_signal, timeout=self.timeout)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        value = self.text_queue.get(timeout=self.timeout)
+        if value == self.stop_signal:
+            raise StopIteration()
+        return value
+
+
+def _is_chinese_char(cp):
+    """Checks whether `cp` is the codepoint of a CJK character."""
+    return (
+        (cp >= 0x4E00 and cp <= 0x9FFF)
+        or (cp >= 0x3400 and cp <= 0x4DBF)
+        or (cp >= 0x20000 and cp <= 0x2A6DF)
+        or (cp >= 0x2A700 and cp <= 0x2B73F)
+        or (cp >= 0x2B740 and cp <= 0x2B81F)
+        or (cp >= 0x2B820 and cp <= 0x2CEAF)
+        or (cp >= 0xF900 and cp <= 0xFAFF)
+        or (cp >= 0x2F800 and cp <= 0x2FA1F)
+    )
+
+
 class LogitsProcessorList:
     """use ordered dict to store processors"""
 
@@ -30,6 +30,7 @@ from ...layers import Linear as TransposedLinear
 from ...utils.converter import StateDictNameMapping
 from ...utils.log import logger
 from .. import PretrainedModel, register_base_model
+from ..generation_utils import StaticKVCacheLayer
 from ..model_outputs import (
     BaseModelOutputWithPastAndCrossAttentions,
     CausalLMOutputWithCrossAttentions,
@@ -118,11 +119,14 @@ class MultiHeadAttention(nn.Layer):
 
         assert not isinstance(cache, self.StaticCache), "cache currently does not support the StaticCache type"
 
-        if isinstance(cache, self.Cache):
+        if isinstance(cache, StaticKVCacheLayer):
+            # for decoder self-attention in inference with the pre-allocated cache
+            k, v = cache.update(k, v)
+        elif isinstance(cache, self.Cache):
             # for decoder self-attention in inference
             k = tensor.concat([cache.k, k], axis=2)
             v = tensor.concat([cache.v, v], axis=2)
-        if use_cache is True:
+        if use_cache is True and not isinstance(cache, StaticKVCacheLayer):
             cache = self.Cache(k, v)
 
         return (q, k, v, cache) if use_cache else (q, k, v, None)
@@ -146,11 +150,14 @@ class MultiHeadAttention(nn.Layer):
         else:
             k, v = self.compute_kv(key, value)
 
-        if isinstance(cache, self.Cache):
+        if isinstance(cache, StaticKVCacheLayer):
+            # for decoder self-attention in inference with the pre-allocated cache
+            k, v = cache.update(k, v)
+        elif isinstance(cache, self.Cache):
             # for decoder self-attention in inference
             k = tensor.concat([cache.k, k], axis=2)
             v = tensor.concat([cache.v, v], axis=2)
-        if use_cache is True:
+        if use_cache is True and not isinstance(cache, StaticKVCacheLayer):
             cache = self.Cache(k, v)
 
         return (q, k, v, None) if use_cache is False else (q, k, v, cache)
@@ -539,6 +546,8 @@ class GPTPretrainedModel(PretrainedModel):
     pretrained_resource_files_map = GPT_PRETRAINED_RESOURCE_FILES_MAP
     base_model_prefix = "gpt"
     config_class = GPTConfig
+    # [batch_size, num_heads, seq_len, head_dim]
+    static_cache_axes = (2, 2, 0)
 
     @classmethod
     def _get_name_mappings(cls, config: GPTConfig) -> list[StateDictNameMapping]:
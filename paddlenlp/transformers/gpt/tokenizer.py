@@ -23,6 +23,7 @@ import sentencepiece as spm
 from paddle.utils import try_import
 
 from .. import AddedToken, PretrainedTokenizer
+from ..tokenizer_utils import SubwordCache
 
 __all__ = [
     "GPTTokenizer",
@@ -418,7 +419,7 @@ class GPTTokenizer(PretrainedTokenizer):
 
         bpe_merges = [tuple(merge.split()) for merge in bpe_data]
         self.bpe_ranks = dict(zip(bpe_merges, range(len(bpe_merges))))
-        self.cache = {}
+        self.cache = SubwordCache()
         self.add_prefix_space = add_prefix_space
         self.add_bos_token = add_bos_token
 
@@ -444,8 +445,9 @@ class GPTTokenizer(PretrainedTokenizer):
         return self.convert_tokens_to_ids(self.eol_token)
 
     def bpe(self, token):
-        if token in self.cache:
-            return self.cache[token]
+        cached = self.cache.get(token)
+        if cached is not None:
+            return cached
         word = tuple(token)
         pairs = get_pairs(word)
 
@@ -40,6 +40,7 @@ except:
 
 import warnings
 
+from paddlenlp.transformers.generation_utils import StaticKVCacheLayer
 from paddlenlp.transformers.model_outputs import (
     BaseModelOutputWithPastAndCrossAttentions,
     CausalLMOutputWithCrossAttentions,
@@ -416,12 +417,16 @@ class LlamaAttention(nn.Layer):
         query_states, key_states = apply_rotary_pos_emb(query_states, key_states, cos, sin, offset=offset)
         # [bsz, nh, t, hd]
 
-        if past_key_value is not None:
+        if isinstance(past_key_value, StaticKVCacheLayer):
+            # write k, v to the pre-allocated cache in place
+            key_states, value_states = past_key_value.update(key_states, value_states)
+        elif past_key_value is not None:
             # reuse k, v, self_attention
             key_states = paddle.concat([past_key_value[0], key_states], axis=1)
             value_states = paddle.concat([past_key_value[1], value_states], axis=1)
 
-        past_key_value = (key_states, value_states) if use_cache else None
+        if not isinstance(past_key_value, StaticKVCacheLayer):
+            past_key_value = (key_states, value_states) if use_cache else None
 
         attn_output, attn_weights = scaled_dot_product_attention(
             config=self.config,
@@ -506,6 +511,8 @@ class LlamaDecoderLayer(nn.Layer):
 class LlamaPretrainedModel(PretrainedModel):
     config_class = LlamaConfig
     base_model_prefix = "llama"
+    # [batch_size, seq_len, num_heads, head_dim]
+    static_cache_axes = (1, 1, 0)
 
     @classmethod
     def _get_name_mappings(cls, config: LlamaConfig) -> list[StateDictNameMapping]:
@@ -655,6 +662,15 @@ class LlamaModel(LlamaPretrainedModel):
 
     @staticmethod
     def _prepare_decoder_attention_mask(attention_mask, input_shape, past_key_values_length, dtype):
+        if attention_mask is not None and len(attention_mask.shape) == 4:
+            # The prebuilt mask of [bsz, 1, tgt_seq_len, src_seq_len] is used as is, e.g. the block-diagonal
+            # causal mask of the packed sequences, 1 (or True) means the position could be attended
+            if attention_mask.dtype in [paddle.float16, paddle.bfloat16, paddle.float32, paddle.float64]:
+                # The additive mask is already in the form added to the attention scores
+                return attention_mask.astype(dtype)
+            inverted_mask = 1.0 - attention_mask.astype(dtype)
+            return masked_fill(inverted_mask, inverted_mask.cast("bool"), float(finfo(dtype).min))
+
         # create causal mask
         # [bsz, seq_len] -> [bsz, 1, tgt_seq_len, src_seq_len]
         combined_attention_mask = None
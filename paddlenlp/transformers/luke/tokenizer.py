@@ -28,6 +28,7 @@ import warnings
 from itertools import repeat
 
 from .. import RobertaBPETokenizer
+from ..tokenizer_utils import SubwordCache
 
 try:
     from functools import lru_cache
@@ -188,7 +189,7 @@ class LukeTokenizer(RobertaBPETokenizer):
             bpe_merges = merges_handle.read().split("\n")[1:-1]
         bpe_merges = [tuple(merge.split()) for merge in bpe_merges]
         self.bpe_ranks = dict(zip(bpe_merges, range(len(bpe_merges))))
-        self.cache = {}
+        self.cache = SubwordCache()
         self.added_tokens_encoder = {}
         self.added_tokens_decoder = {}
 
@@ -546,8 +547,9 @@ class LukeTokenizer(RobertaBPETokenizer):
         return tokenized_text
 
     def bpe(self, token):
-        if token in self.cache:
-            return self.cache[token]
+        cached = self.cache.get(token)
+        if cached is not None:
+            return cached
         word = tuple(token)
         pairs = get_pairs(word)
 
@@ -30,6 +30,7 @@ from .. import (
     WordpieceTokenizer,
 )
 from ..gpt.tokenizer import bytes_to_unicode
+from ..tokenizer_utils import SubwordCache
 
 __all__ = ["RobertaTokenizer", "RobertaChineseTokenizer", "RobertaBPETokenizer"]
 
@@ -439,7 +440,7 @@ class RobertaBPETokenizer(GPTTokenizer):
             bpe_data = merges_handle.read().split("\n")[1:-1]
         bpe_merges = [tuple(merge.split()) for merge in bpe_data]
         self.bpe_ranks = dict(zip(bpe_merges, range(len(bpe_merges))))
-        self.cache = {}
+        self.cache = SubwordCache()
         self.add_prefix_space = add_prefix_space
 
         re = try_import("regex")
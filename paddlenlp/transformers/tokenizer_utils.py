@@ -20,11 +20,15 @@ import io
 import itertools
 import json
 import re
+import threading
 import unicodedata
+import weakref
 from collections import OrderedDict
 from typing import Dict, List, Optional, Tuple, Union
 
+import dill
 import six
+from multiprocess import Pool
 from paddle.utils import try_import
 
 from paddlenlp.utils.log import logger
@@ -54,6 +58,7 @@ from .utils import InitTrackerMeta, fn_args_to_dict
 __all__ = [
     "PretrainedTokenizer",
     "BPETokenizer",
+    "SubwordCache",
     "tokenize_chinese_chars",
     "is_chinese_char",
     "normalize_chars",
@@ -499,6 +504,113 @@ def tokenize_chinese_chars(text):
     return output
 
 
+class SubwordCache(object):
+    """
+    The thread-safe cache of the sub-words of a word used by the BPE and WordPiece tokenizers, the entries
+    are evicted in LRU order when the number of entries exceeds `max_size`, which bounds the memory of the
+    long-running processes. It could be used like a dict, and `get` also counts the hits and misses.
+
+    Args:
+        max_size (int, optional): The max number of the cached words. Defaults to `SubwordCache.DEFAULT_MAX_SIZE`.
+    """
+
+    DEFAULT_MAX_SIZE = 65536
+
+    def __init__(self, max_size=None):
+        max_size = self.DEFAULT_MAX_SIZE if max_size is None else max_size
+        if max_size < 1:
+            raise ValueError("The `max_size` of SubwordCache must be positive, but received {}.".format(max_size))
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, word):
+        return word in self._entries
+
+    def __getitem__(self, word):
+        return self._entries[word]
+
+    def __setitem__(self, word, sub_words):
+        with self._lock:
+            self._entries[word] = sub_words
+            self._entries.move_to_end(word)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_lock")
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get(self, word, default=None):
+        with self._lock:
+            sub_words = self._entries.get(word, None)
+            if sub_words is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(word)
+            self.hits += 1
+            return sub_words
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Return the hit/miss counters and the number of the cached words.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total > 0 else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
+
+
+# The process pools of the tokenizers with parallel encoding enabled, keyed by the id of the tokenizer
+_ENCODE_POOLS = {}
+_ENCODE_WORKER_TOKENIZER = None
+
+
+def _init_encode_worker(tokenizer_bytes):
+    # The tokenizer is shipped once per worker instead of once per batch. It is serialized in advance so that
+    # the pool, which keeps its initargs, does not keep the tokenizer alive
+    global _ENCODE_WORKER_TOKENIZER
+    tokenizer = dill.loads(tokenizer_bytes)
+    tokenizer._encode_num_workers = 0
+    _ENCODE_WORKER_TOKENIZER = tokenizer
+
+
+def _encode_worker(batch_text_or_text_pairs, is_split_into_words, return_offsets_mapping, stride, kwargs):
+    return [
+        _ENCODE_WORKER_TOKENIZER._encode_text_or_text_pair(
+            ids_or_pair_ids, is_split_into_words, return_offsets_mapping, stride, **kwargs
+        )
+        for ids_or_pair_ids in batch_text_or_text_pairs
+    ]
+
+
+def _close_encode_pool(key):
+    pool = _ENCODE_POOLS.pop(key, None)
+    if pool is not None:
+        pool.terminate()
+
+
 @six.add_metaclass(InitTrackerMeta)
 class PretrainedTokenizer(PretrainedTokenizerBase):
     """
@@ -1004,6 +1116,107 @@ class PretrainedTokenizer(PretrainedTokenizerBase):
             **kwargs,
         )
 
+    def enable_parallel_encoding(self, num_workers: int, min_batch_size: int = 256):
+        """
+        Distributes the tokenization of the large batches across a pool of `num_workers` processes. The
+        tokenizer is serialized when calling it and shipped to every worker once when the pool is created, so
+        call it again after changing the tokenizer (such as adding tokens) to refresh the workers. If the
+        tokenizer could not be serialized, a warning is logged and the tokenization stays in the current process.
+
+        Args:
+            num_workers (int):
+                The number of the worker processes, `0` or `1` disables the parallel encoding.
+            min_batch_size (int, optional):
+                The batches smaller than it are tokenized in the current process since the communication
+                costs more than the tokenization. Defaults to `256`.
+        """
+        self.disable_parallel_encoding()
+        self._encode_min_batch_size = min_batch_size
+        if num_workers <= 1:
+            return
+        try:
+            self._encode_tokenizer_bytes = dill.dumps(self)
+        except Exception as e:
+            logger.warning(
+                f"Failed to serialize {self.__class__.__name__} for the parallel encoding, the batches are "
+                f"tokenized in the current process: {e}"
+            )
+            return
+        self._encode_num_workers = num_workers
+
+    def disable_parallel_encoding(self):
+        """
+        Disables the parallel encoding and shuts down the worker processes.
+        """
+        self._encode_num_workers = 0
+        self._encode_tokenizer_bytes = None
+        _close_encode_pool(id(self))
+
+    def _get_encode_pool(self, batch_size):
+        num_workers = getattr(self, "_encode_num_workers", 0)
+        if num_workers <= 1 or batch_size < max(self._encode_min_batch_size, 2):
+            return None
+        if id(self) not in _ENCODE_POOLS:
+            _ENCODE_POOLS[id(self)] = Pool(
+                num_workers, initializer=_init_encode_worker, initargs=(self._encode_tokenizer_bytes,)
+            )
+            weakref.finalize(self, _close_encode_pool, id(self))
+        return _ENCODE_POOLS[id(self)]
+
+    def _get_input_ids(self, text, is_split_into_words=False, **kwargs):
+        """
+        Returns the input ids of `text`, and the tokens if `text` is a string so that the offsets could be
+        computed from them.
+        """
+        if isinstance(text, str):
+            tokens = self.tokenize(text, **kwargs)
+            return self.convert_tokens_to_ids(tokens), tokens
+        elif isinstance(text, (list, tuple)) and len(text) > 0 and isinstance(text[0], str):
+            if is_split_into_words:
+                tokens = list(itertools.chain(*(self.tokenize(t, is_split_into_words=True, **kwargs) for t in text)))
+                return self.convert_tokens_to_ids(tokens), None
+            else:
+                return self.convert_tokens_to_ids(text), None
+        elif isinstance(text, (list, tuple)) and len(text) > 0 and isinstance(text[0], int):
+            return text, None
+        else:
+            raise ValueError(
+                "Input is not valid. Should be a string, a list/tuple of strings or a list/tuple of integers."
+            )
+
+    def _get_offset_mapping_from_tokens(self, text, tokens):
+        if tokens is None:
+            return None
+        # The tokenizers overriding `get_offset_mapping` do not take the tokens
+        if type(self).get_offset_mapping is not PretrainedTokenizer.get_offset_mapping:
+            return self.get_offset_mapping(text)
+        return self.get_offset_mapping(text, split_tokens=tokens)
+
+    def _encode_text_or_text_pair(
+        self, ids_or_pair_ids, is_split_into_words, return_offsets_mapping, stride, **kwargs
+    ):
+        """
+        Tokenizes one example of `_batch_encode_plus`, returns the input ids of the text and the text pair,
+        and their offset mappings if needed, which are computed from the same tokens.
+        """
+        if not isinstance(ids_or_pair_ids, (list, tuple)):
+            ids, pair_ids = ids_or_pair_ids, None
+        elif is_split_into_words and not isinstance(ids_or_pair_ids[0], (list, tuple)):
+            ids, pair_ids = ids_or_pair_ids, None
+        else:
+            ids, pair_ids = ids_or_pair_ids
+
+        first_ids, first_tokens = self._get_input_ids(ids, is_split_into_words, **kwargs)
+        second_ids, second_tokens = (
+            self._get_input_ids(pair_ids, is_split_into_words, **kwargs) if pair_ids is not None else (None, None)
+        )
+        first_offsets, second_offsets = None, None
+        # The overflowing text pairs always need the offsets
+        if return_offsets_mapping or (stride > 0 and pair_ids is not None):
+            first_offsets = self._get_offset_mapping_from_tokens(ids, first_tokens)
+            second_offsets = self._get_offset_mapping_from_tokens(pair_ids, second_tokens)
+        return first_ids, second_ids, first_offsets, second_offsets
+
     def _batch_encode_plus(
         self,
         batch_text_or_text_pairs: Union[
@@ -1033,37 +1246,33 @@ class PretrainedTokenizer(PretrainedTokenizerBase):
         verbose: bool = True,
         **kwargs
     ) -> BatchEncoding:
-        def get_input_ids(text):
-            if isinstance(text, str):
-                tokens = self.tokenize(text, **kwargs)
-                return self.convert_tokens_to_ids(tokens)
-            elif isinstance(text, (list, tuple)) and len(text) > 0 and isinstance(text[0], str):
-                if is_split_into_words:
-                    tokens = list(
-                        itertools.chain(*(self.tokenize(t, is_split_into_words=True, **kwargs) for t in text))
-                    )
-                    return self.convert_tokens_to_ids(tokens)
-                else:
-                    return self.convert_tokens_to_ids(text)
-            elif isinstance(text, (list, tuple)) and len(text) > 0 and isinstance(text[0], int):
-                return text
-            else:
-                raise ValueError(
-                    "Input is not valid. Should be a string, a list/tuple of strings or a list/tuple of integers."
+        pool = self._get_encode_pool(len(batch_text_or_text_pairs))
+        if pool is not None:
+            num_chunks = min(len(batch_text_or_text_pairs), self._encode_num_workers * 4)
+            chunk_size = (len(batch_text_or_text_pairs) + num_chunks - 1) // num_chunks
+            chunks = [
+                (
+                    batch_text_or_text_pairs[i : i + chunk_size],
+                    is_split_into_words,
+                    return_offsets_mapping,
+                    stride,
+                    kwargs,
                 )
-
-        input_ids = []
-        for ids_or_pair_ids in batch_text_or_text_pairs:
-            if not isinstance(ids_or_pair_ids, (list, tuple)):
-                ids, pair_ids = ids_or_pair_ids, None
-            elif is_split_into_words and not isinstance(ids_or_pair_ids[0], (list, tuple)):
-                ids, pair_ids = ids_or_pair_ids, None
-            else:
-                ids, pair_ids = ids_or_pair_ids
-
-            first_ids = get_input_ids(ids)
-            second_ids = get_input_ids(pair_ids) if pair_ids is not None else None
-            input_ids.append((first_ids, second_ids))
+                for i in range(0, len(batch_text_or_text_pairs), chunk_size)
+            ]
+            encoded = list(itertools.chain(*pool.starmap(_encode_worker, chunks)))
+        else:
+            encoded = [
+                self._encode_text_or_text_pair(
+                    ids_or_pair_ids, is_split_into_words, return_offsets_mapping, stride, **kwargs
+                )
+                for ids_or_pair_ids in batch_text_or_text_pairs
+            ]
+        input_ids = [(first_ids, second_ids) for first_ids, second_ids, _, _ in encoded]
+        second_ids = input_ids[-1][1] if len(input_ids) > 0 else None
+        kwargs["offset_mappings"] = [
+            (first_offsets, second_offsets) for _, _, first_offsets, second_offsets in encoded
+        ]
 
         if stride > 0 and second_ids is not None:
             kwargs["batch_text_or_text_pairs"] = batch_text_or_text_pairs
@@ -1156,8 +1365,11 @@ class PretrainedTokenizer(PretrainedTokenizerBase):
                 )
 
                 text, text_pair = kwargs["batch_text_or_text_pairs"][example_id]
-                token_offset_mapping = self.get_offset_mapping(text)
-                token_pair_offset_mapping = self.get_offset_mapping(text_pair)
+                token_offset_mapping, token_pair_offset_mapping = kwargs["offset_mappings"][example_id]
+                if token_offset_mapping is None:
+                    token_offset_mapping = self.get_offset_mapping(text)
+                if token_pair_offset_mapping is None:
+                    token_pair_offset_mapping = self.get_offset_mapping(text_pair)
 
                 offset = 0
                 while offset < len(second_ids):
@@ -1215,6 +1427,10 @@ class PretrainedTokenizer(PretrainedTokenizerBase):
                     kwargs["text_pair"] = None
                     if kwargs["text_pairs"] is not None:
                         kwargs["text_pair"] = kwargs["text_pairs"][example_id]
+                    # The offsets computed during the tokenization, avoid tokenizing the text again
+                    kwargs["token_offset_mapping"], kwargs["token_pair_offset_mapping"] = kwargs["offset_mappings"][
+                        example_id
+                    ]
 
                 encoded_inputs = self.prepare_for_model(
                     first_ids,
@@ -1261,20 +1477,23 @@ class PretrainedTokenizer(PretrainedTokenizerBase):
                         batch_outputs_list[i][k] = v[i]
             return batch_outputs_list
 
-    def _get_bert_like_offset_mapping(self, text: str):
+    def _get_bert_like_offset_mapping(self, text: str, split_tokens: Optional[List[str]] = None):
         """
         Returns the map of tokens and the start and end index of their start and end character.
         Modified from https://github.com/bojone/bert4keras/blob/master/bert4keras/tokenizers.py#L372
         Args:
             text (str):
                 Input text.
+            split_tokens (Optional[List[str]]):
+                the tokens which has been split which can accelerate the operation.
         Returns:
             list: The offset map of input text.
 
         """
         if text is None:
             return None
-        split_tokens = self.tokenize(text)
+        if not split_tokens:
+            split_tokens = self.tokenize(text)
 
         normalized_text, char_mapping = "", []
 
@@ -1360,11 +1579,10 @@ class PretrainedTokenizer(PretrainedTokenizerBase):
         """
         if text is None:
             return None
-        split_tokens = self.tokenize(text)
 
         # bert-like tokenizer use the old-school code block
         if hasattr(self, "basic_tokenizer") or hasattr(self, "wordpiece_tokenizer"):
-            return self._get_bert_like_offset_mapping(text)
+            return self._get_bert_like_offset_mapping(text, split_tokens)
 
         if not split_tokens:
             split_tokens = self.tokenize(text)
@@ -1511,7 +1729,7 @@ class BPETokenizer(PretrainedTokenizer):
             self.byte_encoder = self._bytes_to_unicode()
             self.byte_decoder = {v: k for k, v in self.byte_encoder.items()}
             self.bpe_ranks = dict(zip(bpe_merges, range(len(bpe_merges))))
-            self.cache = {}
+            self.cache = SubwordCache()
             self.re = try_import("regex")
             self.special_tokens = special_tokens
 
@@ -1562,8 +1780,9 @@ class BPETokenizer(PretrainedTokenizer):
             return pairs
 
         def bpe(self, token):
-            if token in self.cache:
-                return self.cache[token]
+            cached = self.cache.get(token)
+            if cached is not None:
+                return cached
             word = tuple(token)
             pairs = self._get_pairs(word)
 
@@ -2860,8 +2860,12 @@ class PretrainedTokenizerBase(SpecialTokensMixin):
             text = kwargs.pop("text")
             text_pair = kwargs.pop("text_pair")
 
-            token_offset_mapping = self.get_offset_mapping(text)
-            token_pair_offset_mapping = self.get_offset_mapping(text_pair) if text_pair is not None else None
+            token_offset_mapping = kwargs.pop("token_offset_mapping", None)
+            token_pair_offset_mapping = kwargs.pop("token_pair_offset_mapping", None)
+            if token_offset_mapping is None:
+                token_offset_mapping = self.get_offset_mapping(text)
+            if token_pair_offset_mapping is None and text_pair is not None:
+                token_pair_offset_mapping = self.get_offset_mapping(text_pair)
             if max_length and total_len > max_length:
                 token_offset_mapping, token_pair_offset_mapping, _ = self.truncate_sequences(
                     token_offset_mapping,
@@ -0,0 +1,209 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from .log import logger
+
+__all__ = ["ResultCache", "hash_content"]
+
+
+def _serialize_default(obj):
+    # The arrays and images are hashed by their raw bytes since their repr may be truncated
+    if hasattr(obj, "tobytes"):
+        shape = getattr(obj, "shape", getattr(obj, "size", ""))
+        return "{}:{}".format(hashlib.md5(obj.tobytes()).hexdigest(), shape)
+    try:
+        return hashlib.md5(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+    except Exception:
+        return repr(obj)
+
+
+def hash_content(*contents):
+    """
+    Return the md5 hex digest of the contents, the keys of dict are sorted so that the same content
+    always gets the same hash.
+    """
+    serialized = json.dumps(contents, sort_keys=True, ensure_ascii=False, default=_serialize_default)
+    return hashlib.md5(serialized.encode("utf-8")).hexdigest()
+
+
+class ResultCache(object):
+    """
+    The thread-safe result cache keyed by the content hash, the in-memory tier is evicted in LRU
+    order when the number of entries exceeds `max_size`, and the entries older than `ttl` seconds
+    are expired. If `cache_dir` is set, the results are also written to the on-disk tier which is
+    looked up when the in-memory tier misses, the oldest files are removed when the number of them
+    exceeds `max_disk_size`.
+
+    Args:
+        max_size (int, optional): The max number of entries in the in-memory tier. Defaults to 1024.
+        ttl (float, optional): The seconds an entry keeps valid, None means never expired. Defaults to None.
+        cache_dir (str, optional): The directory of the on-disk tier, None means the on-disk tier is
+            disabled. Defaults to None.
+        max_disk_size (int, optional): The max number of entries in the on-disk tier. Defaults to 65536.
+    """
+
+    def __init__(self, max_size=1024, ttl=None, cache_dir=None, max_disk_size=65536):
+        if max_size < 1:
+            raise ValueError("The `max_size` of ResultCache must be positive, but received {}.".format(max_size))
+        if max_disk_size < 1:
+            raise ValueError(
+                "The `max_disk_size` of ResultCache must be positive, but received {}.".format(max_disk_size)
+            )
+        self._max_size = max_size
+        self._max_disk_size = max_disk_size
+        self._ttl = ttl
+        self._cache_dir = cache_dir
+        self._entries = OrderedDict()
+        # The keys of the on-disk tier from the oldest to the newest
+        self._disk_keys = OrderedDict()
+        if self._cache_dir is not None:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            self._load_disk_keys()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _is_expired(self, timestamp):
+        return self._ttl is not None and time.time() - timestamp > self._ttl
+
+    def _disk_path(self, key):
+        return os.path.join(self._cache_dir, key[:2], key + ".pkl")
+
+    def _load_disk_keys(self):
+        files = []
+        for root, _, file_names in os.walk(self._cache_dir):
+            for file_name in file_names:
+                if file_name.endswith(".pkl"):
+                    path = os.path.join(root, file_name)
+                    files.append((os.path.getmtime(path), file_name[: -len(".pkl")]))
+        for _, key in sorted(files):
+            self._disk_keys[key] = None
+        self._remove_from_disk(self._evict_disk_keys())
+
+    def _evict_disk_keys(self):
+        evicted = []
+        while len(self._disk_keys) > self._max_disk_size:
+            evicted.append(self._disk_keys.popitem(last=False)[0])
+        return evicted
+
+    def _remove_from_disk(self, keys):
+        for key in keys:
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+
+    def _get_from_disk(self, key):
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return False, None
+        try:
+            with open(path, "rb") as f:
+                timestamp, value = pickle.load(f)
+        except Exception as e:
+            logger.warning("Failed to load the cached result from {}: {}".format(path, e))
+            return False, None
+        if self._is_expired(timestamp):
+            self._remove_from_disk([key])
+            return False, None
+        return True, (timestamp, value)
+
+    def _put_to_disk(self, key, entry):
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to the temporary file first so that the readers never see the partial file
+        tmp_path = "{}.{}.tmp".format(path, threading.get_ident())
+        with open(tmp_path, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def _put_to_memory(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        """
+        Return a tuple of (hit, value), the value is a copy of the cached result.
+        """
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is not None and self._is_expired(entry[0]):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, copy.deepcopy(entry[1])
+            if self._cache_dir is None:
+                self.misses += 1
+                return False, None
+        # The file is read without holding the lock so that the other lookups are not blocked
+        found, entry = self._get_from_disk(key)
+        with self._lock:
+            if not found:
+                self._disk_keys.pop(key, None)
+                self.misses += 1
+                return False, None
+            self._put_to_memory(key, entry)
+            self.hits += 1
+            self.disk_hits += 1
+        return True, copy.deepcopy(entry[1])
+
+    def put(self, key, value):
+        entry = (time.time(), copy.deepcopy(value))
+        with self._lock:
+            self._put_to_memory(key, entry)
+            if self._cache_dir is None:
+                return
+            self._disk_keys[key] = None
+            self._disk_keys.move_to_end(key)
+            evicted = self._evict_disk_keys()
+        try:
+            self._put_to_disk(key, entry)
+        except Exception as e:
+            logger.warning("Failed to write the result to the on-disk cache: {}".format(e))
+        self._remove_from_disk(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Return the hit/miss counters and the size of the in-memory tier.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total > 0 else 0.0,
+                "size": len(self._entries),
+            }
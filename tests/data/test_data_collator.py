@@ -22,10 +22,12 @@ import paddle
 
 from paddlenlp.data import (
     DataCollatorForLanguageModeling,
+    DataCollatorForSequencePacking,
     DataCollatorForTokenClassification,
     DataCollatorForWholeWordMask,
     DataCollatorWithPadding,
     default_data_collator,
+    pack_sequences,
 )
 from paddlenlp.trainer import set_seed
 from paddlenlp.transformers import BertTokenizer
@@ -114,6 +116,34 @@ class DataCollatorIntegrationTest(unittest.TestCase):
         batch = data_collator(features)
         self.assertEqual(batch["input_ids"].shape, [2, 8])
 
+    def test_pack_sequences(self):
+        features = [{"input_ids": [5] * length, "labels": [1] * length} for length in [6, 3, 2, 4, 1]]
+        packed = pack_sequences(features, max_length=8)
+        self.assertEqual(sorted(sum((feature["seq_lens"] for feature in packed), [])), [1, 2, 3, 4, 6])
+        for feature in packed:
+            self.assertLessEqual(len(feature["input_ids"]), 8)
+            self.assertEqual(len(feature["labels"]), len(feature["input_ids"]))
+            self.assertEqual(feature["position_ids"], [i for length in feature["seq_lens"] for i in range(length)])
+
+    def test_data_collator_for_sequence_packing(self):
+        tokenizer = BertTokenizer(self.vocab_file)
+        features = [{"input_ids": [0, 1, 2], "labels": [0, 1, 2]}, {"input_ids": [3, 4], "labels": [3, 4]}]
+
+        data_collator = DataCollatorForSequencePacking(tokenizer, max_length=6, return_tensors="np")
+        batch = data_collator(features)
+        self.assertEqual(batch["input_ids"].tolist(), [[0, 1, 2, 3, 4, tokenizer.pad_token_id]])
+        self.assertEqual(batch["labels"].tolist(), [[0, 1, 2, 3, 4, -100]])
+        self.assertEqual(batch["position_ids"].tolist(), [[0, 1, 2, 0, 1, 0]])
+        self.assertEqual(batch["attention_mask"].shape, (1, 1, 6, 6))
+        # The second example only attends to itself
+        self.assertEqual(batch["attention_mask"][0, 0, 4].tolist(), [0, 0, 0, 1, 1, 0])
+        self.assertEqual(batch["attention_mask"][0, 0, 1].tolist(), [1, 1, 0, 0, 0, 0])
+
+        data_collator = DataCollatorForSequencePacking(tokenizer, max_length=4, causal=False)
+        batch = data_collator(features)
+        self.assertEqual(batch["input_ids"].shape, [2, 4])
+        self.assertEqual(batch["attention_mask"][0, 0, 0].tolist(), [1, 1, 1, 0])
+
     def test_data_collator_for_token_classification(self):
         tokenizer = BertTokenizer(self.vocab_file)
         features = [
@@ -15,7 +15,7 @@
 import os
 import unittest
 
-from paddlenlp.data import SamplerHelper
+from paddlenlp.data import LengthGroupedBatchSampler, SamplerHelper
 from paddlenlp.datasets import load_dataset
 from tests.common_test import CpuCommonTest
 from tests.testing_utils import assert_raises, get_tests_dir
@@ -142,5 +142,58 @@ class TestSampler(CpuCommonTest):
             self.check_output_equal(i, sample)
 
 
+class TestLengthGroupedBatchSampler(CpuCommonTest):
+    def setUp(self):
+        self.dataset = [{"input_ids": list(range(length))} for length in [5, 30, 12, 7, 25, 3, 18, 9, 1, 22]]
+        self.lengths = [len(sample["input_ids"]) for sample in self.dataset]
+
+    def test_batch_size(self):
+        sampler = LengthGroupedBatchSampler(self.dataset, batch_size=3, num_replicas=1, rank=0)
+        batches = list(sampler)
+        self.check_output_equal(len(batches), len(sampler))
+        self.check_output_equal(sorted(idx for batch in batches for idx in batch), list(range(len(self.dataset))))
+        # The samples are sorted by length in the single mega-batch
+        for batch in batches:
+            batch_lengths = [self.lengths[idx] for idx in batch]
+            self.check_output_equal(batch_lengths, sorted(batch_lengths, reverse=True))
+
+    def test_max_tokens(self):
+        sampler = LengthGroupedBatchSampler(self.dataset, batch_size=3, max_tokens=40, num_replicas=1, rank=0)
+        batches = list(sampler)
+        self.check_output_equal(sorted(idx for batch in batches for idx in batch), list(range(len(self.dataset))))
+        for batch in batches:
+            self.assertLessEqual(max(self.lengths[idx] for idx in batch) * len(batch), 40)
+
+    def test_max_tokens_stable_len(self):
+        sampler = LengthGroupedBatchSampler(
+            self.dataset, batch_size=3, max_tokens=40, num_replicas=1, rank=0, mega_batch_mult=1
+        )
+        num_batches = len(sampler)
+        for epoch in range(10):
+            sampler.set_epoch(epoch)
+            self.check_output_equal(len(sampler), num_batches)
+            self.check_output_equal(len(list(sampler)), num_batches)
+
+    def test_lengths_from_column(self):
+        dataset = [{"input_ids": [0], "length": length} for length in self.lengths]
+        sampler = LengthGroupedBatchSampler(dataset, batch_size=2, num_replicas=1, rank=0)
+        self.check_output_equal(sampler.lengths, self.lengths)
+
+    def test_shard(self):
+        samplers = [
+            LengthGroupedBatchSampler(self.dataset, batch_size=3, num_replicas=2, rank=rank) for rank in range(2)
+        ]
+        batches = [list(sampler) for sampler in samplers]
+        self.check_output_equal(len(batches[0]), len(batches[1]))
+        self.check_output_equal(len(batches[0]), len(samplers[0]))
+
+    def test_set_epoch(self):
+        sampler = LengthGroupedBatchSampler(self.dataset, batch_size=2, num_replicas=1, rank=0, seed=1)
+        sampler.set_epoch(1)
+        batches = list(sampler)
+        sampler.set_epoch(1, consumed_samples=4)
+        self.check_output_equal(list(sampler), batches[2:])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,137 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+from functools import partial
+
+from paddlenlp.datasets import ChunkedFileData, ColumnarFileData, MapDataset
+from paddlenlp.datasets.dataset import _ColumnarFileWriter
+
+
+def double(example):
+    return example * 2
+
+
+def double_batch(examples):
+    return [example * 2 for example in examples]
+
+
+def convert_example(example, max_length):
+    return {"input_ids": list(range(example % max_length)), "label": example % 2, "score": example / 2}
+
+
+class TestMapDataset(unittest.TestCase):
+    def setUp(self):
+        self.data = list(range(1003))
+        self.expected = [example * 2 for example in self.data]
+
+    def test_map_multiprocess(self):
+        ds = MapDataset(list(self.data)).map(double, num_workers=3, chunk_size=50, max_inflight_chunks=2)
+        self.assertEqual(list(ds), self.expected)
+
+    def test_map_multiprocess_batched(self):
+        ds = MapDataset(list(self.data)).map(double_batch, batched=True, num_workers=2, chunk_size=100)
+        self.assertEqual(list(ds), self.expected)
+
+    def test_map_cache_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_file = os.path.join(tmp_dir, "features.pkl")
+            ds = MapDataset(list(self.data)).map(double, num_workers=2, chunk_size=64, cache_file=cache_file)
+            self.assertIsInstance(ds.new_data, ChunkedFileData)
+            self.assertEqual(len(ds), len(self.expected))
+            self.assertEqual(ds[-1], self.expected[-1])
+            self.assertEqual(list(ds), self.expected)
+
+            # The existing cache file is loaded without calling the function
+            def fail(example):
+                raise RuntimeError("The function should not be called.")
+
+            ds = MapDataset(list(self.data)).map(fail, cache_file=cache_file)
+            self.assertEqual(list(ds), self.expected)
+
+    def test_map_cache_file_failed(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_file = os.path.join(tmp_dir, "features.pkl")
+            with self.assertRaises(ZeroDivisionError):
+                MapDataset([1, 0, 2]).map(lambda example: 1 / example, chunk_size=1, cache_file=cache_file)
+            self.assertEqual(os.listdir(tmp_dir), [])
+
+    def test_map_cache_dir(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            fn = partial(convert_example, max_length=7)
+            expected = [fn(example) for example in self.data]
+            ds = MapDataset(list(self.data)).map(fn, num_workers=2, chunk_size=64, cache_dir=tmp_dir)
+            self.assertIsInstance(ds.new_data, ColumnarFileData)
+            self.assertEqual(len(ds), len(expected))
+            self.assertEqual(ds[-1], expected[-1])
+            self.assertEqual(list(ds), expected)
+            self.assertEqual(len(os.listdir(tmp_dir)), 1)
+
+            # The same function and data are loaded from the cache
+            ds = MapDataset(list(self.data)).map(partial(convert_example, max_length=7), cache_dir=tmp_dir)
+            self.assertIsInstance(ds.new_data, ColumnarFileData)
+            self.assertEqual(len(os.listdir(tmp_dir)), 1)
+
+            # Another function or data makes a new cache
+            MapDataset(list(self.data)).map(partial(convert_example, max_length=5), cache_dir=tmp_dir)
+            MapDataset(list(self.data[:10])).map(partial(convert_example, max_length=7), cache_dir=tmp_dir)
+            self.assertEqual(len(os.listdir(tmp_dir)), 3)
+
+    def test_map_cache_dir_not_columnar(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ds = MapDataset([str(example) for example in self.data]).map(double, cache_dir=tmp_dir)
+            self.assertIsInstance(ds.new_data, ChunkedFileData)
+            self.assertEqual(list(ds), [str(example) * 2 for example in self.data])
+
+    def test_map_cache_dir_widen_dtype(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data = [
+                {"ids": [], "label": True},
+                {"ids": [1, 2], "label": 0},
+                {"ids": [3.5], "label": 2.5},
+                {"ids": [4], "label": 1},
+            ]
+            ds = MapDataset(data).map(lambda example: example, cache_dir=tmp_dir)
+            self.assertIsInstance(ds.new_data, ColumnarFileData)
+            self.assertEqual(list(ds), data)
+            self.assertIsInstance(ds[1]["ids"][0], float)
+
+    def test_map_cache_dir_batched_chunk_size(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            MapDataset(list(self.data)).map(double_batch, batched=True, chunk_size=100, cache_dir=tmp_dir)
+            MapDataset(list(self.data)).map(double_batch, batched=True, chunk_size=200, cache_dir=tmp_dir)
+            self.assertEqual(len(os.listdir(tmp_dir)), 2)
+
+    def test_map_cache_dir_fall_back(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data = [{"ids": [i], "label": i} for i in range(10)] + [{"ids": [[1, 2]], "label": None}]
+            with self.assertWarns(UserWarning):
+                ds = MapDataset(data).map(lambda example: example, chunk_size=4, cache_dir=tmp_dir)
+            self.assertIsInstance(ds.new_data, ChunkedFileData)
+            self.assertEqual(list(ds), data)
+            self.assertEqual(len(os.listdir(tmp_dir)), 1)
+
+    def test_columnar_cache_built_concurrently(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "cache")
+            writers = [_ColumnarFileWriter(path), _ColumnarFileWriter(path + "-other")]
+            # The second writer finishes the same cache after the first one
+            writers[1].path = path
+            for writer in writers:
+                writer.write([{"ids": [1, 2], "label": 0}])
+                writer.close()
+            self.assertEqual(os.listdir(tmp_dir), ["cache"])
+            self.assertEqual(list(ColumnarFileData(path)), [{"ids": [1, 2], "label": 0}])
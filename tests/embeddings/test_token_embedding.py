@@ -51,6 +51,16 @@ class TestTokenEmbeddingUNK(TestTokenEmbedding):
         )
 
 
+class TestTokenEmbeddingMmap(TestTokenEmbedding):
+    def test_mmap(self):
+        self.config["use_mmap"] = False
+        embedding = TokenEmbedding(**self.config)
+        self.config["use_mmap"] = True
+        mmap_embedding = TokenEmbedding(**self.config)
+        self.check_output_equal(embedding._idx_to_word[:-2], mmap_embedding._idx_to_word[:-2])
+        self.check_output_equal(embedding.weight.numpy()[:-2], mmap_embedding.weight.numpy()[:-2])
+
+
 class TestTokenEmbeddingExtendedVocab(TestTokenEmbedding):
     def setUp(self):
         super().setUp()
@@ -114,6 +124,42 @@ class TestTokenEmbeddingSimilarity(TestTokenEmbedding):
         expected_result = self.get_dot(vec_a, vec_b)
         self.check_output_equal(result, expected_result)
 
+    def test_most_similar(self):
+        self.embedding = TokenEmbedding(**self.config)
+        vocab_list = get_vocab_list(self.config["extended_vocab_path"])
+        word = vocab_list[np.random.randint(len(vocab_list))]
+        result = self.embedding.most_similar(word, topk=5)
+        expected_result = sorted(
+            [(other, self.embedding.cosine_sim(word, other)) for other in vocab_list if other != word],
+            key=lambda item: -item[1],
+        )[:5]
+        self.check_output_equal([w for w, _ in result], [w for w, _ in expected_result])
+        self.assertTrue(np.allclose([s for _, s in result], [s for _, s in expected_result], atol=1e-5))
+        # Chunked scoring should give the same neighbours.
+        chunked_result = self.embedding.most_similar([word], topk=5, chunk_size=7)[0]
+        self.check_output_equal([w for w, _ in result], [w for w, _ in chunked_result])
+
+    def test_most_similar_after_update(self):
+        self.embedding = TokenEmbedding(**self.config)
+        vocab_list = get_vocab_list(self.config["extended_vocab_path"])
+        word, other = vocab_list[0], vocab_list[1]
+        self.embedding.most_similar(word, topk=1)
+        # Make `other` the nearest neighbour of `word` by updating the trainable weights
+        weight = self.embedding.weight.numpy()
+        weight[self.embedding.get_idx_from_word(other)] = weight[self.embedding.get_idx_from_word(word)]
+        self.embedding.weight.set_value(weight)
+        self.check_output_equal(self.embedding.most_similar(word, topk=1)[0][0], other)
+
+    def test_analogy(self):
+        self.embedding = TokenEmbedding(**self.config)
+        vocab_list = get_vocab_list(self.config["extended_vocab_path"])
+        word_a, word_b, word_c = vocab_list[:3]
+        result = self.embedding.analogy(word_a, word_b, word_c, topk=3)
+        self.assertEqual(len(result), 3)
+        self.assertTrue(all(w not in (word_a, word_b, word_c) for w, _ in result))
+        chunked_result = self.embedding.analogy(word_a, word_b, word_c, topk=3, chunk_size=5)
+        self.check_output_equal([w for w, _ in result], [w for w, _ in chunked_result])
+
 
 if __name__ == "__main__":
     unittest.main()
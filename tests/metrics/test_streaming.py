@@ -0,0 +1,86 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import numpy as np
+import paddle
+
+from paddlenlp.metrics import (
+    Perplexity,
+    StreamingBLEU,
+    StreamingChunkEvaluator,
+    StreamingPerplexity,
+    StreamingRouge,
+)
+from paddlenlp.trainer import EvalPrediction
+
+
+class TestStreamingMetrics(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(2023)
+        self.logits = np.random.rand(4, 6, 3).astype("float32")
+        self.labels = np.array(
+            [[0, 1, 2, 1, 1, -100], [1, 2, 0, 0, -100, -100], [0, 0, 1, 2, 2, 0], [2, 1, -100, -100, -100, -100]]
+        )
+
+    def check_streaming(self, metric):
+        metric.reset()
+        for start in range(0, len(self.labels), 2):
+            metric.update(self.logits[start : start + 2], self.labels[start : start + 2])
+        streamed = metric.finalize()
+        self.assertEqual(streamed, metric(EvalPrediction(predictions=self.logits, label_ids=self.labels)))
+        return streamed
+
+    def test_chunk_evaluator(self):
+        metric = StreamingChunkEvaluator(["O", "B-Person", "I-Person"])
+        result = metric(
+            EvalPrediction(predictions=np.array([[0, 1, 2, 1, 2, 0]]), label_ids=np.array([[0, 1, 2, 1, 1, -100]]))
+        )
+        self.assertEqual(result, {"precision": 0.5, "recall": 0.3333333333333333, "f1": 0.4})
+        self.check_streaming(metric)
+
+    def test_perplexity(self):
+        result = self.check_streaming(StreamingPerplexity())
+        perplexity = Perplexity()
+        seq_mask = (self.labels != -100).astype("float32")
+        ce, word_num = perplexity.compute(
+            paddle.to_tensor(self.logits),
+            paddle.to_tensor(np.where(self.labels == -100, 0, self.labels)),
+            paddle.to_tensor(seq_mask),
+        )
+        perplexity.update(ce.numpy(), word_num.numpy())
+        self.assertAlmostEqual(result["perplexity"], perplexity.accumulate(), places=4)
+
+    def test_bleu(self):
+        metric = StreamingBLEU(pad_token_id=0)
+        result = metric(
+            EvalPrediction(predictions=np.array([[5, 6, 7, 8, 9, 0]]), label_ids=np.array([[5, 6, 7, 8, 10, -100]]))
+        )
+        self.assertAlmostEqual(result["bleu"], 0.668740304976422)
+        self.check_streaming(metric)
+
+    def test_rouge(self):
+        metric = StreamingRouge()
+        result = metric(
+            EvalPrediction(predictions=np.array([[5, 6, 7, 8, 9]]), label_ids=np.array([[5, 6, 7, 8, 10]]))
+        )
+        self.assertAlmostEqual(result["rouge1"], 0.8)
+        self.assertAlmostEqual(result["rouge2"], 0.75)
+        self.assertAlmostEqual(result["rougeL"], 0.8)
+        self.check_streaming(metric)
+
+
+if __name__ == "__main__":
+    unittest.main()
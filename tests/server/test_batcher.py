@@ -0,0 +1,134 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import unittest
+
+from paddlenlp.server.batcher import DynamicBatcher, merge_batch_data, split_batch_result
+
+
+class SplitBatchResultTest(unittest.TestCase):
+    def test_list(self):
+        self.assertEqual(split_batch_result(["a", "b", "c"], [1, 2]), [["a"], ["b", "c"]])
+        self.assertEqual(split_batch_result(("a", "b", "c"), [2, 1]), [("a", "b"), ("c",)])
+
+    def test_dict(self):
+        result = {"result": [1, 2, 3], "model": "uie", "extra": {"probs": [0.1, 0.2, 0.3]}}
+        self.assertEqual(
+            split_batch_result(result, [2, 1]),
+            [
+                {"result": [1, 2], "model": "uie", "extra": {"probs": [0.1, 0.2]}},
+                {"result": [3], "model": "uie", "extra": {"probs": [0.3]}},
+            ],
+        )
+
+    def test_unsplittable(self):
+        # Nothing has the length of the total samples
+        self.assertIsNone(split_batch_result({"count": 3}, [1, 2]))
+        self.assertIsNone(split_batch_result(["a", "b"], [1, 2]))
+
+    def test_merge_batch_data(self):
+        merged, sizes = merge_batch_data([{"text": "a", "pair": None}, {"text": ["b", "c"], "pair": None}])
+        self.assertEqual(merged, {"text": ["a", "b", "c"], "pair": None})
+        self.assertEqual(sizes, [1, 2])
+        self.assertEqual(merge_batch_data([{"text": "a"}, {"query": "b"}]), (None, None))
+        self.assertEqual(merge_batch_data([{"text": "a"}, "b"]), (None, None))
+
+
+class DynamicBatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.batch_sizes = []
+        self.lock = threading.Lock()
+
+    def create_batcher(self, process_fn, max_batch_size):
+        def _process_fn(data, parameters):
+            with self.lock:
+                self.calls.append((data, parameters))
+            return process_fn(data, parameters)
+
+        # The batch is sent once `max_batch_size` requests are collected, long before `max_wait_time`
+        return DynamicBatcher(
+            _process_fn, max_batch_size=max_batch_size, max_wait_time=5, observe_batch_size=self.batch_sizes.append
+        )
+
+    def submit_all(self, batcher, requests):
+        futures = [batcher.submit(data, parameters) for data, parameters in requests]
+        return [future.exception(timeout=10) or future.result() for future in futures]
+
+    def test_merge_list(self):
+        batcher = self.create_batcher(lambda data, parameters: [text.upper() for text in data["text"]], 3)
+        results = self.submit_all(batcher, [({"text": "a"}, {}), ({"text": ["b", "c"]}, {}), ({"text": "d"}, {})])
+        self.assertEqual(results, [["A"], ["B", "C"], ["D"]])
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.calls[0][0], {"text": ["a", "b", "c", "d"]})
+        self.assertEqual(self.batch_sizes, [3])
+
+    def test_merge_dict(self):
+        def process_fn(data, parameters):
+            return {"result": [len(text) for text in data["text"]], "model": "uie"}
+
+        batcher = self.create_batcher(process_fn, 2)
+        results = self.submit_all(batcher, [({"text": ["a", "bb"]}, {}), ({"text": "ccc"}, {})])
+        self.assertEqual(results, [{"result": [1, 2], "model": "uie"}, {"result": [3], "model": "uie"}])
+        self.assertEqual(len(self.calls), 1)
+
+    def test_mixed_parameters(self):
+        def process_fn(data, parameters):
+            return [text * parameters["repeat"] for text in data["text"]]
+
+        batcher = self.create_batcher(process_fn, 4)
+        results = self.submit_all(
+            batcher,
+            [
+                ({"text": "a"}, {"repeat": 1}),
+                ({"text": "b"}, {"repeat": 2}),
+                ({"text": "c"}, {"repeat": 1}),
+                ({"text": "d"}, {"repeat": 2}),
+            ],
+        )
+        self.assertEqual(results, [["a"], ["bb"], ["c"], ["dd"]])
+        # Only the requests with the same parameters are merged
+        self.assertEqual(
+            sorted((data["text"], parameters["repeat"]) for data, parameters in self.calls),
+            [(["a", "c"], 1), (["b", "d"], 2)],
+        )
+        self.assertEqual(self.batch_sizes, [2, 2])
+
+    def test_error_fallback(self):
+        def process_fn(data, parameters):
+            if "bad" in data["text"]:
+                raise ValueError("bad text")
+            return [text.upper() for text in data["text"]]
+
+        batcher = self.create_batcher(process_fn, 3)
+        results = self.submit_all(batcher, [({"text": "a"}, {}), ({"text": "bad"}, {}), ({"text": "c"}, {})])
+        # The merged request fails, then every request is processed one by one and only the bad one fails
+        self.assertEqual(results[0], ["A"])
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(results[2], ["C"])
+        self.assertEqual(len(self.calls), 4)
+        self.assertEqual(self.batch_sizes, [1, 1, 1])
+
+    def test_unsplittable_fallback(self):
+        batcher = self.create_batcher(lambda data, parameters: {"count": len(data["text"])}, 2)
+        results = self.submit_all(batcher, [({"text": "a"}, {}), ({"text": "b"}, {})])
+        self.assertEqual(results, [{"count": 1}, {"count": 1}])
+        self.assertEqual(len(self.calls), 3)
+
+    def test_unmergeable_data(self):
+        batcher = self.create_batcher(lambda data, parameters: data, 2)
+        results = self.submit_all(batcher, [("a", {}), ("b", {})])
+        self.assertEqual(results, ["a", "b"])
+        self.assertEqual(len(self.calls), 2)
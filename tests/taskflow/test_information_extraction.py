@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import tempfile
 import unittest
 
 from paddlenlp import Taskflow
@@ -63,6 +64,26 @@ class TestUIETask(unittest.TestCase):
                     self.assertIn("text", entity)
                     self.assertIn("probability", entity)
 
+    def test_result_cache_shared_dir(self):
+        text = "2月8日上午北京冬奥会自由式滑雪女子大跳台决赛中中国选手谷爱凌以188.25分获得金牌！"
+        with tempfile.TemporaryDirectory() as cache_dir:
+            outputs = []
+            for schema in (["时间"], ["选手"]):
+                uie = Taskflow(
+                    task="information_extraction",
+                    model="__internal_testing__/tiny-random-uie",
+                    schema=schema,
+                    position_prob=0.0,
+                    cache_size=8,
+                    cache_dir=cache_dir,
+                )
+                outputs.append(uie(text))
+                # The instance with another schema never hits the on-disk results of the first one
+                self.assertEqual(uie.task_instance.cache_stats()["hits"], 0)
+            for output, field in zip(outputs, ["时间", "选手"]):
+                for result in output:
+                    self.assertTrue(set(result.keys()) <= {field})
+
     def test_relation_extraction(self):
         schema = [{"歌曲名称": ["歌手", "所属专辑"]}]
         entity_type = "歌曲名称"
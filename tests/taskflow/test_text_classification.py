@@ -201,3 +201,9 @@ class TestTextClassificationTask(unittest.TestCase):
                 # if multi_label, all predictions should be greater than the threshold
                 if mode == "multi_label":
                     self.assertGreater(dygraph_pred["score"], dygraph_taskflow.task_instance.multilabel_threshold)
+
+        # The streaming results are the same as the results of the whole inputs
+        stream_results = list(static_taskflow.stream(iter(input_text), chunk_size=3))
+        self.assertEqual(len(stream_results), len(input_text))
+        for static_result, stream_result in zip(static_results, stream_results):
+            self.assertEqual(static_result["predictions"], stream_result["predictions"])
@@ -181,3 +181,50 @@ class TestTextSimilarityTask(unittest.TestCase):
             self.assertTrue("text1" in result)
             self.assertTrue("text2" in result)
             self.assertIsInstance(result["similarity"], float)
+
+    def test_sort_by_length(self):
+        input_text = [
+            ["Tomorrow is another day, and the day after tomorrow is another day too", "Today is a sunny day"],
+            ["This is my dream", "This is my father"],
+            ["Day", "Night"],
+        ]
+        sorted_taskflow = Taskflow(
+            model="rocketqav2-en-marco-cross-encoder",
+            task="text_similarity",
+            task_path=self.model,
+            max_seq_len=self.max_seq_len,
+            batch_size=2,
+        )
+        unsorted_taskflow = Taskflow(
+            model="rocketqav2-en-marco-cross-encoder",
+            task="text_similarity",
+            task_path=self.model,
+            max_seq_len=self.max_seq_len,
+            batch_size=2,
+            sort_by_length=False,
+        )
+        sorted_results = sorted_taskflow(input_text)
+        unsorted_results = unsorted_taskflow(input_text)
+        for text, sorted_result, unsorted_result in zip(input_text, sorted_results, unsorted_results):
+            self.assertEqual(sorted_result["text1"], text[0])
+            self.assertEqual(sorted_result["text2"], text[1])
+            self.assertAlmostEqual(sorted_result["similarity"], unsorted_result["similarity"], delta=1e-5)
+
+    def test_similarity_matrix(self):
+        similarity = Taskflow(
+            task="text_similarity",
+            model="__internal_testing__/tiny-random-bert",
+            batch_size=2,
+        )
+        texts = ["光眼睛大就好看吗", "眼睛好看吗？", "小蝌蚪找妈妈怎么样"]
+        matrix = similarity.similarity_matrix(texts[:1], texts)
+        self.assertEqual(matrix.shape, (1, 3))
+
+        # The scores of the pairs are the same as the ones of the matrix, and the embeddings are served from the cache
+        results = similarity([[texts[0], text] for text in texts])
+        for i, result in enumerate(results):
+            self.assertAlmostEqual(result["similarity"], float(matrix[0][i]), delta=1e-5)
+        self.assertEqual(similarity.task_instance._embedding_cache.stats()["misses"], 3)
+
+        matrix = similarity.similarity_matrix(texts)
+        self.assertEqual(matrix.shape, (3, 3))
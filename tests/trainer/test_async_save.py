@@ -0,0 +1,100 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+
+from paddlenlp.trainer import Trainer
+from paddlenlp.trainer.trainer_callback import TrainerState
+from paddlenlp.trainer.trainer_utils import get_last_checkpoint
+from paddlenlp.trainer.utils.async_save import ASYNC_SAVE_TMP_PREFIX, AsyncCheckpointSaver
+
+
+class AsyncSaveTest(unittest.TestCase):
+    def setUp(self):
+        self.run_dir = tempfile.mkdtemp()
+        # The trainer only with the states used by the async saving
+        self.trainer = Trainer.__new__(Trainer)
+        self.trainer.args = SimpleNamespace(
+            world_size=1,
+            should_save=True,
+            use_hybrid_parallel=False,
+            local_rank=-1,
+            save_total_limit=1,
+            output_dir=self.run_dir,
+        )
+        self.trainer.state = TrainerState()
+        self.trainer._async_saver = AsyncCheckpointSaver()
+        self.trainer._pending_checkpoint = None
+        os.makedirs(os.path.join(self.run_dir, "checkpoint-1"))
+        # The checkpoints are rotated by mtime
+        os.utime(os.path.join(self.run_dir, "checkpoint-1"), (0, 0))
+
+    def tearDown(self):
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+
+    def _submit(self, job):
+        save_dir = os.path.join(self.run_dir, ASYNC_SAVE_TMP_PREFIX + "checkpoint-2")
+        output_dir = os.path.join(self.run_dir, "checkpoint-2")
+        os.makedirs(save_dir)
+        self.trainer._pending_checkpoint = (save_dir, output_dir, self.run_dir)
+        self.trainer._async_saver.submit(job)
+        return save_dir, output_dir
+
+    def test_finalize(self):
+        started, release = threading.Event(), threading.Event()
+
+        def job():
+            started.set()
+            release.wait()
+            self.trainer._write_async_checkpoint([({"step": 2}, os.path.join(save_dir, "state.pdparams"))])
+
+        save_dir, output_dir = self._submit(job)
+        started.wait()
+        # The checkpoint being written is neither finalized nor seen as the last checkpoint
+        self.trainer._maybe_finalize_async_checkpoint()
+        self.assertIsNotNone(self.trainer._pending_checkpoint)
+        self.assertEqual(get_last_checkpoint(self.run_dir), os.path.join(self.run_dir, "checkpoint-1"))
+
+        release.set()
+        while self.trainer._async_saver.is_running():
+            self.trainer._async_saver._thread.join(0.1)
+        self.trainer._maybe_finalize_async_checkpoint()
+        self.assertIsNone(self.trainer._pending_checkpoint)
+        self.assertFalse(os.path.exists(save_dir))
+        self.assertTrue(os.path.exists(os.path.join(output_dir, "state.pdparams")))
+        # The older checkpoint is rotated on the training thread
+        self.assertEqual(sorted(os.listdir(self.run_dir)), ["checkpoint-2"])
+
+    def test_failed(self):
+        def job():
+            raise IOError("disk is full")
+
+        save_dir, output_dir = self._submit(job)
+        with self.assertRaises(IOError):
+            self.trainer._finalize_async_checkpoint()
+        self.assertIsNone(self.trainer._pending_checkpoint)
+        self.assertTrue(os.path.exists(save_dir))
+        self.assertFalse(os.path.exists(output_dir))
+        self.assertEqual(get_last_checkpoint(self.run_dir), os.path.join(self.run_dir, "checkpoint-1"))
+        # The error is reported only once
+        self.trainer._finalize_async_checkpoint()
+
+
+if __name__ == "__main__":
+    unittest.main()
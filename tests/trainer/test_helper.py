@@ -0,0 +1,100 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from paddlenlp.trainer.utils.helper import NestedArrayAccumulator, nested_concat, nested_truncate
+
+
+class NestedArrayAccumulatorTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        # The steps of ragged sequence lengths, with the logits and the labels nested in a tuple
+        self.steps = []
+        for batch_size, seq_len in [(4, 7), (4, 3), (2, 9), (3, 5)]:
+            logits = rng.rand(batch_size, seq_len, 6).astype("float32")
+            labels = rng.randint(0, 6, size=(batch_size, seq_len)).astype("int64")
+            scores = rng.rand(batch_size).astype("float32")
+            self.steps.append((logits, (labels, scores)))
+
+    def nested_concat_all(self, steps, padding_index=-100):
+        # The result of accumulating the steps with `nested_concat` as the trainer used to
+        result = None
+        for step in steps:
+            result = step if result is None else nested_concat(result, step, padding_index=padding_index)
+        return result
+
+    def assert_nested_equal(self, actual, expected):
+        self.assertEqual(type(actual), type(expected))
+        if isinstance(expected, (list, tuple)):
+            self.assertEqual(len(actual), len(expected))
+            for actual_item, expected_item in zip(actual, expected):
+                self.assert_nested_equal(actual_item, expected_item)
+        else:
+            self.assertEqual(actual.dtype, expected.dtype)
+            np.testing.assert_array_equal(actual, expected)
+
+    def test_ragged(self):
+        for padding_index in [-100, 0]:
+            accumulator = NestedArrayAccumulator(padding_index=padding_index)
+            for step in self.steps:
+                accumulator.add(step)
+            self.assertEqual(len(accumulator), len(self.steps))
+            self.assert_nested_equal(accumulator.get(), self.nested_concat_all(self.steps, padding_index))
+            # The chunks are released once gathered
+            self.assertIsNone(accumulator.get())
+
+    def test_limit(self):
+        accumulator = NestedArrayAccumulator()
+        for step in self.steps:
+            accumulator.add(step)
+        self.assert_nested_equal(accumulator.get(limit=9), nested_truncate(self.nested_concat_all(self.steps), 9))
+
+    def test_nested_list(self):
+        steps = [[labels, [scores]] for _, (labels, scores) in self.steps]
+        accumulator = NestedArrayAccumulator()
+        for step in steps:
+            accumulator.add(step)
+        self.assert_nested_equal(accumulator.get(), self.nested_concat_all(steps))
+
+    def test_scalar(self):
+        accumulator = NestedArrayAccumulator()
+        for loss in [0.5, 1.5, 2.5]:
+            accumulator.add(np.array(loss, dtype="float32"))
+        np.testing.assert_array_equal(accumulator.get(), np.array([0.5, 1.5, 2.5], dtype="float32"))
+
+    def test_memmap(self):
+        with tempfile.TemporaryDirectory() as memmap_dir:
+            accumulator = NestedArrayAccumulator(memmap_dir=memmap_dir)
+            for step in self.steps:
+                accumulator.add(step)
+            result = accumulator.get()
+            self.assert_nested_equal(
+                (np.asarray(result[0]), (np.asarray(result[1][0]), np.asarray(result[1][1]))),
+                self.nested_concat_all(self.steps),
+            )
+            self.assertIsInstance(result[0], np.memmap)
+            # Only the results are kept in the directory, the chunks are removed
+            self.assertEqual(sorted(os.listdir(memmap_dir)), ["result-0.npy", "result-1.npy", "result-2.npy"])
+            del result
+
+    def test_mismatched_structure(self):
+        accumulator = NestedArrayAccumulator()
+        accumulator.add(self.steps[0])
+        with self.assertRaises(ValueError):
+            accumulator.add(self.steps[1][0])
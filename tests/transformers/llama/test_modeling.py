@@ -147,6 +147,20 @@ class LlamaModelTester:
         result = model(input_ids)
         self.parent.assertEqual(result[0].shape, [self.batch_size, self.seq_length, self.hidden_size])
 
+    def create_and_check_model_4d_attention_mask(
+        self, config: LlamaConfig, input_ids, input_mask, sequence_labels, token_labels, choice_labels
+    ):
+        model = LlamaModel(config)
+        model.eval()
+        result = model(input_ids)
+        # The prebuilt causal mask is the same as the default one
+        attention_mask = paddle.tril(paddle.ones([self.seq_length, self.seq_length], dtype="int64"))
+        attention_mask = attention_mask[None, None, :, :].expand(
+            [self.batch_size, 1, self.seq_length, self.seq_length]
+        )
+        result_4d = model(input_ids, attention_mask=attention_mask)
+        self.parent.assertTrue(paddle.allclose(result[0], result_4d[0], atol=1e-5))
+
     def create_and_check_model_past_large_inputs(
         self,
         config: LlamaConfig,
@@ -244,6 +258,10 @@ class LlamaModelTest(ModelTesterMixin, unittest.TestCase):
         config_and_inputs = self.model_tester.prepare_config_and_inputs()
         self.model_tester.create_and_check_model(*config_and_inputs)
 
+    def test_model_4d_attention_mask(self):
+        config_and_inputs = self.model_tester.prepare_config_and_inputs()
+        self.model_tester.create_and_check_model_4d_attention_mask(*config_and_inputs)
+
     def test_model_name_list(self):
         pass
 
@@ -0,0 +1,70 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import paddle
+
+from paddlenlp.transformers import GPTLMHeadModel
+from paddlenlp.transformers.continuous_batching import ContinuousBatchingEngine
+
+
+class ContinuousBatchingEngineTest(unittest.TestCase):
+    def setUp(self):
+        self.model = GPTLMHeadModel.from_pretrained("__internal_testing__/tiny-random-gpt")
+        self.model.eval()
+        self.prompts = [list(range(200, 230)), list(range(100, 105)), list(range(300, 317)), [400]]
+        self.max_new_tokens = [6, 2, 9, 4]
+
+    def generate_one_by_one(self):
+        outputs = []
+        for prompt, max_new_tokens in zip(self.prompts, self.max_new_tokens):
+            decoded_ids = self.model.generate(
+                paddle.to_tensor([prompt]), max_length=max_new_tokens, decode_strategy="greedy_search"
+            )[0]
+            outputs.append(decoded_ids.tolist()[0])
+        return outputs
+
+    def test_greedy_search(self):
+        expected_outputs = self.generate_one_by_one()
+
+        # The batch is smaller than the requests, so the waiting requests join the running batch
+        engine = ContinuousBatchingEngine(self.model, max_batch_size=2)
+        futures = [
+            engine.add_request(prompt, max_new_tokens=max_new_tokens)
+            for prompt, max_new_tokens in zip(self.prompts, self.max_new_tokens)
+        ]
+        engine.run_until_complete()
+        self.assertEqual([future.result() for future in futures], expected_outputs)
+        self.assertFalse(engine.has_unfinished_requests())
+
+    def test_background_thread(self):
+        expected_outputs = self.generate_one_by_one()
+
+        engine = ContinuousBatchingEngine(self.model, max_batch_size=3)
+        engine.start()
+        try:
+            futures = [
+                engine.add_request(prompt, max_new_tokens=max_new_tokens)
+                for prompt, max_new_tokens in zip(self.prompts, self.max_new_tokens)
+            ]
+            self.assertEqual([future.result(timeout=60) for future in futures], expected_outputs)
+        finally:
+            engine.stop()
+
+    def test_eos_token_id(self):
+        expected_output = self.generate_one_by_one()[0]
+        engine = ContinuousBatchingEngine(self.model, eos_token_id=expected_output[1])
+        outputs = engine.generate([self.prompts[0]], max_new_tokens=self.max_new_tokens[0])
+        self.assertEqual(outputs[0], expected_output[: expected_output.index(expected_output[1]) + 1])
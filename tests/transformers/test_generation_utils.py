@@ -31,6 +31,7 @@ from paddlenlp.transformers import (  # import gpt model
     PretrainedTokenizer,
 )
 from paddlenlp.transformers.generation_utils import (
+    BaseStreamer,
     BeamSearchScorer,
     ForcedBOSTokenLogitsProcessor,
     ForcedEOSTokenLogitsProcessor,
@@ -38,6 +39,7 @@ from paddlenlp.transformers.generation_utils import (
     LogitsProcessorList,
     MinLengthLogitsProcessor,
     RepetitionPenaltyLogitsProcessor,
+    StaticKVCacheLayer,
     TopKProcess,
     TopPProcess,
     get_unfinished_flag,
@@ -1122,6 +1124,91 @@ class GenerationUtilsTestCase(unittest.TestCase):
         decoded_ids = model.generate(paddle.to_tensor(input_ids), max_length=6, eos_token_id=[1800, 23410])[0].tolist()
         self.assertEqual(expected_output_ids, decoded_ids)
 
+    def test_gpt_generation_with_streamer(self):
+        class CollectStreamer(BaseStreamer):
+            def __init__(self):
+                self.tokens = []
+                self.ended = False
+
+            def put(self, value):
+                self.tokens.append(value.numpy())
+
+            def end(self):
+                self.ended = True
+
+        model = GPTLMHeadModel.from_pretrained("__internal_testing__/tiny-random-gpt")
+        model.eval()
+
+        input_ids = np.array([list(range(200, 300)), list(range(100, 200))])
+        decoded_ids = model.generate(paddle.to_tensor(input_ids), max_length=6)[0].tolist()
+
+        streamer = CollectStreamer()
+        streamed_ids = model.generate(paddle.to_tensor(input_ids), max_length=6, streamer=streamer)[0].tolist()
+        self.assertEqual(decoded_ids, streamed_ids)
+        self.assertTrue(streamer.ended)
+        self.assertEqual(np.concatenate(streamer.tokens, axis=-1).tolist(), decoded_ids)
+
+        with self.assertRaises(ValueError):
+            model.generate(
+                paddle.to_tensor(input_ids),
+                max_length=6,
+                decode_strategy="beam_search",
+                num_beams=2,
+                streamer=streamer,
+            )
+
+
+class StaticKVCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.model = GPTLMHeadModel.from_pretrained("__internal_testing__/tiny-random-gpt")
+        self.model.eval()
+        self.input_ids = paddle.to_tensor([list(range(200, 220)), list(range(100, 120))])
+
+    def test_static_cache_layer(self):
+        key, value = paddle.randn([2, 4, 3, 8]), paddle.randn([2, 4, 3, 8])
+        layer = StaticKVCacheLayer(key, value, capacity=2, key_seq_axis=2, value_seq_axis=2)
+        self.assertEqual(layer.k.shape, [2, 4, 3, 8])
+
+        new_key, new_value = paddle.randn([2, 4, 1, 8]), paddle.randn([2, 4, 1, 8])
+        cached_key, cached_value = layer.update(new_key, new_value)
+        self.assertTrue(paddle.allclose(cached_key, paddle.concat([key, new_key], axis=2)))
+        self.assertTrue(paddle.allclose(cached_value, paddle.concat([value, new_value], axis=2)))
+
+        index = paddle.to_tensor([1, 1])
+        layer.reorder(index)
+        self.assertTrue(paddle.allclose(layer.k, paddle.index_select(cached_key, index)))
+
+        layer.update(new_key, new_value)
+        with self.assertRaises(ValueError):
+            layer.update(new_key, new_value)
+
+    def test_greedy_search(self):
+        expected_ids = self.model.generate(self.input_ids, max_length=8)[0]
+        decoded_ids = self.model.generate(self.input_ids, max_length=8, use_static_cache=True)[0]
+        self.assertEqual(expected_ids.tolist(), decoded_ids.tolist())
+
+    def test_sample(self):
+        paddle.seed(100)
+        expected_ids = self.model.generate(self.input_ids, max_length=8, decode_strategy="sampling", top_k=5)[0]
+        paddle.seed(100)
+        decoded_ids = self.model.generate(
+            self.input_ids, max_length=8, decode_strategy="sampling", top_k=5, use_static_cache=True
+        )[0]
+        self.assertEqual(expected_ids.tolist(), decoded_ids.tolist())
+
+    def test_beam_search(self):
+        expected_ids = self.model.generate(self.input_ids, max_length=8, decode_strategy="beam_search", num_beams=3)[0]
+        decoded_ids = self.model.generate(
+            self.input_ids, max_length=8, decode_strategy="beam_search", num_beams=3, use_static_cache=True
+        )[0]
+        self.assertEqual(expected_ids.tolist(), decoded_ids.tolist())
+
+    def test_unsupported_model(self):
+        # The models not declaring the layout of their cache could not use the static cache
+        self.model.static_cache_axes = None
+        with self.assertRaises(ValueError):
+            self.model.generate(self.input_ids, max_length=8, use_static_cache=True)
+
 
 class GenerationD2STest(unittest.TestCase):
     def test_to_static_use_top_k(self):
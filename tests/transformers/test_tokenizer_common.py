@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import gc
 import inspect
 import itertools
 import json
@@ -28,7 +29,7 @@ from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
 from paddlenlp.transformers import PretrainedFastTokenizer, PretrainedTokenizer
-from paddlenlp.transformers.tokenizer_utils import AddedToken, Trie
+from paddlenlp.transformers.tokenizer_utils import _ENCODE_POOLS, AddedToken, Trie
 from paddlenlp.transformers.tokenizer_utils_base import PretrainedTokenizerBase
 
 from ..testing_utils import get_tests_dir
@@ -2100,6 +2101,66 @@ class TokenizerTesterMixin:
                 # Assert there is online added_tokens special_tokens
                 self.assertEqual(sum(tokens_with_offsets["special_tokens_mask"]), added_tokens)
 
+    def test_batch_encode_parallel(self):
+        if not self.test_offsets:
+            return
+
+        tokenizers = self.get_tokenizers(do_lower_case=False)
+        for tokenizer in tokenizers:
+            with self.subTest(f"{tokenizer.__class__.__name__}"):
+                sequences = [
+                    ("Wonderful no inspiration example with subtoken", "Along with an awesome pair"),
+                    ("Testing batch encode plus", "Testing batch encode plus with different sequence lengths"),
+                ] * 4
+
+                encoded_sequences = tokenizer.batch_encode(sequences, return_offsets_mapping=True)
+                tokenizer.enable_parallel_encoding(num_workers=2, min_batch_size=2)
+                try:
+                    encoded_sequences_parallel = tokenizer.batch_encode(sequences, return_offsets_mapping=True)
+                finally:
+                    tokenizer.disable_parallel_encoding()
+                self.assertEqual(encoded_sequences["input_ids"], encoded_sequences_parallel["input_ids"])
+                self.assertEqual(encoded_sequences["offset_mapping"], encoded_sequences_parallel["offset_mapping"])
+
+    def test_parallel_encoding_pool_released(self):
+        if not self.test_offsets:
+            return
+
+        tokenizer = self.get_tokenizer()
+        tokenizer.enable_parallel_encoding(num_workers=2, min_batch_size=2)
+        tokenizer.batch_encode(["Testing batch encode plus"] * 2)
+        key = id(tokenizer)
+        self.assertIn(key, _ENCODE_POOLS)
+        # The pool is shut down with the tokenizer even if the parallel encoding is not disabled
+        del tokenizer
+        gc.collect()
+        self.assertNotIn(key, _ENCODE_POOLS)
+
+    def test_batch_encode_parallel_sentencepiece(self):
+        if not self.test_sentencepiece:
+            return
+
+        tokenizer = self.get_tokenizer()
+        sequences = ["This is a test", "I was born in 92000, and this is falsé."] * 4
+        encoded_sequences = tokenizer.batch_encode(sequences)
+        tokenizer.enable_parallel_encoding(num_workers=2, min_batch_size=2)
+        try:
+            encoded_sequences_parallel = tokenizer.batch_encode(sequences)
+        finally:
+            tokenizer.disable_parallel_encoding()
+        self.assertEqual(encoded_sequences["input_ids"], encoded_sequences_parallel["input_ids"])
+
+    def test_parallel_encoding_unserializable(self):
+        tokenizer = self.get_tokenizer()
+        encoded_sequences = tokenizer.batch_encode(["Testing batch encode plus"] * 2)
+        # A generator could not be serialized, so the tokenizer stays in the current process
+        tokenizer._unserializable = (i for i in range(1))
+        tokenizer.enable_parallel_encoding(num_workers=2, min_batch_size=2)
+        self.assertEqual(tokenizer._encode_num_workers, 0)
+        encoded_sequences_serial = tokenizer.batch_encode(["Testing batch encode plus"] * 2)
+        self.assertNotIn(id(tokenizer), _ENCODE_POOLS)
+        self.assertEqual(encoded_sequences["input_ids"], encoded_sequences_serial["input_ids"])
+
     def test_special_tokens_initialization_with_non_empty_additional_special_tokens(self):
         tokenizer_list = [(self.tokenizer_class, self.get_tokenizer())]
 
@@ -15,11 +15,12 @@
 
 import json
 import os
+import pickle
 import tempfile
 import unittest
 
 from paddlenlp.transformers import BertTokenizer
-from paddlenlp.transformers.tokenizer_utils import PretrainedTokenizer
+from paddlenlp.transformers.tokenizer_utils import PretrainedTokenizer, SubwordCache
 from paddlenlp.utils.env import TOKENIZER_CONFIG_NAME
 
 
@@ -60,3 +61,18 @@ class TokenizerUtilsTest(unittest.TestCase):
             self.assertTrue(os.path.exists(os.path.join(tempdir, model_name, TOKENIZER_CONFIG_NAME)))
             # check against double appending model_name in cache_dir
             self.assertFalse(os.path.exists(os.path.join(tempdir, model_name, model_name)))
+
+    def test_subword_cache(self):
+        cache = SubwordCache(max_size=2)
+        cache["a"] = "a"
+        cache["b"] = "b"
+        self.assertEqual(cache.get("a"), "a")
+        cache["c"] = "c"
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "a")
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats()["hits"], 2)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+        cache = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(cache.get("c"), "c")
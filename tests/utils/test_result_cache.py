@@ -0,0 +1,86 @@
+# Copyright (c) 2023 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from paddlenlp.utils.result_cache import ResultCache, hash_content
+
+
+class ResultCacheTest(unittest.TestCase):
+    def test_hash_content(self):
+        self.assertEqual(hash_content({"a": 1, "b": [1, 2]}), hash_content({"b": [1, 2], "a": 1}))
+        self.assertNotEqual(hash_content(["text"]), hash_content(["text2"]))
+        array = np.arange(10000)
+        other = array.copy()
+        other[5000] = -1
+        self.assertNotEqual(hash_content(array), hash_content(other))
+
+    def test_lru_eviction(self):
+        cache = ResultCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), (True, 1))
+        cache.put("c", 3)
+        self.assertEqual(cache.get("b"), (False, None))
+        self.assertEqual(cache.get("a"), (True, 1))
+        self.assertEqual(cache.get("c"), (True, 3))
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 3)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["size"], 2)
+
+    def test_ttl(self):
+        cache = ResultCache(max_size=2, ttl=0.05)
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), (True, 1))
+        time.sleep(0.1)
+        self.assertEqual(cache.get("a"), (False, None))
+
+    def test_result_is_copied(self):
+        cache = ResultCache()
+        result = [{"label": "positive"}]
+        cache.put("a", result)
+        result[0]["label"] = "negative"
+        _, cached = cache.get("a")
+        self.assertEqual(cached[0]["label"], "positive")
+        cached[0]["label"] = "negative"
+        self.assertEqual(cache.get("a")[1][0]["label"], "positive")
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ResultCache(max_size=1, cache_dir=cache_dir)
+            cache.put("a", [1, 2])
+            cache.put("b", [3])
+            self.assertEqual(cache.get("a"), (True, [1, 2]))
+            self.assertEqual(cache.stats()["disk_hits"], 1)
+
+            new_cache = ResultCache(max_size=1, cache_dir=cache_dir)
+            self.assertEqual(new_cache.get("b"), (True, [3]))
+
+    def test_disk_tier_bounded(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ResultCache(max_size=1, cache_dir=cache_dir, max_disk_size=2)
+            cache.put("aa", 1)
+            cache.put("bb", 2)
+            cache.put("cc", 3)
+            self.assertEqual(cache.get("aa"), (False, None))
+            self.assertEqual(cache.get("bb"), (True, 2))
+
+            new_cache = ResultCache(max_size=1, cache_dir=cache_dir, max_disk_size=1)
+            self.assertEqual(new_cache.get("bb"), (False, None))
+            self.assertEqual(new_cache.get("cc"), (True, 3))